@@ -17,6 +17,12 @@ logo_path = os.path.join(current_dir, 'logo.png')
 if os.path.exists(logo_path):
     datas.append((logo_path, '.'))
 
+# 预先生成理论知识搜索索引并随包发布
+from core.theory_index import build_theory_index
+theory_index_path = os.path.join(current_dir, 'cache', 'theory_index.json.gz')
+build_theory_index(theory_index_path, current_dir)
+datas.append((theory_index_path, 'cache'))
+
 # 获取目录中所有的 py 文件
 py_files = []
 for file in os.listdir(current_dir):
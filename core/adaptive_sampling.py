@@ -0,0 +1,270 @@
+"""
+自适应采样 - 只在需要的地方加密采样，每一轮细分都是一次数组求值
+函数曲线 y = f(x)：均匀初始采样后，对中点偏离弦线超过容差的区间二分，
+细分到最小宽度仍不收敛的区间视为极点或跳跃间断，在该处插入NaN断开曲线
+隐式曲线 f(x, y) = 0：粗网格整体求值后，仅对出现变号（或接近零）的单元做四叉细分，
+最后在叶子单元上执行移动方块（marching squares）得到线段
+"""
+
+import warnings
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+# 函数曲线：初始采样点数、最大细分轮数、相对容差（相对于y方向可见范围）
+DEFAULT_INITIAL_POINTS = 200
+DEFAULT_CURVE_DEPTH = 10
+DEFAULT_TOLERANCE = 1e-3
+# 不收敛区间中一半的变化量占比超过此值时视为间断
+JUMP_DOMINANCE = 0.9
+
+# 隐式曲线默认细化层数：每层单元边长减半
+DEFAULT_IMPLICIT_DEPTH = 4
+
+# 四条边的端点（角点编号：0 左下、1 右下、2 右上、3 左上）
+_EDGES = ((0, 1), (1, 2), (2, 3), (3, 0))
+
+
+def evaluate(func: Callable, x: np.ndarray) -> np.ndarray:
+    """对数组整体求值，返回与x同形状的浮点数组；无法计算或为复数的点记为NaN
+
+    func 可以是 core.expression_engine 编译的表达式或 sympy.lambdify 的结果；
+    常数表达式返回标量时会广播，个别函数不支持数组时逐点求值。
+    """
+    x = np.asarray(x, dtype=float)
+    with np.errstate(all="ignore"):
+        try:
+            y = np.asarray(func(x))
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+            y = np.array([_evaluate_point(func, xi) for xi in x.ravel()]).reshape(x.shape)
+        if np.iscomplexobj(y):
+            y = np.where(y.imag == 0, y.real, np.nan)
+        return np.broadcast_to(y.astype(float), x.shape).copy()
+
+
+def _evaluate_point(func: Callable, x: float) -> complex:
+    try:
+        return complex(func(x))
+    except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+        return complex(np.nan)
+
+
+def _y_scale(y: np.ndarray) -> float:
+    """没有给出可见范围时，用样本的稳健范围（去掉两端5%）估计y方向尺度"""
+    finite = y[np.isfinite(y)]
+    if finite.size == 0:
+        return 1.0
+    low, high = np.percentile(finite, [5, 95])
+    return float(high - low) or max(abs(float(high)), 1.0)
+
+
+def adaptive_sample(func: Callable,
+                    x_min: float,
+                    x_max: float,
+                    initial_points: int = DEFAULT_INITIAL_POINTS,
+                    max_depth: int = DEFAULT_CURVE_DEPTH,
+                    tolerance: float = DEFAULT_TOLERANCE,
+                    y_span: Optional[float] = None,
+                    min_dx: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """自适应采样函数曲线，返回 (x, y)，可直接交给 ax.plot / line.set_data
+
+    区间中点与弦线中点的偏差超过 tolerance * y_span 时二分该区间；
+    y_span 通常取坐标轴的y方向可见范围（视口相关），缺省时由样本估计。
+    细分到 max_depth 轮或区间宽度小于 min_dx 仍不收敛的区间视为间断（如 tan(x)、1/x 的极点），
+    在其中插入NaN使绘图时断开，不画出连接两侧的竖线。
+    """
+    n = max(int(initial_points), 2)
+    xs = np.linspace(x_min, x_max, n)
+    ys = evaluate(func, xs)
+    if min_dx is None:
+        min_dx = (x_max - x_min) / (n * 2 ** max_depth)
+    scale = y_span if y_span else _y_scale(ys)
+    threshold = tolerance * scale
+
+    new_x, new_y = [xs], [ys]
+    breaks = []
+
+    # 候选区间 (左端x, 左端y, 右端x, 右端y)；同一轮的区间等宽
+    xa, ya, xb, yb = xs[:-1], ys[:-1], xs[1:], ys[1:]
+    width = (x_max - x_min) / (n - 1)
+    for depth in range(max(int(max_depth), 0)):
+        width /= 2
+        if xa.size == 0:
+            break
+        xm = (xa + xb) / 2
+        ym = evaluate(func, xm)
+        new_x.append(xm)
+        new_y.append(ym)
+
+        finite = np.isfinite(ya) & np.isfinite(yb) & np.isfinite(ym)
+        with np.errstate(invalid="ignore"):
+            deviation = np.abs(ym - (ya + yb) / 2)
+            curved = finite & (deviation > threshold)
+        # 定义域边界：区间内有的点能算、有的点不能算
+        defined = np.isfinite(np.stack([ya, ym, yb]))
+        boundary = defined.any(axis=0) & ~defined.all(axis=0)
+        refine = curved | boundary
+
+        # 最后一轮或宽度已达下限仍不收敛的区间，若变化几乎全集中在一半内（跳跃），
+        # 或较大的一半跨越零点且变化超过整个可见范围（极点），按间断处理；
+        # 连续但陡峭的区间两半变化相当，保留原样
+        last = depth == max_depth - 1 or width < min_dx
+        if last:
+            left_change = np.abs(ym - ya)
+            right_change = np.abs(yb - ym)
+            left_jump = left_change >= right_change
+            change = np.maximum(left_change, right_change)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                dominance = change / (left_change + right_change)
+                sign_flip = np.where(left_jump, ya * ym, ym * yb) < 0
+            pole = sign_flip & (change > scale)
+            unresolved = np.flatnonzero(curved & ((dominance > JUMP_DOMINANCE) | pole))
+            breaks.append(np.where(left_jump[unresolved],
+                                   (xa[unresolved] + xm[unresolved]) / 2,
+                                   (xm[unresolved] + xb[unresolved]) / 2))
+            break
+
+        xa, ya, xb, yb = (np.concatenate([xa[refine], xm[refine]]),
+                          np.concatenate([ya[refine], ym[refine]]),
+                          np.concatenate([xm[refine], xb[refine]]),
+                          np.concatenate([ym[refine], yb[refine]]))
+
+    x = np.concatenate(new_x + breaks)
+    y = np.concatenate(new_y + [np.full(b.size, np.nan) for b in breaks])
+    order = np.argsort(x, kind="stable")
+    return x[order], y[order]
+
+
+def sample_for_axes(func: Callable, ax, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+    """按坐标轴当前视口采样：x取可见范围，容差约为一个像素，初始点数随绘图区宽度变化"""
+    x_min, x_max = ax.get_xlim()
+    y_min, y_max = ax.get_ylim()
+    width = max(ax.bbox.width, 1.0)
+    height = max(ax.bbox.height, 1.0)
+    kwargs.setdefault("initial_points", max(int(width / 4), 64))
+    kwargs.setdefault("tolerance", 1.0 / height)
+    kwargs.setdefault("y_span", abs(y_max - y_min))
+    kwargs.setdefault("min_dx", (x_max - x_min) / (width * 4))
+    return adaptive_sample(func, x_min, x_max, **kwargs)
+
+
+def _needs_refinement(values: np.ndarray) -> np.ndarray:
+    """单元是否可能含有零点：角点变号，或角点间的变化幅度超过到零的距离（细窄特征）"""
+    positive = np.any(values > 0, axis=1)
+    negative = np.any(values <= 0, axis=1)
+    sign_change = positive & negative
+    with warnings.catch_warnings():
+        # 全为NaN的单元（定义域外）得到NaN，比较结果为False，不细化
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spread = np.nanmax(values, axis=1) - np.nanmin(values, axis=1)
+        near_zero = np.nanmin(np.abs(values), axis=1) < spread
+    return sign_change | near_zero
+
+
+def _corner_points(x0: np.ndarray, y0: np.ndarray, w: float, h: float) -> Tuple[np.ndarray, np.ndarray]:
+    """单元四个角点的坐标，形状 (N, 4)"""
+    xs = np.stack([x0, x0 + w, x0 + w, x0], axis=1)
+    ys = np.stack([y0, y0, y0 + h, y0 + h], axis=1)
+    return xs, ys
+
+
+def _subdivide(func, x0, y0, values, w, h):
+    """把单元一分为四，只对新增的5个点（四条边中点与中心）求值"""
+    hw, hh = w / 2, h / 2
+    mid_x = np.stack([x0 + hw, x0 + w, x0 + hw, x0, x0 + hw], axis=1)
+    mid_y = np.stack([y0, y0 + hh, y0 + h, y0 + hh, y0 + hh], axis=1)
+    mids = func(mid_x, mid_y)
+    bottom, right, top, left, center = (mids[:, k] for k in range(5))
+    v0, v1, v2, v3 = (values[:, k] for k in range(4))
+
+    child_x0 = np.concatenate([x0, x0 + hw, x0 + hw, x0])
+    child_y0 = np.concatenate([y0, y0, y0 + hh, y0 + hh])
+    child_values = np.concatenate([
+        np.stack([v0, bottom, center, left], axis=1),      # 左下
+        np.stack([bottom, v1, right, center], axis=1),     # 右下
+        np.stack([center, right, v2, top], axis=1),        # 右上
+        np.stack([left, center, top, v3], axis=1),         # 左上
+    ])
+    return child_x0, child_y0, child_values, hw, hh
+
+
+def _marching_squares(x0, y0, values, w, h) -> np.ndarray:
+    """叶子单元上的移动方块，返回线段数组 (M, 2, 2)"""
+    xs, ys = _corner_points(x0, y0, w, h)
+    positive = values > 0
+    negative = values <= 0
+
+    crossings = []
+    for a, b in _EDGES:
+        crosses = (positive[:, a] & negative[:, b]) | (negative[:, a] & positive[:, b])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = values[:, a] / (values[:, a] - values[:, b])
+        t = np.clip(np.nan_to_num(t, nan=0.5), 0.0, 1.0)
+        px = xs[:, a] + t * (xs[:, b] - xs[:, a])
+        py = ys[:, a] + t * (ys[:, b] - ys[:, a])
+        crossings.append((crosses, np.stack([px, py], axis=1)))
+
+    mask = np.stack([c for c, _ in crossings], axis=1)       # (N, 4)
+    points = np.stack([p for _, p in crossings], axis=1)     # (N, 4, 2)
+    count = mask.sum(axis=1)
+
+    segments = []
+
+    # 普通情况：恰好两条边有交点
+    simple = count == 2
+    if np.any(simple):
+        order = np.argsort(~mask[simple], axis=1, kind="stable")[:, :2]
+        pts = np.take_along_axis(points[simple], order[:, :, None], axis=1)
+        segments.append(pts)
+
+    # 鞍点：四条边都有交点，按中心值（角点均值）决定连接方式
+    saddle = count == 4
+    if np.any(saddle):
+        pts = points[saddle]
+        center_positive = values[saddle].mean(axis=1) > 0
+        same_as_corner0 = center_positive == positive[saddle, 0]
+        # 中心与角点0同号时，角点1、3被隔开：连接(边0,边1)与(边2,边3)；否则连接(边3,边0)与(边1,边2)
+        first = np.where(same_as_corner0[:, None, None], pts[:, [0, 1]], pts[:, [3, 0]])
+        second = np.where(same_as_corner0[:, None, None], pts[:, [2, 3]], pts[:, [1, 2]])
+        segments.extend([first, second])
+
+    if not segments:
+        return np.empty((0, 2, 2))
+    return np.concatenate(segments)
+
+
+def implicit_curve_segments(func: Callable[[np.ndarray, np.ndarray], np.ndarray],
+                            x_range: Tuple[float, float],
+                            y_range: Tuple[float, float],
+                            base_resolution: int = 64,
+                            max_depth: int = DEFAULT_IMPLICIT_DEPTH) -> np.ndarray:
+    """求隐式曲线 func(x, y) = 0 的折线段
+
+    func 需接受同形状的数组（如 core.expression_engine 编译的表达式）。
+    在 base_resolution × base_resolution 的粗网格上求值，再对可能含零点的单元逐层四分，
+    最细单元边长为粗网格的 1/2**max_depth。返回形状 (M, 2, 2) 的线段数组，
+    可直接交给 matplotlib.collections.LineCollection。
+    """
+    x_min, x_max = x_range
+    y_min, y_max = y_range
+    n = max(int(base_resolution), 2)
+
+    xs = np.linspace(x_min, x_max, n + 1)
+    ys = np.linspace(y_min, y_max, n + 1)
+    grid = np.asarray(func(*np.meshgrid(xs, ys)), dtype=float)
+    w = (x_max - x_min) / n
+    h = (y_max - y_min) / n
+
+    # 粗网格单元：左下角坐标与四个角点值
+    x0 = np.broadcast_to(xs[:-1], (n, n)).ravel()
+    y0 = np.broadcast_to(ys[:-1, None], (n, n)).ravel()
+    values = np.stack([grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]], axis=-1).reshape(-1, 4)
+
+    for _ in range(max(int(max_depth), 0)):
+        keep = _needs_refinement(values)
+        if not np.any(keep):
+            break
+        x0, y0, values, w, h = _subdivide(func, x0[keep], y0[keep], values[keep], w, h)
+
+    return _marching_squares(x0, y0, values, w, h)
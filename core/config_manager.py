@@ -108,7 +108,14 @@ class ConfigManager:
                 "enable_animations": True,
                 "animation_speed": "normal",
                 "max_threads": 4,
-                "cache_enabled": True
+                "cache_enabled": True,
+                "prewarm_enabled": True,
+                "prewarm_idle_ms": 2000,
+                "prewarm_max_modules": 4,
+                "prewarm_modules": ["suiji", "ai"],
+                "page_cache_size": 3,
+                "plot_tile_cache_mb": 16,
+                "symbolic_cache_size": 256
             },
             "accessibility": {
                 "high_contrast": False,
@@ -243,7 +250,14 @@ class ConfigManager:
             "enable_animations": self.get_config("performance.enable_animations", True),
             "animation_speed": self.get_config("performance.animation_speed", "normal"),
             "max_threads": self.get_config("performance.max_threads", 4),
-            "cache_enabled": self.get_config("performance.cache_enabled", True)
+            "cache_enabled": self.get_config("performance.cache_enabled", True),
+            "prewarm_enabled": self.get_config("performance.prewarm_enabled", True),
+            "prewarm_idle_ms": self.get_config("performance.prewarm_idle_ms", 2000),
+            "prewarm_max_modules": self.get_config("performance.prewarm_max_modules", 4),
+            "prewarm_modules": self.get_config("performance.prewarm_modules", ["suiji", "ai"]),
+            "page_cache_size": self.get_config("performance.page_cache_size", 3),
+            "plot_tile_cache_mb": self.get_config("performance.plot_tile_cache_mb", 16),
+            "symbolic_cache_size": self.get_config("performance.symbolic_cache_size", 256)
         }
 
 
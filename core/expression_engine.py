@@ -0,0 +1,156 @@
+"""
+表达式引擎 - 把用户输入的数学表达式解析一次、校验后编译为NumPy向量化函数
+各绘图模块共用，整个数组一次求值，定义域外的点（如 log(-1)、sqrt(-1)）得到 NaN
+
+用法：
+    f = compile_expression("sin(x) * exp(-y)", ("x", "y"))
+    Z = f(X, Y)          # X、Y 为网格数组
+"""
+
+import ast
+import logging
+from functools import lru_cache
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+
+# 允许的函数（含 math 风格的别名）
+ALLOWED_FUNCTIONS: Dict[str, np.ufunc] = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "arcsin": np.arcsin, "arccos": np.arccos, "arctan": np.arctan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "sqrt": np.sqrt, "abs": np.abs, "fabs": np.fabs,
+    "floor": np.floor, "ceil": np.ceil, "sign": np.sign,
+}
+
+# 允许的常量
+ALLOWED_CONSTANTS: Dict[str, float] = {
+    "pi": np.pi,
+    "e": np.e,
+}
+
+# 兼容 np.sin、math.sqrt 这类写法
+MODULE_PREFIXES = ("np", "numpy", "math")
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Compare,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv,
+    ast.UAdd, ast.USub,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+CACHE_SIZE = 128
+
+logger = logging.getLogger(__name__)
+
+
+class ExpressionError(ValueError):
+    """表达式无法解析或包含不允许的内容"""
+
+
+class _StripModulePrefix(ast.NodeTransformer):
+    """把 np.sin / math.pi 改写为 sin / pi"""
+
+    def visit_Attribute(self, node):
+        if (isinstance(node.value, ast.Name) and node.value.id in MODULE_PREFIXES
+                and (node.attr in ALLOWED_FUNCTIONS or node.attr in ALLOWED_CONSTANTS)):
+            return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+        raise ExpressionError(f"不支持的写法: {ast.unparse(node)}")
+
+
+def _validate(tree: ast.Expression, variables: Tuple[str, ...]):
+    """白名单校验：只允许算术、比较、已知函数、常量与给定变量"""
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"表达式中不允许使用: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"不支持的常量: {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in ALLOWED_FUNCTIONS:
+                raise ExpressionError(f"不支持的函数: {ast.unparse(node.func)}")
+            if node.keywords or len(node.args) != 1:
+                raise ExpressionError(f"函数 {node.func.id} 只接受一个参数")
+        if isinstance(node, ast.Compare) and len(node.ops) != 1:
+            raise ExpressionError("不支持连续比较，请拆成多个条件相乘")
+        if isinstance(node, ast.Name) and not (node.id in variables
+                                               or node.id in ALLOWED_FUNCTIONS
+                                               or node.id in ALLOWED_CONSTANTS):
+            raise ExpressionError(f"未知的名称: {node.id}（可用变量: {', '.join(variables)}）")
+
+
+class CompiledExpression:
+    """编译后的表达式，按变量顺序接收标量或数组（自动广播）"""
+
+    def __init__(self, expression: str, variables: Tuple[str, ...], code):
+        self.expression = expression
+        self.variables = variables
+        self._code = code
+        self._namespace = {**ALLOWED_FUNCTIONS, **ALLOWED_CONSTANTS}
+
+    def __repr__(self):
+        return f"CompiledExpression({self.expression!r}, {self.variables!r})"
+
+    def __call__(self, *args, **kwargs):
+        """求值；输入全为标量时返回标量，否则返回与输入广播形状相同的浮点数组"""
+        values = dict(zip(self.variables, args))
+        values.update(kwargs)
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise TypeError(f"缺少变量: {', '.join(missing)}")
+
+        arrays = [np.asarray(values[name], dtype=float) for name in self.variables]
+        shape = np.broadcast_shapes(*(a.shape for a in arrays)) if arrays else ()
+        namespace = dict(self._namespace)
+        namespace.update(zip(self.variables, arrays))
+
+        with np.errstate(all="ignore"):
+            try:
+                result = eval(self._code, {"__builtins__": {}}, namespace)
+            except (ArithmeticError, ValueError, TypeError):
+                # 整体求值失败（如对零取模的整数常量）时退化为全 NaN
+                result = np.nan
+            result = np.asarray(result)
+            if np.iscomplexobj(result):
+                result = np.where(result.imag == 0, result.real, np.nan)
+            result = np.broadcast_to(result.astype(float), shape).copy()
+
+        return result[()] if result.ndim == 0 else result
+
+    def scalar(self, *args, **kwargs) -> float:
+        """标量求值，返回Python浮点数"""
+        return float(self(*args, **kwargs))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile(expression: str, variables: Tuple[str, ...]) -> CompiledExpression:
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"表达式语法错误: {expression}") from e
+
+    tree = ast.fix_missing_locations(_StripModulePrefix().visit(tree))
+    _validate(tree, variables)
+    code = compile(tree, "<expression>", "eval")
+    logger.debug(f"表达式已编译: {expression} {variables}")
+    return CompiledExpression(expression, variables, code)
+
+
+def compile_expression(expression: str, variables: Sequence[str] = ("x",)) -> CompiledExpression:
+    """编译表达式（按 (表达式, 变量) 做LRU缓存），非法表达式抛出 ExpressionError"""
+    if not expression or not expression.strip():
+        raise ExpressionError("表达式为空")
+    return _compile(expression.strip(), tuple(variables))
+
+
+def cache_info():
+    """编译缓存命中统计"""
+    return _compile.cache_info()
+
+
+def clear_cache():
+    """清空编译缓存"""
+    _compile.cache_clear()
@@ -0,0 +1,187 @@
+"""
+模块注册表 - 声明式登记各可视化模块并按需导入
+启动时只记录模块的导入路径，首次打开对应卡片时才导入科学计算依赖
+"""
+
+import importlib
+import json
+import os
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ModuleSpec:
+    """模块描述 - 名称、导入路径、类名和所属类别"""
+
+    name: str
+    import_path: str
+    class_name: str
+    category: str
+    title: str = ""
+
+
+# 内置模块清单：(名称, 导入路径, 类名, 类别, 标题)
+DEFAULT_MODULES = [
+    # 高等数学
+    ("trig_plot_app", "trig_plot_app", "TrigPlotApp", "高等数学", "函数图像分析"),
+    ("shulie", "shulie", "SequenceModule", "高等数学", "数列分析工具"),
+    ("weifen", "weifen", "DirectionFieldApp", "高等数学", "微分方程"),
+    ("fang", "fang", "EquationVisualizationApp", "高等数学", "方程图像分析"),
+    ("kehe", "kehe", "KeheApp", "高等数学", "科赫曲线"),
+    ("haisen", "haisen", "HessianApp", "高等数学", "海森矩阵分析"),
+    # 线性代数
+    ("juzhenduibi", "juzhenduibi", "MatrixComparisonApp", "线性代数", "矩阵对比"),
+    ("tezheng", "tezheng", "EigenvalueApp", "线性代数", "特征值与特征向量"),
+    ("zhuanzhi", "zhuanzhi", "MatrixAnimationApp", "线性代数", "矩阵旋转"),
+    ("jibianhuan", "jibianhuan", "MatrixTransformationApp", "线性代数", "基变换与向量表示"),
+    ("gaosixiaoyuan", "gaosixiaoyuan", "GaussianEliminationApp", "线性代数", "高斯消元法"),
+    ("guodujuzhen", "guodujuzhen", "MatrixTransitionApp", "线性代数", "矩阵过渡"),
+    ("jisuan", "jisuan", "VectorOperationsApp", "线性代数", "矩阵运算"),
+    ("hanglieshi", "hanglieshi", "DeterminantApp", "线性代数", "行列式"),
+    # 概率统计
+    ("gailvlunn", "gailvlunn", "ProbabilityApp", "概率统计", "概率分布"),
+    ("suiji", "suiji", "RandomVariableApp", "概率统计", "随机变量"),
+    ("suijiguocheng", "suijiguocheng", "StochasticProcessApp", "概率统计", "随机过程"),
+    ("beiye", "beiye", "BayesianApp", "概率统计", "贝叶斯统计"),
+    ("zhixin", "zhixin", "ConfidenceIntervalApp", "概率统计", "置信区间"),
+    ("tuiduan", "tuiduan", "HypothesisTestingApp", "概率统计", "假设检验"),
+    ("fenxi", "fenxi", "AnalysisApp", "概率统计", "统计分析工具"),
+    ("game", "game", "GamePuzzleApp", "概率统计", "概率游戏与谜题"),
+    ("mengka", "mengka", "MonteCarloApp", "概率统计", "蒙特卡洛模拟"),
+    # AI 数据分析
+    ("ai", "ai", "DataAnalyzerGUI", "AI 数据分析", "AI 数据分析"),
+]
+
+
+class ModuleRegistry:
+    """模块注册表 - 记录模块描述，首次使用时导入并缓存模块类"""
+
+    def __init__(self, modules: Optional[List[tuple]] = None, usage_file: Optional[str] = None):
+        self.specs: Dict[str, ModuleSpec] = {}
+        self._classes: Dict[str, Any] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._lock = threading.Lock()
+
+        # 使用频率统计（跨会话持久化，用于决定预热顺序）
+        self.usage_file = usage_file
+        self.usage_counts: Dict[str, int] = {}
+        self._usage_loaded = False
+
+        # 日志
+        self.logger = logging.getLogger(__name__)
+
+        for entry in modules or []:
+            self.register(*entry)
+
+    def register(self,
+                 name: str,
+                 import_path: str,
+                 class_name: str,
+                 category: str,
+                 title: str = "") -> ModuleSpec:
+        """登记模块（不导入）"""
+        spec = ModuleSpec(name, import_path, class_name, category, title or name)
+        with self._lock:
+            self.specs[name] = spec
+            self._classes.pop(name, None)
+            self._errors.pop(name, None)
+        return spec
+
+    def get_spec(self, name: str) -> Optional[ModuleSpec]:
+        """获取模块描述"""
+        return self.specs.get(name)
+
+    def get_names(self, category: Optional[str] = None) -> List[str]:
+        """获取模块名称列表，可按类别过滤"""
+        return [name for name, spec in self.specs.items()
+                if category is None or spec.category == category]
+
+    def get_categories(self) -> List[str]:
+        """获取所有类别（保持登记顺序）"""
+        categories = []
+        for spec in self.specs.values():
+            if spec.category not in categories:
+                categories.append(spec.category)
+        return categories
+
+    def is_loaded(self, name: str) -> bool:
+        """模块类是否已导入"""
+        return name in self._classes
+
+    def get_error(self, name: str) -> Optional[Exception]:
+        """获取模块导入失败的异常"""
+        return self._errors.get(name)
+
+    def load(self, name: str) -> Optional[Any]:
+        """导入模块并返回其中的类，失败时返回None"""
+        with self._lock:
+            if name in self._classes:
+                return self._classes[name]
+            if name in self._errors:
+                return None
+            spec = self.specs.get(name)
+
+        if spec is None:
+            self.logger.error(f"模块未登记: {name}")
+            return None
+
+        # 导入本身由Python的模块锁保证线程安全，这里不持有注册表锁
+        try:
+            module = importlib.import_module(spec.import_path)
+            module_class = getattr(module, spec.class_name)
+        except Exception as e:
+            self.logger.warning(f"无法导入模块 {spec.import_path}.{spec.class_name}: {e}")
+            with self._lock:
+                self._errors[name] = e
+            return None
+
+        with self._lock:
+            self._classes[name] = module_class
+        self.logger.info(f"模块已导入: {spec.import_path}.{spec.class_name}")
+        return module_class
+
+    def record_usage(self, name: str):
+        """记录一次模块打开"""
+        self._load_usage()
+        with self._lock:
+            self.usage_counts[name] = self.usage_counts.get(name, 0) + 1
+        self._save_usage()
+
+    def get_usage_order(self) -> List[str]:
+        """按使用频率从高到低返回用过的模块名称（同频保持登记顺序）"""
+        self._load_usage()
+        used = [name for name in self.specs if self.usage_counts.get(name, 0) > 0]
+        used.sort(key=lambda name: self.usage_counts[name], reverse=True)
+        return used
+
+    def _load_usage(self):
+        """加载使用频率统计"""
+        if self._usage_loaded:
+            return
+        self._usage_loaded = True
+        if not self.usage_file or not os.path.exists(self.usage_file):
+            return
+        try:
+            with open(self.usage_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.usage_counts.update({k: int(v) for k, v in data.items()})
+        except Exception as e:
+            self.logger.error(f"加载模块使用统计失败: {e}")
+
+    def _save_usage(self):
+        """保存使用频率统计"""
+        if not self.usage_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.usage_file) or ".", exist_ok=True)
+            with open(self.usage_file, 'w', encoding='utf-8') as f:
+                json.dump(self.usage_counts, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            self.logger.error(f"保存模块使用统计失败: {e}")
+
+
+# 全局模块注册表实例
+module_registry = ModuleRegistry(DEFAULT_MODULES, usage_file=os.path.join("cache", "module_usage.json"))
@@ -0,0 +1,670 @@
+"""
+蒙特卡洛批量计算核 - 整批随机点一次生成、分类并累加，不再逐点循环
+输入为 [0,1) 上的均匀样本数组（形状 (n, 维数)），由调用方的随机数生成器给出，
+核函数只做坐标变换、判定与求和，每批只有几次数组运算
+绘图用的点存放在固定容量的蓄水池样本与固定大小的二维直方图中，
+模拟再多的点，内存占用和每帧绘制量也保持不变；估计值用 Welford 在线算法
+累计均值与方差，给出标准误、95% 置信区间，收敛历史按对数间隔抽稀、点数有上限
+积分另有平均值法、分层抽样、对偶变量、控制变量和重要性抽样等方差缩减估计核，
+方差统一折算为每次函数求值，便于并列比较；均匀样本也可以来自加扰的 Sobol/Halton
+低差异序列（多组独立加扰，由组间离散估计误差）
+
+用法：
+    rng = np.random.default_rng()
+    x, y, inside = pi_batch(rng.random((n, 2)))
+    points_inside += int(inside.sum())
+"""
+
+import math
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+from scipy.stats import qmc
+
+from core.adaptive_sampling import evaluate
+
+
+# 界面上每批点数的上下限（对数刻度滑块）
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 1_000_000
+
+# 95% 置信区间对应的正态分位数
+Z_95 = 1.959963984540054
+
+
+def batch_size_from_log(value: float) -> int:
+    """对数刻度滑块值（log10）转换为每批点数，保留两位有效数字便于阅读"""
+    size = 10.0 ** float(value)
+    digits = max(0, int(np.floor(np.log10(size))) - 1)
+    size = int(round(size / 10 ** digits) * 10 ** digits)
+    return int(min(max(size, MIN_BATCH_SIZE), MAX_BATCH_SIZE))
+
+
+def pi_batch(u: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """单位正方形内的点是否落在四分之一单位圆内
+
+    返回 (x, y, inside)，inside 为布尔数组；π ≈ 4 × 命中数 / 总点数。
+    """
+    x, y = u[:, 0], u[:, 1]
+    inside = x * x + y * y <= 1.0
+    return x, y, inside
+
+
+def hit_or_miss_batch(u: np.ndarray,
+                      func: Callable,
+                      a: float,
+                      b: float,
+                      y_min: float,
+                      y_max: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """在采样框 [a,b]×[y_min,y_max] 内投点，按带符号的命中计数估计积分
+
+    返回 (x, y, hits)：落在 0 与 f(x) 之间且 f(x) ≥ 0 记 +1，f(x) < 0 记 -1，其余为 0；
+    ∫f ≈ 框面积 × Σhits / 总点数。f 在整个 x 数组上一次求值，无定义的点不计命中。
+    """
+    x = a + (b - a) * u[:, 0]
+    y = y_min + (y_max - y_min) * u[:, 1]
+    f_x = evaluate(func, x)
+    with np.errstate(invalid="ignore"):
+        positive = (y >= 0) & (y <= f_x)
+        negative = (y < 0) & (y >= f_x)
+    hits = positive.astype(np.int8) - negative.astype(np.int8)
+    return x, y, hits
+
+
+# ---- 积分估计方法（方差缩减） ----
+# 每个核返回 (x, y, labels, moments)：x, y, labels 供散点与密度层显示（labels 非零为"命中"，
+# 投点法为带符号的 hit，其余方法全为 True），
+# moments = (函数求值次数, 估计值, 离差平方和)，折算为"每次求值"的等效样本，
+# 因此不同方法可以直接比较方差，并用同一个 RunningStats 累计标准误。
+
+INTEGRAL_ESTIMATORS = {
+    "hit_or_miss": "投点法 (Hit-or-Miss)",
+    "mean_value": "平均值法",
+    "stratified": "分层抽样",
+    "antithetic": "对偶变量",
+    "control_variate": "控制变量",
+    "importance": "重要性抽样",
+}
+
+PROPOSALS = {
+    "normal": "截断正态 N(μ, σ)",
+    "exponential": "截断指数 e^(λx)",
+}
+
+BatchMoments = Tuple[int, float, float]
+EstimateBatch = Tuple[np.ndarray, np.ndarray, np.ndarray, BatchMoments]
+
+
+def _moments(count: int, estimate: float, variance_of_mean: float) -> BatchMoments:
+    """把一批的估计值及其方差折算为 count 个等效样本的 (count, 均值, 离差平方和)
+
+    合并进 RunningStats 后，该批单独的标准误恰好为 sqrt(variance_of_mean)。
+    """
+    return count, float(estimate), float(variance_of_mean) * count * (count - 1)
+
+
+def _finite(values: np.ndarray) -> np.ndarray:
+    """无定义（NaN/inf）的函数值按 0 计，与投点法不计命中一致"""
+    return np.where(np.isfinite(values), values, 0.0)
+
+
+class TruncatedNormalProposal:
+    """截断到 [a,b] 的正态分布 N(mean, std)，用逆CDF采样"""
+
+    def __init__(self, a: float, b: float, mean: float, std: float):
+        if not std > 0:
+            raise ValueError("建议分布的标准差必须为正数")
+        self.a, self.b, self.mean, self.std = a, b, mean, std
+        self.cdf_a = float(ndtr((a - mean) / std))
+        self.mass = float(ndtr((b - mean) / std)) - self.cdf_a
+        if not self.mass > 1e-12:
+            raise ValueError("建议分布在积分区间上的概率几乎为 0，请调整 μ 与 σ")
+
+    def sample(self, u: np.ndarray) -> np.ndarray:
+        x = self.mean + self.std * ndtri(self.cdf_a + self.mass * u)
+        return np.clip(x, self.a, self.b)
+
+    def pdf(self, x: np.ndarray) -> np.ndarray:
+        z = (x - self.mean) / self.std
+        return np.exp(-0.5 * z * z) / (math.sqrt(2 * math.pi) * self.std * self.mass)
+
+
+class TruncatedExponentialProposal:
+    """[a,b] 上密度正比于 e^(rate·x) 的分布（rate=0 即均匀分布），用逆CDF采样"""
+
+    def __init__(self, a: float, b: float, rate: float):
+        self.a, self.b, self.rate = a, b, float(rate)
+        self.length = b - a
+
+    def sample(self, u: np.ndarray) -> np.ndarray:
+        rate, length = self.rate, self.length
+        if abs(rate) * length < 1e-9:
+            return self.a + length * u
+        # 以靠近密度峰值的端点为基准，避免 exp 溢出
+        if rate > 0:
+            x = self.b + np.log(u + (1 - u) * math.exp(-rate * length)) / rate
+        else:
+            x = self.a + np.log1p(u * math.expm1(rate * length)) / rate
+        return np.clip(x, self.a, self.b)
+
+    def pdf(self, x: np.ndarray) -> np.ndarray:
+        rate, length = self.rate, self.length
+        if abs(rate) * length < 1e-9:
+            return np.full_like(x, 1.0 / length)
+        if rate > 0:
+            return rate * np.exp(rate * (x - self.b)) / -math.expm1(-rate * length)
+        return -rate * np.exp(rate * (x - self.a)) / -math.expm1(rate * length)
+
+
+def make_proposal(kind: str, a: float, b: float, first: float, second: float = 1.0):
+    """按名称创建重要性抽样的建议分布：normal 用 (μ=first, σ=second)，exponential 用 λ=first"""
+    if kind == "normal":
+        return TruncatedNormalProposal(a, b, first, second)
+    if kind == "exponential":
+        return TruncatedExponentialProposal(a, b, first)
+    raise ValueError(f"未知的建议分布: {kind}")
+
+
+def hit_or_miss_estimate(u: np.ndarray, func: Callable, a: float, b: float,
+                         y_min: float, y_max: float) -> EstimateBatch:
+    """投点法：每个点的估计值为 框面积 × hit；标签为带符号的命中 hit（-1, 0, 1），其和即净命中数"""
+    x, y, hits = hit_or_miss_batch(u, func, a, b, y_min, y_max)
+    area = (b - a) * (y_max - y_min)
+    n = hits.size
+    total = area * float(hits.sum())
+    total_sq = area * area * float(np.count_nonzero(hits))
+    return x, y, hits, (n, total / n, max(total_sq - total * total / n, 0.0))
+
+
+def mean_value_estimate(u: np.ndarray, func: Callable, a: float, b: float) -> EstimateBatch:
+    """平均值法：x 均匀分布，每个点的估计值为 (b-a)·f(x)"""
+    x = a + (b - a) * u[:, 0]
+    f_x = evaluate(func, x)
+    values = (b - a) * _finite(f_x)
+    n = values.size
+    return x, f_x, np.ones(n, dtype=bool), _moments(n, values.mean(), values.var(ddof=1) / n)
+
+
+def stratified_estimate(u: np.ndarray, func: Callable, a: float, b: float) -> EstimateBatch:
+    """分层抽样：[a,b] 等分为 n/2 层，每层取两个点
+
+    每层两点之差给出层内方差的无偏估计，估计值的方差只含层内部分。
+    """
+    m = len(u) // 2
+    length = b - a
+    strata = np.arange(m)
+    x = a + length * (np.concatenate([strata, strata]) + np.concatenate([u[:m, 0], u[m:2 * m, 0]])) / m
+    f_x = evaluate(func, x)
+    values = _finite(f_x)
+    first, second = values[:m], values[m:]
+    estimate = length * (first + second).sum() / (2 * m)
+    variance_of_mean = length ** 2 * np.square((first - second) / 2).sum() / m ** 2
+    return x, f_x, np.ones(2 * m, dtype=bool), _moments(2 * m, estimate, variance_of_mean)
+
+
+def antithetic_estimate(u: np.ndarray, func: Callable, a: float, b: float) -> EstimateBatch:
+    """对偶变量：x 与 a+b-x 成对求值，单调函数的两次求值负相关，平均后方差更小"""
+    m = len(u) // 2
+    x = a + (b - a) * u[:m, 0]
+    x = np.concatenate([x, a + b - x])
+    f_x = evaluate(func, x)
+    values = _finite(f_x)
+    pairs = (b - a) * (values[:m] + values[m:]) / 2
+    return x, f_x, np.ones(2 * m, dtype=bool), _moments(2 * m, pairs.mean(), pairs.var(ddof=1) / m)
+
+
+def control_variate_estimate(u: np.ndarray, func: Callable, a: float, b: float) -> EstimateBatch:
+    """控制变量：以积分已知（中心化后为 0）的 x 与 x² 为控制变量，系数按本批最小二乘回归
+
+    估计值为回归截距 × (b-a)，方差由回归残差给出。
+    """
+    length, center = b - a, (a + b) / 2
+    x = a + length * u[:, 0]
+    f_x = evaluate(func, x)
+    values = _finite(f_x)
+    n = values.size
+    t = x - center
+    controls = np.column_stack([np.ones(n), t, t * t - length * length / 12])
+    coef, *_ = np.linalg.lstsq(controls, values, rcond=None)
+    residuals = values - controls @ coef
+    variance = length ** 2 * np.square(residuals).sum() / max(n - controls.shape[1], 1)
+    return x, f_x, np.ones(n, dtype=bool), _moments(n, length * coef[0], variance / n)
+
+
+def importance_estimate(u: np.ndarray, func: Callable, proposal) -> EstimateBatch:
+    """重要性抽样：x 按建议分布 q 采样，每个点的估计值为 f(x)/q(x)"""
+    x = proposal.sample(u[:, 0])
+    f_x = evaluate(func, x)
+    values = _finite(f_x) / proposal.pdf(x)
+    n = values.size
+    return x, f_x, np.ones(n, dtype=bool), _moments(n, values.mean(), values.var(ddof=1) / n)
+
+
+def integral_batch(method: str, u: np.ndarray, func: Callable, a: float, b: float,
+                   y_min: float = 0.0, y_max: float = 1.0, proposal=None) -> EstimateBatch:
+    """按方法名调用对应的积分估计核，返回 (x, y, labels, moments)
+
+    投点法需要采样框 [y_min, y_max]，重要性抽样需要建议分布 proposal（见 make_proposal）。
+    """
+    if method == "hit_or_miss":
+        return hit_or_miss_estimate(u, func, a, b, y_min, y_max)
+    if method == "mean_value":
+        return mean_value_estimate(u, func, a, b)
+    if method == "stratified":
+        return stratified_estimate(u, func, a, b)
+    if method == "antithetic":
+        return antithetic_estimate(u, func, a, b)
+    if method == "control_variate":
+        return control_variate_estimate(u, func, a, b)
+    if method == "importance":
+        if proposal is None:
+            raise ValueError("重要性抽样需要建议分布")
+        return importance_estimate(u, func, proposal)
+    raise ValueError(f"未知的积分估计方法: {method}")
+
+
+class PointReservoir:
+    """固定容量的蓄水池抽样：在已见过的全部点中保持等概率的均匀子样本
+
+    每个点带一个布尔标签（如圆内/圆外、命中/未命中）。按 Algorithm R 处理：
+    第 t 个点（从0计）以 capacity/(t+1) 的概率替换随机一个位置，整批向量化完成，
+    因此无论模拟了多少点，内存和绘制的点数都不超过 capacity。
+    """
+
+    def __init__(self, capacity: int, rng: np.random.Generator = None):
+        self.capacity = int(capacity)
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.x = np.empty(self.capacity)
+        self.y = np.empty(self.capacity)
+        self.labels = np.zeros(self.capacity, dtype=bool)
+        self.size = 0
+        self.seen = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def clear(self):
+        self.size = 0
+        self.seen = 0
+
+    def add(self, x: np.ndarray, y: np.ndarray, labels: np.ndarray):
+        """加入一批点"""
+        n = len(x)
+        if n == 0:
+            return
+
+        # 先填满空位
+        fill = min(n, self.capacity - self.size)
+        if fill > 0:
+            end = self.size + fill
+            self.x[self.size:end] = x[:fill]
+            self.y[self.size:end] = y[:fill]
+            self.labels[self.size:end] = labels[:fill]
+            self.size = end
+
+        # 其余点按 capacity/(t+1) 的概率替换随机位置（同一位置被多次选中时保留批内最后一个）
+        if fill < n:
+            index = self.seen + np.arange(fill, n)
+            keep = self.rng.random(n - fill) * (index + 1) < self.capacity
+            slots = self.rng.integers(0, self.capacity, size=int(np.count_nonzero(keep)))
+            self.x[slots] = x[fill:][keep]
+            self.y[slots] = y[fill:][keep]
+            self.labels[slots] = labels[fill:][keep]
+
+        self.seen += n
+
+    def split(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """按标签拆分样本，返回 (x_true, y_true, x_false, y_false)"""
+        labels = self.labels[:self.size]
+        x, y = self.x[:self.size], self.y[:self.size]
+        return x[labels], y[labels], x[~labels], y[~labels]
+
+
+class DensityGrid:
+    """固定大小的二维直方图：按标签分层累计落点计数，渲染为一张RGBA图像
+
+    计数数组大小只由 bins 决定，与模拟点数无关；每批用一次 bincount 累加。
+    """
+
+    def __init__(self, extent: Tuple[float, float, float, float], bins: int = 200):
+        self.extent = tuple(float(v) for v in extent)  # (x_min, x_max, y_min, y_max)
+        self.bins = int(bins)
+        # [标签为False, 标签为True] 两层，行对应y、列对应x
+        self.counts = np.zeros((2, self.bins, self.bins), dtype=np.int64)
+
+    def clear(self):
+        self.counts.fill(0)
+
+    def add(self, x: np.ndarray, y: np.ndarray, labels: np.ndarray):
+        """累加一批点；范围外与非有限的点忽略"""
+        x_min, x_max, y_min, y_max = self.extent
+        with np.errstate(invalid="ignore"):
+            valid = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        if not valid.all():
+            x, y, labels = x[valid], y[valid], labels[valid]
+        # 恰好落在上边界的点归入最后一格
+        ix = np.minimum(((x - x_min) * (self.bins / (x_max - x_min))).astype(np.intp), self.bins - 1)
+        iy = np.minimum(((y - y_min) * (self.bins / (y_max - y_min))).astype(np.intp), self.bins - 1)
+        flat = (labels.astype(np.intp) * self.bins + iy) * self.bins + ix
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def image(self, true_color, false_color) -> np.ndarray:
+        """RGBA图像（origin='lower'）：颜色按两层计数加权混合，不透明度按总计数的对数缩放"""
+        false_counts, true_counts = self.counts
+        total = false_counts + true_counts
+        rgba = np.zeros((self.bins, self.bins, 4))
+        peak = total.max()
+        if peak == 0:
+            return rgba
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(total > 0, true_counts / total, 0.0)
+        rgba[..., :3] = (share[..., None] * np.asarray(true_color[:3], dtype=float)
+                         + (1 - share[..., None]) * np.asarray(false_color[:3], dtype=float))
+        rgba[..., 3] = np.log1p(total) / np.log1p(peak)
+        return rgba
+
+
+class RunningStats:
+    """Welford 在线均值/方差，按批合并（Chan 等人的并行公式），内存为常数
+
+    每个样本是一次试验的估计值（如 π 模式下的 4×[点在圆内]），
+    均值即当前估计，标准误为 sqrt(样本方差 / n)。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # 离差平方和
+
+    def clear(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, values: np.ndarray):
+        """加入一批样本值（批内先求中心化的平方和，再与累计量合并）"""
+        values = np.asarray(values, dtype=float)
+        n = values.size
+        if n == 0:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(np.square(values - batch_mean).sum())
+        self._merge(n, batch_mean, batch_m2)
+
+    def add_sums(self, n: int, total: float, total_sq: float):
+        """按批的样本和与平方和加入（取值只有少数几种的批量核可直接由计数得到）"""
+        if n <= 0:
+            return
+        batch_mean = total / n
+        batch_m2 = max(total_sq - total * batch_mean, 0.0)
+        self._merge(n, batch_mean, batch_m2)
+
+    def add_moments(self, n: int, batch_mean: float, batch_m2: float):
+        """按批的 (样本数, 均值, 离差平方和) 加入，如积分估计核返回的 moments"""
+        if n <= 0:
+            return
+        self._merge(n, batch_mean, batch_m2)
+
+    def _merge(self, n: int, batch_mean: float, batch_m2: float):
+        count = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / count
+        self.m2 += batch_m2 + delta * delta * self.count * n / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """样本方差（无偏）"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std_error(self) -> float:
+        """均值的标准误"""
+        return math.sqrt(self.variance / self.count) if self.count > 1 else math.nan
+
+    def confidence_interval(self, z: float = Z_95) -> Tuple[float, float]:
+        """置信区间 (下限, 上限)，默认95%"""
+        half_width = z * self.std_error
+        return self.mean - half_width, self.mean + half_width
+
+    def samples_for_precision(self, half_width: float, z: float = Z_95) -> Optional[int]:
+        """置信区间半宽缩小到 half_width 所需的总样本数；样本不足以估计方差时返回 None"""
+        variance = self.variance
+        if not (half_width > 0 and math.isfinite(variance)):
+            return None
+        return int(math.ceil(variance * (z / half_width) ** 2))
+
+
+class ConvergenceHistory:
+    """收敛历史：按总样本数的对数间隔记录 (样本数, 估计值, 标准误)，点数不超过 capacity
+
+    相邻两次记录的样本数至少相差 ratio 倍；超过容量时隔一个删一个，同时把 ratio 平方，
+    保证之后仍按对数均匀记录。因此无论运行多久，历史和每帧绘制的折线点数都有上限。
+    """
+
+    def __init__(self, capacity: int = 200, ratio: float = 1.02):
+        self.capacity = int(capacity)
+        self.initial_ratio = float(ratio)
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def clear(self):
+        self.ratio = self.initial_ratio
+        self.counts = []
+        self.estimates = []
+        self.errors = []
+        self._next_count = 0
+
+    def record(self, count: int, estimate: float, error: float) -> bool:
+        """到达下一个记录点时保存，返回是否保存"""
+        if count < self._next_count:
+            return False
+        self.counts.append(count)
+        self.estimates.append(estimate)
+        self.errors.append(error)
+        self._next_count = max(count + 1, int(count * self.ratio))
+
+        if len(self.counts) > self.capacity:
+            self.counts = self.counts[::2]
+            self.estimates = self.estimates[::2]
+            self.errors = self.errors[::2]
+            self.ratio *= self.ratio
+        return True
+
+    def arrays(self, stats: Optional[RunningStats] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(样本数, 估计值, 标准误) 数组；给出 stats 时末尾补上当前状态，使折线画到最新位置"""
+        counts, estimates, errors = list(self.counts), list(self.estimates), list(self.errors)
+        if stats is not None and stats.count > 0 and (not counts or counts[-1] != stats.count):
+            counts.append(stats.count)
+            estimates.append(stats.mean)
+            errors.append(stats.std_error)
+        return np.array(counts, dtype=float), np.array(estimates), np.array(errors)
+
+
+class ReplicatedStats:
+    """随机化拟蒙特卡洛（RQMC）的统计：R 组独立加扰的低差异序列各自累计
+
+    估计值为各组均值的平均，标准误由组间离散给出（组内的点不独立，不能用样本方差）。
+    add/add_sums/add_moments 与 RunningStats 相同，按 QmcSampler.random 返回块的顺序
+    依次轮流加入各组，因此批量循环不必区分采样方式。
+    """
+
+    def __init__(self, replicates: int):
+        self.replicates = [RunningStats() for _ in range(max(2, int(replicates)))]
+        self._next = 0
+
+    def clear(self):
+        for stats in self.replicates:
+            stats.clear()
+        self._next = 0
+
+    def _take(self) -> RunningStats:
+        stats = self.replicates[self._next]
+        self._next = (self._next + 1) % len(self.replicates)
+        return stats
+
+    def add(self, values: np.ndarray):
+        self._take().add(values)
+
+    def add_sums(self, n: int, total: float, total_sq: float):
+        self._take().add_sums(n, total, total_sq)
+
+    def add_moments(self, n: int, batch_mean: float, batch_m2: float):
+        self._take().add_moments(n, batch_mean, batch_m2)
+
+    @property
+    def count(self) -> int:
+        return sum(stats.count for stats in self.replicates)
+
+    @property
+    def mean(self) -> float:
+        means = [stats.mean for stats in self.replicates if stats.count > 0]
+        return float(np.mean(means)) if means else 0.0
+
+    @property
+    def std_error(self) -> float:
+        """各组均值的标准差 / sqrt(组数)"""
+        if any(stats.count == 0 for stats in self.replicates):
+            return math.nan
+        means = np.array([stats.mean for stats in self.replicates])
+        return float(means.std(ddof=1) / math.sqrt(means.size))
+
+    @property
+    def variance(self) -> float:
+        """等效的每点方差（标准误² × 点数），可与普通蒙特卡洛的样本方差直接比较"""
+        return self.std_error ** 2 * self.count
+
+    def confidence_interval(self, z: float = Z_95) -> Tuple[float, float]:
+        half_width = z * self.std_error
+        return self.mean - half_width, self.mean + half_width
+
+    def samples_for_precision(self, half_width: float, z: float = Z_95) -> Optional[int]:
+        """按误差 ∝ 1/N 外推达到 half_width 所需的总点数（加扰序列的典型收敛速度）"""
+        current = z * self.std_error
+        if not (half_width > 0 and math.isfinite(current)):
+            return None
+        return int(math.ceil(self.count * current / half_width))
+
+
+# ---- 采样器：伪随机数或加扰的低差异序列 ----
+
+SAMPLERS = {
+    "pseudo": "伪随机数",
+    "sobol": "Sobol 序列 (加扰)",
+    "halton": "Halton 序列 (加扰)",
+}
+
+# 随机化拟蒙特卡洛的独立重复组数（用于估计误差）与每组每批的最少点数
+# （成对取点、回归等估计核每块至少需要几个点）
+QMC_REPLICATES = 16
+MIN_QMC_BLOCK = 8
+
+
+class PseudoRandomSampler:
+    """伪随机均匀样本，每批一个块，统计用 RunningStats"""
+
+    def __init__(self, rng: np.random.Generator = None, dim: int = 2):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.dim = dim
+
+    def reset(self):
+        pass
+
+    def random(self, n: int) -> List[np.ndarray]:
+        return [self.rng.random((int(n), self.dim))]
+
+    def make_stats(self) -> RunningStats:
+        return RunningStats()
+
+
+class QmcSampler:
+    """加扰的 Sobol/Halton 序列，R 组独立加扰，每批每组取下一段连续的点
+
+    Sobol 序列按 2 的幂取点时分布最均匀，因此每组的点数取最接近的 2 的幂，且不少于
+    MIN_QMC_BLOCK，实际每批点数可能与请求略有不同（以返回的块大小为准）。
+    """
+
+    def __init__(self, kind: str = "sobol", rng: np.random.Generator = None,
+                 dim: int = 2, replicates: int = QMC_REPLICATES):
+        if kind not in ("sobol", "halton"):
+            raise ValueError(f"未知的低差异序列: {kind}")
+        self.kind = kind
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.dim = dim
+        self.replicate_count = max(2, int(replicates))
+        self.reset()
+
+    def reset(self):
+        """重新加扰，各组序列从头开始"""
+        if self.kind == "sobol":
+            # 默认 30 位时点落在 2^-30 网格的左下角，均值偏差约 2^-31，高精度时会超过误差本身
+            self.engines = [qmc.Sobol(d=self.dim, scramble=True, bits=64, seed=self.rng)
+                            for _ in range(self.replicate_count)]
+        else:
+            self.engines = [qmc.Halton(d=self.dim, scramble=True, seed=self.rng)
+                            for _ in range(self.replicate_count)]
+
+    def random(self, n: int) -> List[np.ndarray]:
+        per_replicate = max(MIN_QMC_BLOCK, int(n) // self.replicate_count)
+        if self.kind == "sobol":
+            per_replicate = 2 ** int(round(math.log2(per_replicate)))
+        return [engine.random(per_replicate) for engine in self.engines]
+
+    def make_stats(self) -> ReplicatedStats:
+        return ReplicatedStats(self.replicate_count)
+
+
+def make_sampler(kind: str, rng: np.random.Generator = None, dim: int = 2):
+    """按名称（见 SAMPLERS）创建采样器"""
+    if kind == "pseudo":
+        return PseudoRandomSampler(rng, dim)
+    return QmcSampler(kind, rng, dim)
+
+
+def convergence_order(counts: np.ndarray, errors: np.ndarray) -> Optional[float]:
+    """按收敛历史后半段拟合 log(标准误) 对 log(点数) 的斜率（普通蒙特卡洛约 -0.5，拟蒙特卡洛接近 -1）"""
+    valid = np.isfinite(errors) & (errors > 0) & (counts > 0)
+    counts, errors = counts[valid], errors[valid]
+    if counts.size < 4 or counts[-1] < 4 * counts[0]:
+        return None
+    log_n, log_e = np.log(counts), np.log(errors)
+    tail = log_n >= (log_n[0] + log_n[-1]) / 2
+    if np.count_nonzero(tail) < 3:
+        return None
+    slope, _ = np.polyfit(log_n[tail], log_e[tail], 1)
+    return float(slope)
+
+
+def estimate_eta(stats: RunningStats, half_width: float, rate: float) -> Tuple[Optional[int], Optional[float]]:
+    """达到目标精度（95%置信区间半宽）还需的样本数与秒数；无法估计时为 None
+
+    rate 为每秒处理的样本数；已达到目标时返回 (0, 0.0)。
+    """
+    needed = stats.samples_for_precision(half_width)
+    if needed is None:
+        return None, None
+    remaining = max(needed - stats.count, 0)
+    if remaining == 0:
+        return 0, 0.0
+    if not rate > 0:
+        return remaining, None
+    return remaining, remaining / rate
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """把秒数格式化为简短的中文时长"""
+    if seconds is None or not math.isfinite(seconds):
+        return "未知"
+    if seconds < 1:
+        return "不到 1 秒"
+    if seconds < 60:
+        return f"约 {seconds:.0f} 秒"
+    if seconds < 3600:
+        return f"约 {seconds / 60:.1f} 分钟"
+    if seconds < 86400:
+        return f"约 {seconds / 3600:.1f} 小时"
+    return f"约 {seconds / 86400:.1f} 天"
@@ -1,12 +1,16 @@
 """
 页面管理器 - 实现单窗口多页面架构
 替代原有的多Toplevel窗口设计，提供流畅的页面切换体验
+页面在首次显示时才创建，只保留最近使用的若干个，淘汰时调用 cleanup() 释放资源
 """
 
 import tkinter as tk
-from typing import Dict, Type, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, Type, Optional
 import logging
 from themes.futuristic_theme import COLORS, FONTS
+from core.config_manager import config_manager
+from core.thread_manager import get_thread_manager
 
 
 class BasePage(tk.Frame):
@@ -20,6 +24,11 @@ class BasePage(tk.Frame):
         # 页面状态
         self.is_active = False
         self.is_initialized = False
+        self.has_tasks = False
+        self.pinned = False
+        
+        # 清理时需要释放的资源
+        self._after_ids = set()
         
         # 配置页面网格权重
         self.grid_rowconfigure(0, weight=1)
@@ -33,23 +42,75 @@ class BasePage(tk.Frame):
             self.is_initialized = True
     
     def on_hide(self):
-        """页面隐藏时的回调，子类可以重写"""
+        """页面隐藏时的回调，子类可以重写（重写时应调用父类方法）"""
         self.is_active = False
+        # 离开页面时中止该页面提交的后台任务
+        if self.has_tasks:
+            get_thread_manager().cancel_group(self.page_name)
+    
+    def submit_task(self, func: Callable, callback: Optional[Callable] = None,
+                    show_progress: bool = True, progress_message: str = "正在计算...",
+                    *args, **kwargs) -> str:
+        """提交属于本页面的后台任务，页面隐藏时自动取消"""
+        self.has_tasks = True
+        return get_thread_manager().submit_task(
+            func, callback, self if show_progress else None, progress_message,
+            *args, group=self.page_name, **kwargs
+        )
+    
+    def pin(self, pinned: bool = True):
+        """固定页面，使其不被页面管理器淘汰（重建代价高的页面可在initialize中调用）"""
+        self.pinned = pinned
+    
+    def after(self, ms, func=None, *args):
+        """定时回调，记录编号以便页面清理时取消"""
+        if func is None:
+            return super().after(ms)
+        
+        def callback(*callback_args):
+            self._after_ids.discard(after_id)
+            return func(*callback_args)
+        
+        after_id = super().after(ms, callback, *args)
+        self._after_ids.add(after_id)
+        return after_id
+    
+    def after_cancel(self, id):
+        """取消定时回调"""
+        self._after_ids.discard(id)
+        super().after_cancel(id)
     
     def initialize(self):
         """页面初始化，子类应该重写此方法"""
     
     def cleanup(self):
-        """页面清理，子类可以重写"""
+        """页面清理：取消后台任务与定时回调，子类重写时应调用父类方法"""
+        if self.has_tasks:
+            get_thread_manager().cancel_group(self.page_name)
+        
+        for after_id in list(self._after_ids):
+            try:
+                self.after_cancel(after_id)
+            except tk.TclError:
+                pass
+        self._after_ids.clear()
 
 
 class PageManager:
     """页面管理器 - 管理应用的所有页面并提供流畅切换"""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, max_pages: Optional[int] = None):
         self.root = root
-        self.pages: Dict[str, BasePage] = {}
+        self.factories: Dict[str, Callable[..., BasePage]] = {}
+        self.page_kwargs: Dict[str, dict] = {}
+        # 已创建的页面，按最近使用顺序排列（最近使用的在末尾）
+        self.pages: "OrderedDict[str, BasePage]" = OrderedDict()
         self.current_page: Optional[str] = None
+        
+        # 最多保留的页面数（固定的页面和当前页面除外）
+        if max_pages is None:
+            max_pages = config_manager.get_performance_settings()["page_cache_size"]
+        self.max_pages = max(1, int(max_pages))
         self.page_history = []
         
         # 创建主容器
@@ -61,28 +122,57 @@ class PageManager:
         # 设置日志
         self.logger = logging.getLogger(__name__)
         
-    def register_page(self, name: str, page_class: Type[BasePage], **kwargs) -> BasePage:
-        """注册页面类"""
-        try:
-            # 创建页面实例
-            page = page_class(self.container, controller=self, **kwargs)
+    def register_page(self, name: str, page_class: Type[BasePage], **kwargs):
+        """注册页面类（或返回页面的工厂函数），页面在首次显示时才创建"""
+        if name in self.pages:
+            self._destroy_page(name)
+        self.factories[name] = page_class
+        self.page_kwargs[name] = kwargs
+        self.logger.info(f"页面已注册: {name}")
+    
+    def _get_or_create_page(self, name: str) -> BasePage:
+        """获取页面实例，未创建或已被淘汰时由工厂重新创建"""
+        page = self.pages.get(name)
+        if page is None:
+            page = self.factories[name](self.container, controller=self, **self.page_kwargs[name])
             page.grid(row=0, column=0, sticky="nsew")
             page.grid_remove()  # 初始隐藏
-            
             self.pages[name] = page
-            self.logger.info(f"页面已注册: {name}")
-            return page
-            
+            self.logger.info(f"页面已创建: {name}")
+        self.pages.move_to_end(name)
+        return page
+    
+    def _evict_pages(self):
+        """超出缓存上限时按最近最少使用顺序淘汰页面"""
+        for name in list(self.pages):
+            if len(self.pages) <= self.max_pages:
+                break
+            if name == self.current_page or self.pages[name].pinned:
+                continue
+            self._destroy_page(name)
+    
+    def _destroy_page(self, name: str):
+        """清理并销毁页面"""
+        page = self.pages.pop(name)
+        try:
+            page.cleanup()
         except Exception as e:
-            self.logger.error(f"注册页面失败 {name}: {e}")
-            raise
+            self.logger.warning(f"页面清理失败 {name}: {e}")
+        page.destroy()
+        self.logger.info(f"页面已销毁: {name}")
     
     def show_page(self, name: str, animation: str = "fade", **kwargs) -> bool:
         """显示指定页面"""
-        if name not in self.pages:
+        if name not in self.factories:
             self.logger.error(f"页面未找到: {name}")
             return False
         
+        try:
+            new_page = self._get_or_create_page(name)
+        except Exception as e:
+            self.logger.error(f"创建页面失败 {name}: {e}")
+            return False
+        
         # 隐藏当前页面
         if self.current_page:
             old_page = self.pages[self.current_page]
@@ -97,7 +187,6 @@ class PageManager:
                     self.page_history.pop(0)
         
         # 显示新页面
-        new_page = self.pages[name]
         new_page.grid(row=0, column=0, sticky="nsew")
         new_page.on_show()
         
@@ -105,6 +194,7 @@ class PageManager:
         self._animate_page_transition(new_page, animation)
         
         self.current_page = name
+        self._evict_pages()
         self.logger.info(f"切换到页面: {name}")
         return True
     
@@ -123,7 +213,7 @@ class PageManager:
         return None
     
     def get_page(self, name: str) -> Optional[BasePage]:
-        """获取指定页面实例"""
+        """获取指定页面实例（未创建或已被淘汰时返回None）"""
         return self.pages.get(name)
     
     def clear_history(self):
@@ -0,0 +1,130 @@
+"""
+预热调度器 - 主窗口空闲后在后台线程中预先导入常用模块
+按历史使用频率排序，用户一有操作就在当前模块导入完成后暂停
+"""
+
+import threading
+import time
+import logging
+import tkinter as tk
+from typing import List, Optional
+
+from core.config_manager import config_manager
+from core.module_registry import ModuleRegistry, module_registry
+from core.thread_manager import PRIORITY_BACKGROUND, TaskResult, ThreadManager, get_thread_manager
+
+
+class PrewarmScheduler:
+    """预热调度器"""
+
+    # 视为用户操作的事件
+    ACTIVITY_EVENTS = ("<Motion>", "<KeyPress>", "<ButtonPress>", "<MouseWheel>")
+
+    def __init__(self,
+                 root: tk.Tk,
+                 registry: Optional[ModuleRegistry] = None,
+                 thread_manager: Optional[ThreadManager] = None):
+        self.root = root
+        self.registry = registry or module_registry
+        self.thread_manager = thread_manager
+
+        # 读取性能配置
+        settings = config_manager.get_performance_settings()
+        self.enabled = bool(settings["prewarm_enabled"])
+        self.idle_ms = int(settings["prewarm_idle_ms"])
+        self.max_modules = int(settings["prewarm_max_modules"])
+        self.seed_modules = list(settings["prewarm_modules"])
+
+        # 调度状态
+        self._after_id = None
+        self._in_flight = False
+        self._finished = False
+        self._interrupted = threading.Event()
+        self._stopped = threading.Event()
+
+        # 日志
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """开始监听用户操作并在空闲时预热"""
+        if not self.enabled:
+            return
+        for sequence in self.ACTIVITY_EVENTS:
+            self.root.bind_all(sequence, self._on_activity, add="+")
+        self._schedule()
+        self.logger.info(f"模块预热已启用，空闲阈值: {self.idle_ms}ms")
+
+    def stop(self):
+        """停止预热（正在导入的模块会导入完成）"""
+        self._stopped.set()
+        self._interrupted.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def get_pending_modules(self) -> List[str]:
+        """获取待预热的模块：先按使用频率，再补充配置中的默认模块"""
+        pending = []
+        for name in self.registry.get_usage_order() + self.seed_modules:
+            if name in pending or self.registry.get_spec(name) is None:
+                continue
+            if self.registry.is_loaded(name) or self.registry.get_error(name) is not None:
+                continue
+            pending.append(name)
+        return pending[:self.max_modules]
+
+    def _on_activity(self, event=None):
+        """用户操作：中断后台预热并重新计时"""
+        if self._finished or self._stopped.is_set():
+            return
+        self._interrupted.set()
+        self._schedule()
+
+    def _schedule(self):
+        """（重新）开始空闲计时"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.idle_ms, self._on_idle)
+
+    def _on_idle(self):
+        """空闲超时：提交预热任务"""
+        self._after_id = None
+        if self._stopped.is_set():
+            return
+        if self._in_flight:
+            # 上一轮尚未结束，等待下一次空闲
+            self._schedule()
+            return
+
+        modules = self.get_pending_modules()
+        if not modules:
+            self._finished = True
+            self.logger.info("模块预热完成")
+            return
+
+        self._interrupted.clear()
+        self._in_flight = True
+        thread_manager = self.thread_manager or get_thread_manager()
+        thread_manager.submit_task(self._prewarm, self._on_prewarm_done, None, "", modules,
+                                   priority=PRIORITY_BACKGROUND)
+
+    def _prewarm(self, modules: List[str]) -> List[str]:
+        """在工作线程中依次导入模块（不访问Tk）"""
+        loaded = []
+        for name in modules:
+            if self._interrupted.is_set() or self._stopped.is_set():
+                break
+            start = time.perf_counter()
+            if self.registry.load(name) is not None:
+                loaded.append(name)
+                self.logger.info(f"已预热模块 {name}，耗时 {time.perf_counter() - start:.2f}s")
+        return loaded
+
+    def _on_prewarm_done(self, result: TaskResult):
+        """预热任务结束回调（不访问Tk）"""
+        self._in_flight = False
+        if not result.success:
+            self.logger.error(f"模块预热失败: {result.error}")
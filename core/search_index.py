@@ -0,0 +1,180 @@
+"""
+搜索索引 - 基于字符n-gram倒排索引的增量搜索
+支持中文标题的拼音首字母检索，结果用有界堆取前k个，并按前缀缓存候选集
+"""
+
+import heapq
+import bisect
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from pypinyin import lazy_pinyin, Style  # 可选依赖，覆盖全部汉字
+except ImportError:
+    lazy_pinyin = None
+
+
+# GB2312 一级汉字按拼音排序，各声母首字的区位码（无 i/u/v 开头的音节）
+_GB2312_INITIALS = [
+    (0xB0A1, "a"), (0xB0C5, "b"), (0xB2C1, "c"), (0xB4EE, "d"), (0xB6EA, "e"),
+    (0xB7A2, "f"), (0xB8C1, "g"), (0xB9FE, "h"), (0xBBF7, "j"), (0xBFA6, "k"),
+    (0xC0AC, "l"), (0xC2E8, "m"), (0xC4C3, "n"), (0xC5B6, "o"), (0xC5BE, "p"),
+    (0xC6DA, "q"), (0xC8BB, "r"), (0xC8F6, "s"), (0xCBFA, "t"), (0xCDDA, "w"),
+    (0xCEF4, "x"), (0xD1B9, "y"), (0xD4D1, "z"),
+]
+_GB2312_CODES = [code for code, _ in _GB2312_INITIALS]
+_GB2312_LEVEL1_END = 0xD7F9
+
+
+def _char_initial(ch: str) -> str:
+    """单个字符的拼音首字母；非汉字原样返回（小写），无法识别的汉字返回空串"""
+    if ch.isascii():
+        return ch.lower() if ch.isalnum() else ""
+    try:
+        raw = ch.encode("gb2312")
+    except UnicodeEncodeError:
+        return ""
+    if len(raw) != 2:
+        return ""
+    code = (raw[0] << 8) | raw[1]
+    if code < _GB2312_CODES[0] or code > _GB2312_LEVEL1_END:
+        # 二级汉字按部首排序，无法由区位码推出读音
+        return ""
+    return _GB2312_INITIALS[bisect.bisect_right(_GB2312_CODES, code) - 1][1]
+
+
+def pinyin_initials(text: str) -> str:
+    """文本的拼音首字母串，如 "矩阵对比" -> "jzdb" """
+    if lazy_pinyin is not None:
+        return "".join(p[:1] for p in lazy_pinyin(text, style=Style.FIRST_LETTER, errors="ignore")).lower()
+    return "".join(_char_initial(ch) for ch in text)
+
+
+def normalize(text: str) -> str:
+    """统一大小写并去掉空白"""
+    return "".join(text.lower().split())
+
+
+def ngrams(text: str, max_n: int = 3) -> Set[str]:
+    """文本的 1..max_n 字符n-gram集合"""
+    grams = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+def query_grams(query: str, max_n: int = 3) -> Set[str]:
+    """查询用的n-gram：只取最长的那一档，候选集最小"""
+    n = min(max_n, len(query))
+    return {query[i:i + n] for i in range(len(query) - n + 1)}
+
+
+class SearchIndex:
+    """倒排索引
+
+    每个文档由若干字段组成，字段权重决定精确（子串）匹配的得分；
+    不存在子串匹配时，按查询n-gram的命中比例给出模糊得分。
+    """
+
+    MAX_N = 3
+    CACHE_SIZE = 128
+    FUZZY_WEIGHT = 0.4
+    # 模糊匹配至少命中的查询n-gram比例
+    FUZZY_MIN_OVERLAP = 0.5
+
+    def __init__(self):
+        self.documents: List[Dict[str, str]] = []
+        self.weights: List[Dict[str, float]] = []
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self._exact_cache: "OrderedDict[str, Set[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, fields: Dict[str, str], weights: Dict[str, float]) -> int:
+        """添加文档，返回文档编号"""
+        doc_id = len(self.documents)
+        normalized = {name: normalize(text) for name, text in fields.items() if text}
+        self.documents.append(normalized)
+        self.weights.append(weights)
+        for text in normalized.values():
+            for gram in ngrams(text, self.MAX_N):
+                self.postings[gram].add(doc_id)
+        # 新文档可能匹配任何已缓存的查询
+        self._exact_cache.clear()
+        return doc_id
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.1,
+               fuzzy: bool = True) -> List[Tuple[int, float]]:
+        """返回 [(文档编号, 得分)]，按得分降序，同分按登记顺序；长文本索引可关闭模糊匹配"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        exact = self._exact_matches(query)
+        scored = [(self._exact_score(doc_id, query), doc_id) for doc_id in exact]
+
+        # 精确匹配不足时补充模糊匹配
+        if fuzzy and len(scored) < limit:
+            scored.extend(self._fuzzy_matches(query, exclude=exact))
+
+        top = heapq.nsmallest(limit, ((-score, doc_id) for score, doc_id in scored if score > min_score))
+        return [(doc_id, -neg_score) for neg_score, doc_id in top]
+
+    def _exact_matches(self, query: str) -> Set[int]:
+        """包含查询子串的文档；优先在最长已缓存前缀的结果中过滤"""
+        cached = self._exact_cache.get(query)
+        if cached is not None:
+            self._exact_cache.move_to_end(query)
+            return cached
+
+        base: Optional[Iterable[int]] = None
+        for end in range(len(query) - 1, 0, -1):
+            prefix_hit = self._exact_cache.get(query[:end])
+            if prefix_hit is not None:
+                base = prefix_hit
+                break
+
+        if base is None:
+            base = self._intersect(query_grams(query, self.MAX_N))
+
+        matches = {doc_id for doc_id in base
+                   if any(query in text for text in self.documents[doc_id].values())}
+
+        self._exact_cache[query] = matches
+        if len(self._exact_cache) > self.CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+        return matches
+
+    def _intersect(self, grams: Set[str]) -> Set[int]:
+        """各n-gram倒排表的交集（从最短的表开始）"""
+        lists = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        if not lists or not lists[0]:
+            return set()
+        result = set(lists[0])
+        for posting in lists[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def _exact_score(self, doc_id: int, query: str) -> float:
+        """子串命中字段中权重最高者"""
+        weights = self.weights[doc_id]
+        return max(weights.get(name, 0.0)
+                   for name, text in self.documents[doc_id].items() if query in text)
+
+    def _fuzzy_matches(self, query: str, exclude: Set[int]) -> List[Tuple[float, int]]:
+        """按查询二元组的命中比例计分（单字符命中过于宽泛，不计入）"""
+        grams = query_grams(query, 2)
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for doc_id in self.postings.get(gram, ()):
+                if doc_id not in exclude:
+                    counts[doc_id] += 1
+
+        total = len(grams)
+        return [(self.FUZZY_WEIGHT * count / total, doc_id)
+                for doc_id, count in counts.items()
+                if count / total >= self.FUZZY_MIN_OVERLAP]
@@ -1,14 +1,16 @@
 """
 搜索管理器 - 提供全局搜索功能
-支持模糊搜索、智能排序和快速导航
+支持模糊搜索、拼音首字母、智能排序和快速导航
 """
 
 import tkinter as tk
 from typing import List, Dict, Callable, Optional, Tuple
-from difflib import SequenceMatcher
 import logging
 
 from themes.futuristic_theme import COLORS, FONTS
+from core.search_index import SearchIndex, pinyin_initials
+from core.theory_index import DEFAULT_INDEX_PATH, TheoryEntry, load_theory_index
+from core.thread_manager import PRIORITY_BACKGROUND, TaskResult, get_thread_manager
 
 
 class SearchItem:
@@ -27,41 +29,23 @@ class SearchItem:
         self.keywords = keywords
         self.action = action
         self.icon = icon
-        
-        # 计算搜索权重用的文本
-        self.search_text = f"{title} {description} {' '.join(keywords)}".lower()
-    
-    def get_similarity(self, query: str) -> float:
-        """计算与查询的相似度"""
-        query = query.lower()
-        
-        # 精确匹配权重最高
-        if query in self.title.lower():
-            return 1.0
-        
-        if query in self.description.lower():
-            return 0.8
-        
-        # 关键字匹配
-        for keyword in self.keywords:
-            if query in keyword.lower():
-                return 0.6
-        
-        # 模糊匹配
-        similarity = SequenceMatcher(None, query, self.search_text).ratio()
-        return similarity * 0.4
 
 
 class SearchWidget(tk.Frame):
     """搜索组件"""
     
+    # 输入防抖间隔（毫秒）
+    DEBOUNCE_MS = 120
+    
     def __init__(self, parent, search_manager, **kwargs):
         super().__init__(parent, bg=COLORS["bg_medium"], **kwargs)
         self.search_manager = search_manager
+        self.search_manager.add_theory_listener(self._on_theory_index_ready)
         
         # 搜索状态
         self.is_expanded = False
         self.search_results = []
+        self._search_after_id = None
         
         self._create_search_ui()
     
@@ -126,7 +110,14 @@ class SearchWidget(tk.Frame):
         self.results_listbox.bind('<Escape>', self._hide_results)
     
     def _on_search_change(self, *args):
-        """搜索内容变化时的处理"""
+        """搜索内容变化时的处理（防抖，连续输入只搜索最后一次）"""
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(self.DEBOUNCE_MS, self._run_search)
+    
+    def _run_search(self):
+        """执行搜索并显示结果"""
+        self._search_after_id = None
         query = self.search_var.get().strip()
         
         if not query:
@@ -137,6 +128,11 @@ class SearchWidget(tk.Frame):
         results = self.search_manager.search(query)
         self._show_results(results)
     
+    def _on_theory_index_ready(self):
+        """理论知识索引在后台加载完成后，刷新正在显示的结果"""
+        if self.is_expanded and self._search_after_id is None:
+            self._run_search()
+    
     def _show_results(self, results: List[Tuple[SearchItem, float]]):
         """显示搜索结果"""
         self.search_results = results
@@ -166,6 +162,10 @@ class SearchWidget(tk.Frame):
     
     def _on_search_enter(self, event):
         """回车键处理"""
+        if self._search_after_id is not None:
+            # 防抖尚未触发时立即搜索，保证回车使用当前输入
+            self.after_cancel(self._search_after_id)
+            self._run_search()
         if self.search_results:
             self._execute_first_result()
     
@@ -208,14 +208,50 @@ class SearchWidget(tk.Frame):
 class SearchManager:
     """搜索管理器"""
     
+    # 各字段子串命中时的得分
+    FIELD_WEIGHTS = {
+        "title": 1.0,
+        "description": 0.8,
+        "pinyin": 0.7,
+        "keywords": 0.6,
+    }
+    
+    # 理论知识命中的得分，低于模块本身的精确匹配
+    THEORY_WEIGHTS = {
+        "section": 0.55,
+        "title": 0.5,
+        "text": 0.45,
+    }
+    
+    # 结果中正文摘要的前后文长度
+    SNIPPET_CONTEXT = 12
+    
     def __init__(self):
         self.items: List[SearchItem] = []
         self.categories: Dict[str, List[SearchItem]] = {}
+        self.index = SearchIndex()
         self.logger = logging.getLogger(__name__)
+        
+        # 理论知识全文搜索（默认关闭，索引在首次搜索时由后台线程加载）
+        self.theory_index_path: Optional[str] = None
+        self.theory_opener: Optional[Callable[[TheoryEntry], None]] = None
+        self.theory_entries: List[TheoryEntry] = []
+        self.theory_listeners: List[Callable[[], None]] = []
+        self._theory_index: Optional[SearchIndex] = None
+        self._theory_loading = False
     
     def register_item(self, item: SearchItem):
         """注册搜索项"""
         self.items.append(item)
+        self.index.add(
+            {
+                "title": item.title,
+                "description": item.description,
+                "pinyin": pinyin_initials(item.title),
+                "keywords": "|".join(item.keywords),
+            },
+            self.FIELD_WEIGHTS
+        )
         
         # 按类别组织
         if item.category not in self.categories:
@@ -272,18 +308,85 @@ class SearchManager:
         if not query.strip():
             return []
         
-        results = []
-        
-        for item in self.items:
-            similarity = item.get_similarity(query)
-            if similarity > 0.1:  # 最低相似度阈值
-                results.append((item, similarity))
+        # 倒排索引取候选，有界堆取前limit个（最低相似度阈值0.1）
+        results = [(self.items[doc_id], score)
+                   for doc_id, score in self.index.search(query, limit, min_score=0.1)]
         
-        # 按相似度排序
-        results.sort(key=lambda x: x[1], reverse=True)
+        theory_index = self._get_theory_index()
+        if theory_index is not None:
+            # 正文很长，模糊匹配几乎总能命中，只取子串匹配
+            for doc_id, score in theory_index.search(query, limit, min_score=0.1, fuzzy=False):
+                results.append((self._make_theory_item(self.theory_entries[doc_id], query), score))
+            results.sort(key=lambda result: result[1], reverse=True)
         
         return results[:limit]
     
+    def enable_theory_search(self,
+                             opener: Callable[[TheoryEntry], None],
+                             index_path: str = DEFAULT_INDEX_PATH):
+        """启用理论知识全文搜索，opener 负责打开条目所属模块的理论窗口"""
+        self.theory_opener = opener
+        self.theory_index_path = index_path
+        self._theory_index = None
+    
+    def add_theory_listener(self, listener: Callable[[], None]):
+        """注册理论知识索引加载完成后的回调（在任务结果分发线程中调用）"""
+        self.theory_listeners.append(listener)
+    
+    def _get_theory_index(self) -> Optional[SearchIndex]:
+        """理论知识索引；尚未加载时提交后台加载任务并返回 None（本次只搜索模块）"""
+        if self.theory_index_path is None:
+            return None
+        if self._theory_index is None and not self._theory_loading:
+            self._theory_loading = True
+            get_thread_manager().submit_task(
+                self._load_theory_index, self._on_theory_index_loaded, None, "",
+                self.theory_index_path, priority=PRIORITY_BACKGROUND
+            )
+        return self._theory_index
+    
+    def _load_theory_index(self, index_path: str) -> Tuple[List[TheoryEntry], SearchIndex]:
+        """在工作线程中读取（必要时重建）索引文件并建立倒排索引（不导入任何模块）"""
+        entries = load_theory_index(index_path)
+        index = SearchIndex()
+        for entry in entries:
+            index.add(
+                {"section": entry.section, "title": entry.title, "text": entry.text},
+                self.THEORY_WEIGHTS
+            )
+        return entries, index
+    
+    def _on_theory_index_loaded(self, result: TaskResult):
+        """后台加载结束回调"""
+        self._theory_loading = False
+        if not result.success:
+            self.logger.error(f"加载理论知识索引失败: {result.error}")
+            return
+        self.theory_entries, self._theory_index = result.result
+        self.logger.info(f"理论知识索引已加载: {len(self.theory_entries)} 条")
+        for listener in self.theory_listeners:
+            listener()
+    
+    def _make_theory_item(self, entry: TheoryEntry, query: str) -> SearchItem:
+        """把理论知识条目包装为搜索项，描述为命中处的上下文"""
+        return SearchItem(
+            title=f"{entry.title} · {entry.section}",
+            description=self._snippet(entry.text, query),
+            category="理论知识",
+            keywords=[],
+            action=lambda: self.theory_opener(entry)
+        )
+    
+    def _snippet(self, text: str, query: str) -> str:
+        """截取命中位置前后的文字"""
+        flat = " ".join(text.split())
+        position = flat.lower().find(query.strip().lower())
+        if position < 0:
+            return flat[:self.SNIPPET_CONTEXT * 2] + "…"
+        start = max(position - self.SNIPPET_CONTEXT, 0)
+        end = position + len(query.strip()) + self.SNIPPET_CONTEXT
+        return ("…" if start > 0 else "") + flat[start:end] + ("…" if end < len(flat) else "")
+    
     def get_categories(self) -> List[str]:
         """获取所有类别"""
         return list(self.categories.keys())
@@ -0,0 +1,251 @@
+"""
+启动性能分析器 - 记录启动阶段每个导入、组件构建和首次绘制的耗时
+报告为 Chrome Trace 格式的 JSON（可用 chrome://tracing、Perfetto、speedscope 打开），
+同时输出 flamegraph.pl 可直接使用的折叠栈文件
+
+注意：本模块只依赖标准库，需在其他导入之前启用
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+
+PROFILE_FLAG = "--profile-startup"
+DEFAULT_REPORT_PATH = os.path.join("cache", "startup_profile.json")
+
+
+def get_profile_path(argv: Optional[List[str]] = None) -> Optional[str]:
+    """解析命令行参数，返回报告路径；未指定 --profile-startup 时返回None"""
+    for arg in (sys.argv if argv is None else argv)[1:]:
+        if arg == PROFILE_FLAG:
+            return DEFAULT_REPORT_PATH
+        if arg.startswith(PROFILE_FLAG + "="):
+            return arg.split("=", 1)[1] or DEFAULT_REPORT_PATH
+    return None
+
+
+class _TimingFinder:
+    """元路径查找器 - 为每个新导入模块的 exec_module 计时"""
+
+    def __init__(self, profiler: 'StartupProfiler'):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        spec = None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        if spec is None:
+            return None
+
+        loader = spec.loader
+        # 内置/冻结模块的加载器是类本身，不能在其上打补丁；这类模块也几乎不耗时
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+
+        exec_module = loader.exec_module
+        profiler = self.profiler
+
+        def timed_exec_module(module):
+            with profiler.span(f"import {fullname}", "import"):
+                exec_module(module)
+
+        try:
+            loader.exec_module = timed_exec_module
+        except (AttributeError, TypeError):
+            pass
+        return spec
+
+
+class StartupProfiler:
+    """启动性能分析器"""
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path = DEFAULT_REPORT_PATH
+        self.events: List[Dict[str, Any]] = []
+        self.folded: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        self._origin = time.perf_counter()
+        self._finder: Optional[_TimingFinder] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self, report_path: Optional[str] = None):
+        """开始记录（安装导入计时钩子）"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.report_path = report_path or DEFAULT_REPORT_PATH
+        self._origin = time.perf_counter()
+        self._finder = _TimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def stop(self):
+        """停止记录导入"""
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, category: str = "startup") -> '_Span':
+        """记录一段耗时（可嵌套，形成火焰图层级）"""
+        return _Span(self, name, category)
+
+    def mark(self, name: str):
+        """记录一个时间点（如首次绘制）"""
+        if not self.enabled or name in self.marks:
+            return
+        ts = (time.perf_counter() - self._origin) * 1e6
+        with self._lock:
+            self.marks[name] = ts
+            self.events.append({
+                "name": name, "cat": "mark", "ph": "i", "s": "g",
+                "ts": ts, "pid": os.getpid(), "tid": threading.get_ident()
+            })
+
+    def wrap_method(self, owner: type, method_name: str, category: str = "widget"):
+        """为类方法包一层计时（如 InteractiveCard._build_card）"""
+        if not self.enabled:
+            return
+        original = getattr(owner, method_name)
+        label = f"{owner.__name__}.{method_name}"
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            with self.span(label, category):
+                return original(*args, **kwargs)
+
+        setattr(owner, method_name, timed)
+
+    def watch_first_paint(self, root):
+        """监听根窗口首次绘制，完成后写出报告"""
+        if not self.enabled:
+            return
+
+        def on_expose(event=None):
+            if "first_paint" in self.marks:
+                return
+            self.mark("first_paint")
+            # 等待本轮绘制完成后再写报告
+            root.after_idle(self.write_report)
+
+        root.bind("<Expose>", on_expose, add="+")
+
+    def _record(self, name: str, category: str, start: float, end: float, path: str, child_time: float):
+        with self._lock:
+            self.events.append({
+                "name": name, "cat": category, "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident()
+            })
+            self_time = max(end - start - child_time, 0.0)
+            self.folded[path] = self.folded.get(path, 0.0) + self_time
+
+    def get_summary(self, top: int = 30) -> Dict[str, Any]:
+        """汇总：最耗时的导入与组件构建"""
+        with self._lock:
+            events = [e for e in self.events if e["ph"] == "X"]
+        imports: Dict[str, float] = {}
+        widgets: Dict[str, Dict[str, float]] = {}
+        for event in events:
+            if event["cat"] == "import":
+                imports[event["name"][len("import "):]] = event["dur"] / 1000
+            else:
+                item = widgets.setdefault(event["name"], {"calls": 0, "total_ms": 0.0})
+                item["calls"] += 1
+                item["total_ms"] += event["dur"] / 1000
+
+        slowest = sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {
+            "first_paint_ms": self.marks.get("first_paint", 0.0) / 1000 or None,
+            "import_count": len(imports),
+            "imports": [{"module": m, "cumulative_ms": round(ms, 3)} for m, ms in slowest],
+            "spans": {name: {"calls": v["calls"], "total_ms": round(v["total_ms"], 3)}
+                      for name, v in widgets.items()}
+        }
+
+    def write_report(self, path: Optional[str] = None) -> Optional[str]:
+        """写出 Trace JSON 报告与折叠栈文件，返回JSON路径"""
+        if not self.enabled:
+            return None
+        path = path or self.report_path
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._lock:
+                report = {
+                    "traceEvents": list(self.events),
+                    "displayTimeUnit": "ms",
+                }
+            report["summary"] = self.get_summary()
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=1, ensure_ascii=False)
+
+            folded_path = os.path.splitext(path)[0] + ".folded"
+            with self._lock:
+                lines = [f"{stack} {int(round(seconds * 1e6))}"
+                         for stack, seconds in self.folded.items()]
+            with open(folded_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"写出启动性能报告失败: {e}")
+            return None
+
+        summary = report["summary"]
+        print(f"启动性能报告已写入: {path}（首次绘制 {summary['first_paint_ms']} ms）")
+        for item in summary["imports"][:10]:
+            print(f"  {item['cumulative_ms']:9.1f} ms  import {item['module']}")
+        return path
+
+
+class _Span:
+    """计时区间上下文管理器"""
+
+    def __init__(self, profiler: StartupProfiler, name: str, category: str):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        if not self.profiler.enabled:
+            return self
+        stack = self.profiler._stack()
+        parent = stack[-1]["path"] if stack else ""
+        self.frame = {
+            "path": f"{parent};{self.name}" if parent else self.name,
+            "child_time": 0.0,
+            "start": time.perf_counter(),
+        }
+        stack.append(self.frame)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.profiler.enabled or not hasattr(self, "frame"):
+            return False
+        end = time.perf_counter()
+        stack = self.profiler._stack()
+        stack.pop()
+        elapsed = end - self.frame["start"]
+        if stack:
+            stack[-1]["child_time"] += elapsed
+        self.profiler._record(self.name, self.category, self.frame["start"], end,
+                              self.frame["path"], self.frame["child_time"])
+        return False
+
+
+# 全局启动性能分析器实例
+startup_profiler = StartupProfiler()
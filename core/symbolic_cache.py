@@ -0,0 +1,161 @@
+"""
+符号编译缓存 - 解析后的表达式、符号导数与 lambdify 得到的函数在进程内共用
+以规范化后的表达式文本为键：同一函数反复点击、重绘或防抖刷新时不再重新
+sympify、求导和 lambdify。总条目数有上限（LRU淘汰），并按类别统计命中情况。
+
+用法：
+    expr = symbolic_cache.parse("x**2 + y**2", ("x", "y"))
+    fxx, fxy, fyy = symbolic_cache.hessian_functions("x**2 + y**2", ("x", "y"))
+    print(symbolic_cache.get_stats())
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import sympy as sp
+from sympy.parsing.sympy_parser import (parse_expr, standard_transformations,
+                                        implicit_multiplication_application)
+
+from core.config_manager import config_manager
+
+
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application,)
+
+# 统计用的类别
+KINDS = ("parse", "gradient", "hessian", "lambdify")
+
+
+def normalize_expression(text: str) -> str:
+    """规范化表达式文本：去掉首尾空白，连续空白合并为一个空格
+
+    不直接删除空白，因为隐式乘法下 "x y" 与 "xy" 含义不同。
+    """
+    return " ".join(str(text).split())
+
+
+class SymbolicCache:
+    """解析/求导/编译结果的LRU缓存
+
+    键为 (类别, 规范化表达式, 变量名元组, ...)；编译的键直接使用 sympy 表达式
+    （结构相等即命中），因此不同文本化简后相同的导数也能共用编译结果。
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        if max_entries is None:
+            settings = config_manager.get_performance_settings()
+            max_entries = int(settings["symbolic_cache_size"])
+        self.max_entries = max(1, max_entries)
+
+        self.entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self.hits: Dict[str, int] = {kind: 0 for kind in KINDS}
+        self.misses: Dict[str, int] = {kind: 0 for kind in KINDS}
+        # 计算时会嵌套调用（求导先解析），用可重入锁
+        self._lock = threading.RLock()
+
+        # 日志
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def parse(self, text: str, variables: Sequence[str] = ("x",)) -> sp.Expr:
+        """解析表达式文本（支持隐式乘法），解析失败时抛出原始异常且不缓存"""
+        text = normalize_expression(text)
+        variables = tuple(variables)
+
+        def build():
+            local_dict = {name: sp.Symbol(name) for name in variables}
+            return parse_expr(text, local_dict=local_dict, transformations=TRANSFORMATIONS)
+
+        return self._get(("parse", text, variables), build)
+
+    def symbols(self, variables: Sequence[str]) -> Tuple[sp.Symbol, ...]:
+        """与 parse 使用的变量一致的符号"""
+        return tuple(sp.Symbol(name) for name in variables)
+
+    def gradient(self, text: str, variables: Sequence[str] = ("x",)) -> Tuple[sp.Expr, ...]:
+        """一阶偏导数（各变量顺序与 variables 一致），即一阶泰勒展开的系数"""
+        text = normalize_expression(text)
+        variables = tuple(variables)
+
+        def build():
+            expr = self.parse(text, variables)
+            return tuple(sp.diff(expr, symbol) for symbol in self.symbols(variables))
+
+        return self._get(("gradient", text, variables), build)
+
+    def hessian(self, text: str, variables: Sequence[str] = ("x", "y")) -> Tuple[Tuple[sp.Expr, ...], ...]:
+        """Hessian矩阵（嵌套元组，对称），由缓存的一阶导数再求导得到"""
+        text = normalize_expression(text)
+        variables = tuple(variables)
+
+        def build():
+            gradient = self.gradient(text, variables)
+            symbols = self.symbols(variables)
+            return tuple(tuple(sp.diff(first, symbol) for symbol in symbols) for first in gradient)
+
+        return self._get(("hessian", text, variables), build)
+
+    def compile(self, expr: sp.Expr, variables: Sequence[str] = ("x",)) -> Callable:
+        """把 sympy 表达式 lambdify 为NumPy函数（常数表达式返回标量，由调用方广播）"""
+        variables = tuple(variables)
+
+        def build():
+            return sp.lambdify(self.symbols(variables), expr, modules=["numpy"])
+
+        return self._get(("lambdify", expr, variables), build)
+
+    def function(self, text: str, variables: Sequence[str] = ("x",)) -> Callable:
+        """解析并编译表达式文本"""
+        return self.compile(self.parse(text, variables), variables)
+
+    def gradient_functions(self, text: str, variables: Sequence[str] = ("x",)) -> Tuple[Callable, ...]:
+        """编译后的一阶偏导数"""
+        return tuple(self.compile(first, variables) for first in self.gradient(text, variables))
+
+    def hessian_functions(self, text: str, variables: Sequence[str] = ("x", "y")) -> Tuple[Callable, ...]:
+        """编译后的Hessian上三角分量，按行展开（二元函数即 fxx, fxy, fyy）"""
+        hessian = self.hessian(text, variables)
+        return tuple(self.compile(hessian[i][j], variables)
+                     for i in range(len(hessian)) for j in range(i, len(hessian)))
+
+    def clear(self):
+        """清空缓存与统计"""
+        with self._lock:
+            self.entries.clear()
+            for kind in KINDS:
+                self.hits[kind] = 0
+                self.misses[kind] = 0
+
+    def get_stats(self) -> dict:
+        """缓存统计：总条目数、上限以及各类别的命中/未命中次数"""
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+    def _get(self, key: Hashable, build: Callable):
+        kind = key[0]
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits[kind] += 1
+                return self.entries[key]
+
+            self.misses[kind] += 1
+            value = build()
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self.logger.debug(f"淘汰符号缓存: {evicted[:2]}")
+            return value
+
+
+# 全局符号编译缓存实例
+symbolic_cache = SymbolicCache()
@@ -0,0 +1,413 @@
+"""
+泰勒展开缓存 - 按 (表达式, 展开点) 缓存各阶泰勒系数，级数一次只延长一项
+系数 f⁽ⁱ⁾(a)/i! 用截断幂级数的递推关系逐项计算：表达式树的每个节点保存自己的系数表，
+求第 i 项只用到各节点已算出的前 i 项，不对整个表达式反复符号求导，因此不会出现高阶导数表达式膨胀；
+其他一元函数按 f(a)' = f'(a)·a' 复合，无法处理时退回逐阶符号求导（第 i 阶导数由第 i-1 阶求导得到）。
+每个阶数的部分和只编译一次，是按系数做 Horner 求值的NumPy函数
+"""
+
+import math
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+import numpy as np
+import sympy as sp
+from sympy.parsing.sympy_parser import (parse_expr, standard_transformations,
+                                        implicit_multiplication_application)
+
+
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application,)
+CACHE_SIZE = 16
+
+# 一般函数求导时使用的占位变量
+_U = sp.Dummy("u")
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedSeries(ValueError):
+    """表达式含级数递推不支持的函数（调用方据此退回逐阶符号求导）"""
+
+
+class _Series:
+    """截断幂级数节点：coefficient(k) 按需逐项计算并缓存"""
+
+    def __init__(self):
+        self.c: List[float] = []
+
+    def coefficient(self, k: int) -> float:
+        while len(self.c) <= k:
+            self.c.append(self._next(len(self.c)))
+        return self.c[k]
+
+    def _next(self, k: int) -> float:
+        raise NotImplementedError
+
+
+class _Constant(_Series):
+    def __init__(self, value: float):
+        super().__init__()
+        self.value = value
+
+    def _next(self, k):
+        return self.value if k == 0 else 0.0
+
+
+class _Variable(_Series):
+    def __init__(self, center: float):
+        super().__init__()
+        self.center = center
+
+    def _next(self, k):
+        return self.center if k == 0 else (1.0 if k == 1 else 0.0)
+
+
+class _Sum(_Series):
+    def __init__(self, terms: List[_Series], signs: List[float] = None):
+        super().__init__()
+        self.terms = terms
+        self.signs = signs or [1.0] * len(terms)
+
+    def _next(self, k):
+        return sum(s * t.coefficient(k) for s, t in zip(self.signs, self.terms))
+
+
+class _Product(_Series):
+    def __init__(self, a: _Series, b: _Series):
+        super().__init__()
+        self.a, self.b = a, b
+
+    def _next(self, k):
+        return sum(self.a.coefficient(j) * self.b.coefficient(k - j) for j in range(k + 1))
+
+
+class _Quotient(_Series):
+    def __init__(self, a: _Series, b: _Series):
+        super().__init__()
+        self.a, self.b = a, b
+
+    def _next(self, k):
+        b0 = self.b.coefficient(0)
+        if b0 == 0:
+            raise ValueError("展开点是分母的零点")
+        return (self.a.coefficient(k)
+                - sum(self.b.coefficient(j) * self.c[k - j] for j in range(1, k + 1))) / b0
+
+
+class _Power(_Series):
+    """a**alpha，alpha 为常数：k·a₀·yₖ = Σ (alpha·j − (k − j))·aⱼ·yₖ₋ⱼ"""
+
+    def __init__(self, a: _Series, alpha: float):
+        super().__init__()
+        self.a, self.alpha = a, alpha
+
+    def _next(self, k):
+        a0 = self.a.coefficient(0)
+        if k == 0:
+            if a0 == 0:
+                # 底数为零时递推无法进行，交给逐阶符号求导判断是否可展开
+                raise UnsupportedSeries("幂函数的底数在展开点处为零")
+            if a0 < 0 and not float(self.alpha).is_integer():
+                raise ValueError("幂函数在展开点处不可展开")
+            return a0 ** self.alpha
+        return sum((self.alpha * j - (k - j)) * self.a.coefficient(j) * self.c[k - j]
+                   for j in range(1, k + 1)) / (k * a0)
+
+
+class _Exp(_Series):
+    def __init__(self, a: _Series):
+        super().__init__()
+        self.a = a
+
+    def _next(self, k):
+        if k == 0:
+            return math.exp(self.a.coefficient(0))
+        return sum(j * self.a.coefficient(j) * self.c[k - j] for j in range(1, k + 1)) / k
+
+
+class _Log(_Series):
+    def __init__(self, a: _Series):
+        super().__init__()
+        self.a = a
+
+    def _next(self, k):
+        a0 = self.a.coefficient(0)
+        if k == 0:
+            if a0 <= 0:
+                raise ValueError("对数在展开点处无定义")
+            return math.log(a0)
+        return (self.a.coefficient(k)
+                - sum(j * self.c[j] * self.a.coefficient(k - j) for j in range(1, k)) / k) / a0
+
+
+class _SinCos:
+    """同一参数的 sin、cos（或 sinh、cosh）级数互相依赖，成对计算"""
+
+    def __init__(self, a: _Series, hyperbolic: bool = False):
+        self.a = a
+        self.sign = 1.0 if hyperbolic else -1.0
+        x0 = a.coefficient(0)
+        self.s = [math.sinh(x0) if hyperbolic else math.sin(x0)]
+        self.co = [math.cosh(x0) if hyperbolic else math.cos(x0)]
+
+    def extend(self, k: int):
+        while len(self.s) <= k:
+            n = len(self.s)
+            da = [j * self.a.coefficient(j) for j in range(1, n + 1)]
+            self.s.append(sum(da[j - 1] * self.co[n - j] for j in range(1, n + 1)) / n)
+            self.co.append(self.sign * sum(da[j - 1] * self.s[n - j] for j in range(1, n + 1)) / n)
+
+
+class _SinCosPart(_Series):
+    def __init__(self, pair: _SinCos, cosine: bool):
+        super().__init__()
+        self.pair, self.cosine = pair, cosine
+
+    def _next(self, k):
+        self.pair.extend(k)
+        return self.pair.co[k] if self.cosine else self.pair.s[k]
+
+
+class _Derivative(_Series):
+    """a' 的级数：第 k 项为 (k + 1)·aₖ₊₁"""
+
+    def __init__(self, a: _Series):
+        super().__init__()
+        self.a = a
+
+    def _next(self, k):
+        return (k + 1) * self.a.coefficient(k + 1)
+
+
+class _Integral(_Series):
+    """已知导数级数与函数值，积分得到级数（用于反三角函数）"""
+
+    def __init__(self, derivative: _Series, value: float):
+        super().__init__()
+        self.derivative, self.value = derivative, value
+
+    def _next(self, k):
+        return self.value if k == 0 else self.derivative.coefficient(k - 1) / k
+
+
+class _Composite(_Series):
+    """一般的一元函数 f(a)：F' = f'(a)·a'，f'(a) 的级数在首次需要时才构建"""
+
+    def __init__(self, func, a: _Series, memo: dict):
+        super().__init__()
+        self.func, self.a = func, a
+        self.memo = memo
+        self._derivative = None
+
+    def _next(self, k):
+        if k == 0:
+            return _real_value(self.func(sp.Float(self.a.coefficient(0))))
+        if self._derivative is None:
+            df = sp.diff(self.func(_U), _U)
+            if df.has(sp.Derivative, sp.Subs):
+                raise UnsupportedSeries(f"无法求导: {self.func}")
+            self._derivative = _Product(_build(df, _U, 0.0, bound=self.a, memo=self.memo),
+                                        _Derivative(self.a))
+        return self._derivative.coefficient(k - 1) / k
+
+
+def _real_value(expr: sp.Expr) -> float:
+    value = complex(expr.evalf())
+    if value.imag != 0 or not math.isfinite(value.real):
+        raise ValueError(f"{expr} 不是有限实数")
+    return value.real
+
+
+def _integer_power(base: _Series, n: int) -> _Series:
+    """base**n（n ≥ 1）的二进制幂，只用 O(log n) 个乘积节点"""
+    result = None
+    square = base
+    while True:
+        if n & 1:
+            result = square if result is None else _Product(result, square)
+        n >>= 1
+        if not n:
+            return result
+        square = _Product(square, square)
+
+
+def _build(expr: sp.Expr, symbol: sp.Symbol, center: float,
+           bound: _Series = None, memo: dict = None) -> _Series:
+    """把sympy表达式树转换为级数节点树；不支持的函数抛出 UnsupportedSeries
+
+    bound 不为空时，symbol 代表已有的级数节点（用于一般函数的复合）；
+    memo 在同一展开内共享复合函数节点，避免 f'(a) 中反复出现的函数（如贝塞尔函数的递推）重复展开
+    """
+    if memo is None:
+        memo = {}
+    if expr == symbol:
+        return bound if bound is not None else _Variable(center)
+    if not expr.has(symbol):
+        return _Constant(_real_value(expr))
+
+    def build(sub):
+        return _build(sub, symbol, center, bound, memo)
+
+    args = [build(arg) for arg in expr.args] if not expr.is_Pow else None
+
+    if expr.is_Add:
+        return _Sum(args)
+    if expr.is_Mul:
+        result = args[0]
+        for arg in args[1:]:
+            result = _Product(result, arg)
+        return result
+    if expr.is_Pow:
+        base, exponent = expr.args
+        if exponent.has(symbol):
+            # a**b = exp(b·log a)
+            return _Exp(_Product(build(exponent), _Log(build(base))))
+        alpha = float(exponent)
+        base_series = build(base)
+        if alpha.is_integer() and alpha > 0:
+            # 正整数次幂用连乘（二进制幂），允许底数在展开点为零
+            return _integer_power(base_series, int(alpha))
+        if alpha.is_integer() and alpha < 0:
+            return _Quotient(_Constant(1.0), _integer_power(base_series, int(-alpha)))
+        return _Power(base_series, alpha)
+
+    func = expr.func
+    if func is sp.exp:
+        return _Exp(args[0])
+    if func is sp.log and len(args) == 1:
+        return _Log(args[0])
+    if func in (sp.sin, sp.cos, sp.tan, sp.cot, sp.sec, sp.csc):
+        pair = _SinCos(args[0])
+        sin, cos = _SinCosPart(pair, False), _SinCosPart(pair, True)
+        return {
+            sp.sin: lambda: sin,
+            sp.cos: lambda: cos,
+            sp.tan: lambda: _Quotient(sin, cos),
+            sp.cot: lambda: _Quotient(cos, sin),
+            sp.sec: lambda: _Quotient(_Constant(1.0), cos),
+            sp.csc: lambda: _Quotient(_Constant(1.0), sin),
+        }[func]()
+    if func in (sp.sinh, sp.cosh, sp.tanh):
+        pair = _SinCos(args[0], hyperbolic=True)
+        sinh, cosh = _SinCosPart(pair, False), _SinCosPart(pair, True)
+        return {sp.sinh: sinh, sp.cosh: cosh, sp.tanh: _Quotient(sinh, cosh)}[func]
+    if func in (sp.atan, sp.asin, sp.acos):
+        a = args[0]
+        a0 = a.coefficient(0)
+        square = _Product(a, a)
+        if func is sp.atan:
+            # atan(a)' = a' / (1 + a²)
+            derivative = _Quotient(_Derivative(a), _Sum([_Constant(1.0), square]))
+            return _Integral(derivative, math.atan(a0))
+        if abs(a0) >= 1:
+            raise ValueError("反正弦/反余弦在展开点处不可展开")
+        # asin(a)' = a' / √(1 − a²)，acos = π/2 − asin
+        root = _Power(_Sum([_Constant(1.0), square], [1.0, -1.0]), 0.5)
+        derivative = _Quotient(_Derivative(a), root)
+        if func is sp.asin:
+            return _Integral(derivative, math.asin(a0))
+        return _Integral(_Sum([derivative], [-1.0]), math.acos(a0))
+    if func is sp.Abs:
+        a = args[0]
+        a0 = a.coefficient(0)
+        if a0 == 0:
+            raise ValueError("绝对值在零点处不可展开")
+        return a if a0 > 0 else _Sum([a], [-1.0])
+    if isinstance(expr, sp.Function):
+        # 只有一个参数含自变量时（如 polygamma(0, x)）视为该参数的一元函数
+        dependent = [i for i, arg in enumerate(expr.args) if arg.has(symbol)]
+        if len(dependent) == 1:
+            i = dependent[0]
+            key = (expr, id(args[i]))
+            if key not in memo:
+                unary = sp.Lambda(_U, func(*(_U if j == i else arg for j, arg in enumerate(expr.args))))
+                memo[key] = _Composite(unary, args[i], memo)
+            return memo[key]
+
+    raise UnsupportedSeries(f"不支持的函数: {func}")
+
+
+class TaylorExpansion:
+    """函数在某点处的泰勒展开，按需延长"""
+
+    def __init__(self, expr: sp.Expr, symbol: sp.Symbol, center: float):
+        self.expr = expr
+        self.symbol = symbol
+        self.center = center
+
+        self.coefficients: List[float] = []
+        self.partial_sums: List[sp.Expr] = []
+        self._functions: Dict[int, Callable] = {}
+
+        # 优先用级数递推；不支持的函数退回逐阶符号求导
+        try:
+            self._series = _build(expr, symbol, center)
+        except UnsupportedSeries as e:
+            logger.debug(f"{e}，改用符号求导计算泰勒系数")
+            self._series = None
+        self.derivatives: List[sp.Expr] = [expr]
+
+    @property
+    def order(self) -> int:
+        """已展开到的阶数"""
+        return len(self.coefficients) - 1
+
+    def _next_coefficient(self, i: int) -> float:
+        if self._series is not None:
+            try:
+                value = complex(self._series.coefficient(i))
+            except (ZeroDivisionError, OverflowError) as e:
+                raise ValueError(f"函数在 x={self.center} 处不可展开") from e
+            except UnsupportedSeries as e:
+                logger.debug(f"{e}，改用符号求导计算泰勒系数")
+                self._series = None
+                return self._next_coefficient(i)
+        else:
+            if i >= len(self.derivatives):
+                self.derivatives.append(sp.diff(self.derivatives[-1], self.symbol))
+            try:
+                value = complex(self.derivatives[i].subs(self.symbol, self.center).evalf()) / math.factorial(i)
+            except TypeError as e:
+                raise ValueError(f"函数在 x={self.center} 处的 {i} 阶导数无法计算") from e
+        if not (math.isfinite(value.real) and value.imag == 0):
+            raise ValueError(f"函数在 x={self.center} 处的 {i} 阶导数不存在")
+        return value.real
+
+    def extend(self, order: int):
+        """把级数延长到 order 阶（已有的项不重算）"""
+        while self.order < order:
+            i = len(self.coefficients)
+            coefficient = self._next_coefficient(i)
+            term = sp.Float(coefficient) * (self.symbol - self.center) ** i
+            previous = self.partial_sums[-1] if self.partial_sums else sp.Integer(0)
+            self.coefficients.append(coefficient)
+            self.partial_sums.append(previous + term)
+
+    def polynomial(self, order: int) -> sp.Expr:
+        """order 阶泰勒多项式（符号形式，用于显示）"""
+        self.extend(order)
+        return self.partial_sums[order]
+
+    def function(self, order: int) -> Callable[[np.ndarray], np.ndarray]:
+        """order 阶泰勒多项式的数值函数（每个阶数只编译一次）"""
+        func = self._functions.get(order)
+        if func is None:
+            self.extend(order)
+            coefficients = np.array(self.coefficients[:order + 1])
+            center = self.center
+
+            def func(x):
+                return np.polynomial.polynomial.polyval(np.asarray(x, dtype=float) - center, coefficients)
+
+            self._functions[order] = func
+        return func
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def get_taylor_expansion(expression: str, center: float, variable: str = "x") -> TaylorExpansion:
+    """按 (表达式, 展开点) 取得泰勒展开对象；同一函数、同一展开点拖动阶数时复用已算的系数"""
+    symbol = sp.Symbol(variable)
+    expr = parse_expr(expression, local_dict={variable: symbol}, transformations=TRANSFORMATIONS)
+    logger.debug(f"新建泰勒展开: {expression} @ {center}")
+    return TaylorExpansion(expr, symbol, float(center))
@@ -0,0 +1,337 @@
+"""
+理论知识索引 - 从各模块的理论知识窗口中提取文本，构建全文搜索索引
+提取过程只解析源码（ast），不导入模块；结果以压缩JSON保存，供搜索管理器按需加载
+
+构建：python -m core.theory_index [--output PATH]
+"""
+
+import os
+import ast
+import sys
+import gzip
+import json
+import inspect
+import logging
+import importlib
+import tkinter as tk
+from tkinter import ttk
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from core.module_registry import module_registry
+
+
+INDEX_VERSION = 1
+INDEX_RELATIVE_PATH = os.path.join("cache", "theory_index.json.gz")
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resource_path(relative_path: str) -> str:
+    """资源文件路径：PyInstaller 打包后位于 _MEIPASS 解压目录，开发时相对当前目录"""
+    base_path = getattr(sys, "_MEIPASS", os.path.abspath("."))
+    return os.path.join(base_path, relative_path)
+
+
+# 随包发布的索引（build_exe.py 预先生成并打包到 cache 目录）
+DEFAULT_INDEX_PATH = resource_path(INDEX_RELATIVE_PATH)
+
+# 打开理论知识窗口的方法名前缀；没有这类方法时退而使用 create_theory* 备选窗口
+THEORY_METHOD_PREFIXES = ("show_theory", "knowledge_learning")
+FALLBACK_METHOD_PREFIX = "create_theory"
+
+# 不参与索引的源文件：知识框架本身（其中残留的示例方法与各模块内容重复）
+EXCLUDED_SOURCES = ("knowledge_framework.py",)
+
+# 短于此长度的字符串视为界面文字（标签、按钮），不是知识内容
+MIN_TEXT_LENGTH = 40
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TheoryEntry:
+    """理论知识条目 - 某个模块理论窗口中的一个选项卡"""
+
+    module: str
+    class_name: str
+    method: str
+    title: str
+    section: str
+    text: str
+
+    def to_row(self) -> list:
+        return [self.module, self.class_name, self.method, self.title, self.section, self.text]
+
+    @classmethod
+    def from_row(cls, row: list) -> 'TheoryEntry':
+        return cls(*row)
+
+
+def _clean_text(text: str) -> str:
+    """去掉三引号字符串中源码缩进带来的行首空白"""
+    return inspect.cleandoc(text)
+
+
+def _string(node) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _call_name(node: ast.Call) -> str:
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+
+def _ordered_nodes(func: ast.FunctionDef) -> list:
+    """函数体内的节点，按源码位置排序（文档字符串除外）"""
+    body = func.body
+    if body and isinstance(body[0], ast.Expr) and _string(body[0].value) is not None:
+        body = body[1:]
+    nodes = [node for stmt in body for node in ast.walk(stmt) if hasattr(node, "lineno")]
+    return sorted(nodes, key=lambda node: (node.lineno, node.col_offset))
+
+
+def _long_strings(func: ast.FunctionDef) -> List[str]:
+    """函数中的长字符串（知识正文）"""
+    texts = []
+    for node in _ordered_nodes(func):
+        text = _string(node)
+        if text is not None and len(text.strip()) >= MIN_TEXT_LENGTH:
+            texts.append(_clean_text(text))
+    return texts
+
+
+def _extract_method(func: ast.FunctionDef, methods: Dict[str, ast.FunctionDef]) -> Tuple[str, List[Tuple[str, str]]]:
+    """提取一个理论方法的窗口标题与 [(选项卡, 正文)]
+
+    支持三种写法：
+    - sections = {"选项卡": \"\"\"正文\"\"\"} 交给 KnowledgeFrame
+    - notebook.add(frame, text="选项卡") 之后紧跟正文字符串
+    - notebook.add(frame, text="选项卡") 后调用 self._create_xxx(frame) 填充正文
+    """
+    title = ""
+    sections: List[Tuple[str, str]] = []
+    frame_labels: Dict[str, str] = {}
+    current = ""
+    consumed = set()
+
+    for node in _ordered_nodes(func):
+        if id(node) in consumed:
+            continue
+
+        if isinstance(node, ast.Dict):
+            pairs = [(_string(k), _string(v)) for k, v in zip(node.keys, node.values)]
+            if pairs and all(k is not None and v is not None for k, v in pairs):
+                sections.extend((k, _clean_text(v)) for k, v in pairs if len(v.strip()) >= MIN_TEXT_LENGTH)
+                consumed.update(id(n) for n in ast.walk(node))
+            continue
+
+        if isinstance(node, ast.Call):
+            name = _call_name(node)
+            if name == "KnowledgeFrame" and len(node.args) >= 2 and _string(node.args[1]):
+                title = _string(node.args[1])
+            elif name == "title" and node.args and _string(node.args[0]) and not title:
+                title = _string(node.args[0])
+            elif name == "add":
+                label = next((_string(kw.value) for kw in node.keywords if kw.arg == "text"), None)
+                if label:
+                    current = label
+                    if node.args and isinstance(node.args[0], ast.Name):
+                        frame_labels[node.args[0].id] = label
+            elif (isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name)
+                  and node.func.value.id == "self" and name in methods):
+                label = next((frame_labels[arg.id] for arg in node.args
+                              if isinstance(arg, ast.Name) and arg.id in frame_labels), None)
+                if label:
+                    sections.extend((label, text) for text in _long_strings(methods[name]))
+            continue
+
+        text = _string(node)
+        if text is not None and len(text.strip()) >= MIN_TEXT_LENGTH:
+            sections.append((current or title, _clean_text(text)))
+
+    return title, sections
+
+
+def extract_theory(path: str) -> List[TheoryEntry]:
+    """解析源文件，提取其中所有理论知识条目"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    if not any(prefix in source for prefix in THEORY_METHOD_PREFIXES + (FALLBACK_METHOD_PREFIX,)):
+        return []
+
+    module = os.path.splitext(os.path.basename(path))[0]
+    tree = ast.parse(source, filename=path)
+    entries = []
+
+    for cls in (node for node in tree.body if isinstance(node, ast.ClassDef)):
+        methods = {node.name: node for node in cls.body if isinstance(node, ast.FunctionDef)}
+        roots = [name for name in methods if name.startswith(THEORY_METHOD_PREFIXES)]
+        if not roots:
+            roots = [name for name in methods if name.startswith(FALLBACK_METHOD_PREFIX)]
+
+        seen = set()
+        for method in roots:
+            title, sections = _extract_method(methods[method], methods)
+            for section, text in sections:
+                if (section, text) in seen:
+                    continue
+                seen.add((section, text))
+                entries.append(TheoryEntry(module, cls.name, method, title or module, section, text))
+
+    return entries
+
+
+def _source_files(source_dir: str) -> List[str]:
+    """源码目录中参与索引的模块文件；目录不存在（如打包后）时为空"""
+    if not os.path.isdir(source_dir):
+        return []
+    return sorted(os.path.join(source_dir, name) for name in os.listdir(source_dir)
+                  if name.endswith(".py") and name not in EXCLUDED_SOURCES)
+
+
+def build_theory_index(output_path: str = DEFAULT_INDEX_PATH, source_dir: str = SOURCE_DIR) -> List[TheoryEntry]:
+    """扫描源码目录并写出索引文件"""
+    entries = []
+    sources = {}
+    for path in _source_files(source_dir):
+        try:
+            found = extract_theory(path)
+        except (SyntaxError, UnicodeDecodeError) as e:
+            logger.warning(f"跳过无法解析的文件 {path}: {e}")
+            continue
+        # 记录所有扫描过的文件，以便发现新增的理论内容
+        sources[os.path.basename(path)] = os.path.getmtime(path)
+        entries.extend(found)
+
+    data = {
+        "version": INDEX_VERSION,
+        "sources": sources,
+        "entries": [entry.to_row() for entry in entries],
+    }
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with gzip.open(output_path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    logger.info(f"理论知识索引已生成: {output_path}（{len(entries)} 条）")
+    return entries
+
+
+def _is_stale(data: dict, source_dir: str) -> bool:
+    """源文件有修改、新增或删除时需要重建（打包后没有源码，沿用随包的索引）"""
+    if data.get("version") != INDEX_VERSION:
+        return True
+    files = _source_files(source_dir)
+    if not files:
+        return False
+    sources = data.get("sources", {})
+    if {os.path.basename(path) for path in files} != set(sources):
+        return True
+    return any(os.path.getmtime(os.path.join(source_dir, name)) > mtime for name, mtime in sources.items())
+
+
+def load_theory_index(index_path: str = DEFAULT_INDEX_PATH, source_dir: str = SOURCE_DIR) -> List[TheoryEntry]:
+    """加载索引文件；不存在或已过期且有模块源码时重新构建
+
+    没有源码可扫描（打包后）时只读取已有的索引，不会写出空索引。
+    """
+    entries = None
+    if os.path.exists(index_path):
+        try:
+            with gzip.open(index_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            entries = [TheoryEntry.from_row(row) for row in data["entries"]]
+            if not _is_stale(data, source_dir):
+                return entries
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"理论知识索引损坏: {e}")
+            entries = None
+
+    if not _source_files(source_dir):
+        if entries is None:
+            logger.warning(f"找不到理论知识索引且没有模块源码可扫描: {index_path}")
+        return entries or []
+
+    try:
+        return build_theory_index(index_path, source_dir)
+    except OSError as e:
+        logger.error(f"写出理论知识索引失败: {e}")
+        return entries or []
+
+
+def _toplevels(widget) -> set:
+    """widget 下的所有顶层窗口"""
+    found = set()
+    for child in widget.winfo_children():
+        if isinstance(child, tk.Toplevel):
+            found.add(child)
+        found |= _toplevels(child)
+    return found
+
+
+def _select_section(widget, section: str) -> bool:
+    """在窗口中查找含该选项卡的 Notebook 并切换过去"""
+    if isinstance(widget, ttk.Notebook):
+        for tab_id in widget.tabs():
+            if widget.tab(tab_id, "text") == section:
+                widget.select(tab_id)
+                return True
+    return any(_select_section(child, section) for child in widget.winfo_children())
+
+
+def open_theory(master, entry: TheoryEntry):
+    """打开条目所属模块的理论知识窗口并切换到对应选项卡（此时才导入模块）"""
+    root = master._root()
+    before = _toplevels(root)
+
+    spec = module_registry.get_spec(entry.module)
+    if spec is not None and spec.class_name == entry.class_name:
+        app_class = module_registry.load(entry.module)
+        if app_class is not None:
+            module_registry.record_usage(entry.module)
+    else:
+        app_class = getattr(importlib.import_module(entry.module), entry.class_name, None)
+    if app_class is None:
+        logger.error(f"无法加载理论知识所属模块: {entry.module}.{entry.class_name}")
+        return None
+
+    # 可视化模块需要宿主窗口；knowledge.py 之类的知识类无参构造即可
+    init_params = [p for p in list(inspect.signature(app_class.__init__).parameters.values())[1:]
+                   if p.default is p.empty and p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    if init_params:
+        window = tk.Toplevel(root)
+        window.title(spec.title if spec else entry.title)
+        instance = app_class(window)
+    else:
+        instance = app_class()
+
+    getattr(instance, entry.method)()
+
+    for window in _toplevels(root) - before:
+        if _select_section(window, entry.section):
+            window.lift()
+            break
+    return instance
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行构建入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="构建理论知识全文索引")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="索引文件路径")
+    parser.add_argument("--source-dir", default=SOURCE_DIR, help="模块源码目录")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    entries = build_theory_index(args.output, args.source_dir)
+    modules = sorted({entry.module for entry in entries})
+    print(f"已索引 {len(entries)} 个理论知识选项卡，来自 {len(modules)} 个模块: {', '.join(modules)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
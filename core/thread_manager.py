@@ -6,8 +6,14 @@
 import threading
 import queue
 import time
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Callable, Any, Optional, Dict
+import heapq
+import pickle
+import inspect
+import importlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from multiprocessing import shared_memory
+from typing import Callable, Any, Optional, Dict, List, Tuple
 import logging
 import tkinter as tk
 from functools import wraps
@@ -15,6 +21,12 @@ from functools import wraps
 from themes.futuristic_theme import COLORS, FONTS
 
 
+# 任务优先级（数值越小越先执行）：交互计算优先于普通任务，预热、导出等后台任务最后
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BACKGROUND = 10
+
+
 class TaskResult:
     """任务执行结果"""
     
@@ -24,17 +36,155 @@ class TaskResult:
         self.result = result
         self.error = error
         self.timestamp = time.time()
+    
+    @property
+    def cancelled(self) -> bool:
+        """任务是否因取消或超时而结束"""
+        return isinstance(self.error, TaskCancelled)
+
+
+class TaskCancelled(Exception):
+    """任务被取消或超过截止时间"""
+
+
+class TaskContext:
+    """任务上下文 - 用于协作式取消和进度汇报
+    
+    任务函数声明名为 task_context 的参数即可获得该对象：
+    在循环中定期调用 check_cancelled()，并用 report_progress() 汇报进度。
+    进程池任务的上下文基于 multiprocessing.Manager 代理对象，同样可用。
+    """
+    
+    # 两次进度写入之间的最小间隔（秒）
+    PROGRESS_INTERVAL = 0.1
+    
+    def __init__(self, task_id: str, cancel_event, progress_state, deadline: Optional[float] = None):
+        self.task_id = task_id
+        self.deadline = deadline
+        self._cancel_event = cancel_event
+        self._progress = progress_state
+        self._last_report = 0.0
+    
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        """请求取消任务"""
+        self._cancel_event.set()
+    
+    def remaining(self) -> Optional[float]:
+        """距截止时间的剩余秒数，无截止时间时返回None"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+    
+    def check_cancelled(self):
+        """已取消或超时则抛出 TaskCancelled"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled(f"任务已取消: {self.task_id}")
+        if self.deadline is not None and time.time() > self.deadline:
+            raise TaskCancelled(f"任务超时: {self.task_id}")
+    
+    def report_progress(self, fraction: float, message: Optional[str] = None):
+        """汇报进度（0~1），按 PROGRESS_INTERVAL 节流"""
+        now = time.time()
+        fraction = min(max(float(fraction), 0.0), 1.0)
+        if fraction < 1.0 and now - self._last_report < self.PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self._progress.update({"fraction": fraction, "message": message})
+    
+    def get_progress(self) -> Tuple[Optional[float], Optional[str]]:
+        """获取最近一次汇报的 (进度, 消息)"""
+        state = self._progress.copy()
+        return state.get("fraction"), state.get("message")
+
+
+def _accepts_context(func: Callable) -> bool:
+    """任务函数是否声明了 task_context 参数"""
+    try:
+        return "task_context" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class SharedArray:
+    """共享内存中的NumPy数组句柄 - 可被pickle，子进程据此直接映射数组而不复制数据"""
+    
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+    
+    @classmethod
+    def from_array(cls, array) -> Tuple['SharedArray', shared_memory.SharedMemory]:
+        """把数组复制到新建的共享内存块，返回句柄和共享内存对象（由调用方负责释放）"""
+        import numpy as np
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        view[...] = array
+        return cls(shm.name, array.shape, array.dtype.str), shm
+    
+    def attach(self):
+        """在子进程中映射共享内存，返回 (数组视图, 共享内存对象)"""
+        import numpy as np
+        shm = shared_memory.SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf), shm
+
+
+def _resolve_function(func_ref):
+    """子进程中解析函数引用；被 @async_task 装饰的函数取其原函数"""
+    if not isinstance(func_ref, tuple):
+        return func_ref
+    module_name, qualname = func_ref
+    target = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        target = getattr(target, part)
+    if getattr(target, "_is_async_task", False):
+        target = target.__wrapped__
+    return target
+
+
+def _run_in_process(func_ref, args: tuple, kwargs: dict) -> bytes:
+    """进程池中执行任务；结果在释放共享内存前序列化，避免返回值引用已关闭的缓冲区"""
+    handles = []
+    
+    def unpack(value):
+        if isinstance(value, SharedArray):
+            array, shm = value.attach()
+            handles.append(shm)
+            return array
+        return value
+    
+    try:
+        func = _resolve_function(func_ref)
+        args = tuple(unpack(a) for a in args)
+        kwargs = {k: unpack(v) for k, v in kwargs.items()}
+        return pickle.dumps(func(*args, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        args = kwargs = None
+        for shm in handles:
+            try:
+                shm.close()
+            except BufferError:
+                # 任务函数仍持有数组视图，进程回收时自动释放
+                pass
 
 
 class ProgressOverlay:
     """进度遮罩层 - 显示计算进度"""
     
-    def __init__(self, parent: tk.Widget, message: str = "正在计算..."):
+    def __init__(self, parent: tk.Widget, message: str = "正在计算...",
+                 on_cancel: Optional[Callable[[], None]] = None):
         self.parent = parent
         self.message = message
+        self.on_cancel = on_cancel
         self.overlay = None
         self.progress_bar = None
         self.message_label = None
+        self.cancel_button = None
         self.is_visible = False
         
     def show(self):
@@ -101,6 +251,22 @@ class ProgressOverlay:
         self.progress_bar.pack(pady=(0, 20), padx=20)
         self.progress_bar.start(10)  # 动画速度
         
+        # 取消按钮（任务支持协作式取消时显示）
+        if self.on_cancel:
+            self.cancel_button = tk.Button(
+                content_frame,
+                text="取消",
+                font=FONTS["button"],
+                bg=COLORS["bg_medium"],
+                fg=COLORS["accent_primary"],
+                activebackground=COLORS["accent_primary"],
+                activeforeground=COLORS["bg_medium"],
+                bd=0,
+                cursor="hand2",
+                command=self._on_cancel_click
+            )
+            self.cancel_button.pack(pady=(0, 15))
+        
         # 设置为模态
         self.overlay.transient(self.parent.winfo_toplevel())
         self.overlay.grab_set()
@@ -115,6 +281,26 @@ class ProgressOverlay:
             self.message_label.config(text=message)
             self.overlay.update()
     
+    def set_progress(self, fraction: float, message: Optional[str] = None):
+        """显示确定进度（0~1），需在主线程中调用"""
+        if not self.is_visible or not self.progress_bar:
+            return
+        if str(self.progress_bar.cget('mode')) != 'determinate':
+            self.progress_bar.stop()
+            self.progress_bar.config(mode='determinate', maximum=100)
+        self.progress_bar['value'] = fraction * 100
+        if message and self.message_label:
+            self.message_label.config(text=message)
+    
+    def _on_cancel_click(self):
+        """点击取消按钮"""
+        if self.cancel_button:
+            self.cancel_button.config(state=tk.DISABLED)
+        if self.message_label:
+            self.message_label.config(text="正在取消...")
+        if self.on_cancel:
+            self.on_cancel()
+    
     def hide(self):
         """隐藏进度遮罩"""
         if not self.is_visible:
@@ -131,15 +317,53 @@ class ProgressOverlay:
 
 
 class ThreadManager:
-    """线程管理器"""
+    """线程管理器
+    
+    结果分发有两种模式：
+    - "thread": 默认模式，由后台守护线程执行回调（回调中不能访问Tk）
+    - "tk": 调用 attach_root() 后，由Tk事件循环中的 after() 轮询泵在主线程批量执行回调
+    """
+    
+    # Tk轮询泵参数：有任务时快速轮询，空闲时降低频率
+    ACTIVE_POLL_MS = 16
+    IDLE_POLL_MS = 100
+    # 每个tick最多处理的结果数量和时间预算
+    MAX_BATCH = 64
+    BATCH_BUDGET_MS = 8
+    # 超过该字节数的NumPy数组参数通过共享内存传给子进程
+    SHARED_MEMORY_THRESHOLD = 1 << 20
     
     def __init__(self, max_workers: int = 4):
         self.max_workers = max_workers
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.process_executor: Optional[ProcessPoolExecutor] = None
         self.result_queue = queue.Queue()
         self.active_tasks: Dict[str, Future] = {}
         self.task_counter = 0
         
+        # 协作式取消与进度
+        self.task_contexts: Dict[str, TaskContext] = {}
+        self.task_overlays: Dict[str, ProgressOverlay] = {}
+        self.task_groups: Dict[str, str] = {}
+        self._sync_manager = None
+        self._last_progress_update = 0.0
+        
+        # 优先级队列：任务先进入各执行器的堆，有空闲工作者时按优先级取出执行
+        self._pending: Dict[str, list] = {"thread": [], "process": []}
+        self._running: Dict[str, int] = {"thread": 0, "process": 0}
+        self._sequence = 0
+        self._queue_lock = threading.Lock()
+        self._is_shutdown = False
+        
+        # 合并键：同键的新任务取代尚未完成的旧任务
+        self.task_keys: Dict[str, str] = {}
+        self.coalesce_latest: Dict[str, str] = {}
+        
+        # 结果分发模式
+        self.dispatch_mode = "thread"
+        self.root: Optional[tk.Misc] = None
+        self._pump_id = None
+        
         # 日志
         self.logger = logging.getLogger(__name__)
         
@@ -149,29 +373,95 @@ class ThreadManager:
         
         self.logger.info(f"线程管理器初始化完成，最大工作线程数: {max_workers}")
     
+    def attach_root(self, root: tk.Misc):
+        """切换到主线程分发模式：回调与遮罩隐藏都在Tk事件循环中执行"""
+        self.root = root
+        self.dispatch_mode = "tk"
+        if self._pump_id is None:
+            self._pump_id = self.root.after(self.ACTIVE_POLL_MS, self._pump_results)
+        self.logger.info("任务结果改为在主线程分发")
+    
     def submit_task(self, 
                    func: Callable,
                    callback: Optional[Callable[[TaskResult], None]] = None,
                    progress_parent: Optional[tk.Widget] = None,
                    progress_message: str = "正在计算...",
-                   *args, **kwargs) -> str:
-        """提交计算任务"""
+                   *args,
+                   executor: str = "thread",
+                   timeout: Optional[float] = None,
+                   group: Optional[str] = None,
+                   priority: int = PRIORITY_NORMAL,
+                   coalesce_key: Optional[str] = None,
+                   **kwargs) -> str:
+        """提交计算任务
+        
+        executor="process" 时在进程池中执行，适合持有GIL的CPU密集计算。
+        此时函数和参数必须可被pickle（函数需定义在模块顶层），
+        较大的NumPy数组参数自动通过共享内存传递。
+        
+        任务函数声明 task_context 参数时会收到 TaskContext，
+        timeout（秒）作为其截止时间；group 用于 cancel_group() 批量取消。
+        
+        priority 越小越先执行（见 PRIORITY_* 常量）。指定 coalesce_key 时，
+        新任务会取代同键尚未完成的旧任务：排队中的旧任务直接丢弃，
+        运行中的旧任务收到取消请求，其结果不再回调。
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"未知的执行器类型: {executor}")
         
         # 生成任务ID
         self.task_counter += 1
         task_id = f"task_{self.task_counter}_{int(time.time())}"
         
+        # 任务上下文
+        context = None
+        if _accepts_context(func):
+            context = self._create_context(task_id, executor, timeout)
+            kwargs["task_context"] = context
+            self.task_contexts[task_id] = context
+        if group:
+            self.task_groups[task_id] = group
+        
         # 显示进度遮罩
         overlay = None
         if progress_parent:
-            overlay = ProgressOverlay(progress_parent, progress_message)
+            on_cancel = (lambda: self.cancel_task(task_id)) if context else None
+            overlay = ProgressOverlay(progress_parent, progress_message, on_cancel)
             overlay.show()
+            if context:
+                self.task_overlays[task_id] = overlay
+        
+        # 合并：取代同键的旧任务
+        if coalesce_key is not None:
+            self.task_keys[task_id] = coalesce_key
+            previous = self.coalesce_latest.get(coalesce_key)
+            self.coalesce_latest[coalesce_key] = task_id
+            if previous is not None:
+                self.cancel_task(previous)
+        
+        future: Future = Future()
+        if executor == "process":
+            start = self._prepare_process_task(task_id, func, callback, overlay, future, args, kwargs)
+        else:
+            start = self._prepare_thread_task(task_id, func, callback, overlay, future, args, kwargs)
+        self.active_tasks[task_id] = future
+        self._enqueue(executor, priority, future, start)
+        
+        self.logger.info(f"任务已提交: {task_id}（{executor}，优先级 {priority}）")
+        return task_id
+    
+    def _prepare_thread_task(self, task_id: str, func: Callable, callback, overlay,
+                             future: Future, args: tuple, kwargs: dict) -> Callable[[], None]:
+        """准备线程池任务，返回启动函数"""
         
         # 包装任务函数
         def wrapped_task():
             try:
                 result = func(*args, **kwargs)
                 task_result = TaskResult(task_id, True, result)
+            except TaskCancelled as e:
+                self.logger.info(f"任务已中止 {task_id}: {e}")
+                task_result = TaskResult(task_id, False, None, e)
             except Exception as e:
                 self.logger.error(f"任务执行失败 {task_id}: {e}")
                 task_result = TaskResult(task_id, False, None, e)
@@ -180,66 +470,319 @@ class ThreadManager:
             self.result_queue.put((task_result, callback, overlay))
             return task_result
         
-        # 提交任务
-        future = self.executor.submit(wrapped_task)
-        self.active_tasks[task_id] = future
+        def on_done(done: Future):
+            if done.cancelled():
+                self._put_cancelled(task_id, callback, overlay)
+            elif done.exception() is not None:
+                # 只有启动失败才会走到这里，wrapped_task 本身不抛异常
+                self.result_queue.put((TaskResult(task_id, False, None, done.exception()), callback, overlay))
         
-        self.logger.info(f"任务已提交: {task_id}")
-        return task_id
+        future.add_done_callback(on_done)
+        return lambda: self.executor.submit(self._execute, future, wrapped_task)
     
-    def _process_results(self):
-        """处理任务结果（在主线程中执行回调）"""
+    def _execute(self, future: Future, work: Callable):
+        """在线程池中执行任务并释放工作者名额"""
+        try:
+            future.set_result(work())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._release_slot("thread")
+    
+    def _enqueue(self, executor: str, priority: int, future: Future, start: Callable[[], None]):
+        """按优先级入队并尝试调度"""
+        with self._queue_lock:
+            self._sequence += 1
+            heapq.heappush(self._pending[executor], (priority, self._sequence, future, start))
+        self._dispatch(executor)
+    
+    def _dispatch(self, executor: str):
+        """有空闲工作者时按优先级启动排队任务，跳过已取消（含被取代）的任务"""
         while True:
+            with self._queue_lock:
+                if (self._is_shutdown or not self._pending[executor]
+                        or self._running[executor] >= self.max_workers):
+                    return
+                _, _, future, start = heapq.heappop(self._pending[executor])
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._running[executor] += 1
+            
+            try:
+                start()
+            except Exception as e:
+                self.logger.error(f"任务启动失败: {e}")
+                future.set_exception(e)
+                self._release_slot(executor)
+    
+    def _release_slot(self, executor: str):
+        """任务结束，释放工作者名额并调度下一个"""
+        with self._queue_lock:
+            self._running[executor] -= 1
+        self._dispatch(executor)
+    
+    def _create_context(self, task_id: str, executor: str, timeout: Optional[float]) -> TaskContext:
+        """创建任务上下文；进程池任务使用 Manager 代理以跨进程共享状态"""
+        deadline = time.time() + timeout if timeout else None
+        if executor == "process":
+            if self._sync_manager is None:
+                self._sync_manager = multiprocessing.Manager()
+            return TaskContext(task_id, self._sync_manager.Event(), self._sync_manager.dict(), deadline)
+        return TaskContext(task_id, threading.Event(), {}, deadline)
+    
+    def _put_cancelled(self, task_id: str, callback, overlay):
+        """尚未开始就被取消的任务：以取消结果结束，使遮罩关闭、回调得到通知"""
+        task_result = TaskResult(task_id, False, None, TaskCancelled(f"任务已取消: {task_id}"))
+        self.result_queue.put((task_result, callback, overlay))
+    
+    def _get_process_executor(self) -> ProcessPoolExecutor:
+        """按需创建进程池（子进程启动开销较大，只在第一次使用时创建）"""
+        if self.process_executor is None:
+            self.process_executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self.logger.info(f"进程池已创建，最大进程数: {self.max_workers}")
+        return self.process_executor
+    
+    def _share_large_arrays(self, values, handles: List[shared_memory.SharedMemory]):
+        """把较大的NumPy数组替换为共享内存句柄"""
+        shared = []
+        for value in values:
+            if (type(value).__name__ == "ndarray"
+                    and getattr(value, "nbytes", 0) >= self.SHARED_MEMORY_THRESHOLD):
+                handle, shm = SharedArray.from_array(value)
+                handles.append(shm)
+                value = handle
+            shared.append(value)
+        return shared
+    
+    def _prepare_process_task(self, task_id: str, func: Callable, callback, overlay,
+                              future: Future, args: tuple, kwargs: dict) -> Callable[[], None]:
+        """准备进程池任务，返回启动函数；结果经同一个结果队列分发"""
+        handles: List[shared_memory.SharedMemory] = []
+        
+        # @async_task 装饰后模块中的同名对象是包装函数，无法直接pickle原函数，改为按名称传递
+        func_ref = getattr(func, "_async_task_ref", func)
+        
+        try:
+            shared_args = tuple(self._share_large_arrays(args, handles))
+            shared_kwargs = dict(zip(kwargs, self._share_large_arrays(kwargs.values(), handles)))
+        except Exception:
+            self._release_shared_memory(handles)
+            if overlay:
+                overlay.hide()
+            raise
+        
+        def on_done(done: Future):
+            self._release_shared_memory(handles)
+            if done.cancelled():
+                self._put_cancelled(task_id, callback, overlay)
+                return
+            try:
+                task_result = TaskResult(task_id, True, pickle.loads(done.result()))
+            except TaskCancelled as e:
+                self.logger.info(f"任务已中止 {task_id}: {e}")
+                task_result = TaskResult(task_id, False, None, e)
+            except Exception as e:
+                self.logger.error(f"任务执行失败 {task_id}: {e}")
+                task_result = TaskResult(task_id, False, None, e)
+            self.result_queue.put((task_result, callback, overlay))
+        
+        future.add_done_callback(on_done)
+        
+        def start():
+            process_future = self._get_process_executor().submit(
+                _run_in_process, func_ref, shared_args, shared_kwargs
+            )
+            
+            def relay(done: Future):
+                self._release_slot("process")
+                try:
+                    future.set_result(done.result())
+                except BaseException as e:
+                    future.set_exception(e)
+            
+            process_future.add_done_callback(relay)
+        
+        return start
+    
+    @staticmethod
+    def _release_shared_memory(handles: List[shared_memory.SharedMemory]):
+        """释放父进程创建的共享内存块"""
+        for shm in handles:
+            try:
+                shm.close()
+                shm.unlink()
+            except (FileNotFoundError, BufferError):
+                pass
+        handles.clear()
+    
+    def _process_results(self):
+        """处理任务结果（后台线程分发模式）"""
+        while self.dispatch_mode == "thread":
             try:
-                task_result, callback, overlay = self.result_queue.get(timeout=1)
-                
-                # 移除活动任务
-                if task_result.task_id in self.active_tasks:
-                    del self.active_tasks[task_result.task_id]
-                
-                # 隐藏进度遮罩
-                if overlay:
-                    overlay.hide()
-                
-                # 执行回调
-                if callback:
-                    try:
-                        callback(task_result)
-                    except Exception as e:
-                        self.logger.error(f"回调执行失败: {e}")
-                
-                self.logger.info(f"任务完成: {task_result.task_id}")
-                
+                item = self.result_queue.get(timeout=1)
             except queue.Empty:
                 continue
+            
+            # 等待期间已切换到主线程分发，交还给Tk轮询泵
+            if self.dispatch_mode != "thread":
+                self.result_queue.put(item)
+                break
+            
+            self._handle_result(*item)
+    
+    def _pump_results(self):
+        """Tk轮询泵：在主线程中批量处理已完成的任务结果"""
+        self._pump_id = None
+        deadline = time.perf_counter() + self.BATCH_BUDGET_MS / 1000
+        handled = 0
+        
+        while handled < self.MAX_BATCH and time.perf_counter() < deadline:
+            try:
+                item = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._handle_result(*item)
+            handled += 1
+        
+        if self.root is None:
+            return
+        
+        self._update_progress()
+        
+        # 还有积压时尽快继续，否则按是否有活动任务决定轮询间隔
+        if not self.result_queue.empty():
+            delay = 1
+        elif self.active_tasks:
+            delay = self.ACTIVE_POLL_MS
+        else:
+            delay = self.IDLE_POLL_MS
+        
+        try:
+            self._pump_id = self.root.after(delay, self._pump_results)
+        except tk.TclError:
+            # 根窗口已销毁
+            self.root = None
+    
+    def _update_progress(self):
+        """把任务汇报的进度同步到遮罩（主线程，按 PROGRESS_INTERVAL 节流）"""
+        now = time.time()
+        if not self.task_overlays or now - self._last_progress_update < TaskContext.PROGRESS_INTERVAL:
+            return
+        self._last_progress_update = now
+        
+        for task_id, overlay in list(self.task_overlays.items()):
+            context = self.task_contexts.get(task_id)
+            if context is None:
+                continue
+            try:
+                fraction, message = context.get_progress()
+                if fraction is not None:
+                    overlay.set_progress(fraction, message)
             except Exception as e:
-                self.logger.error(f"结果处理失败: {e}")
+                self.logger.warning(f"更新任务进度失败 {task_id}: {e}")
+    
+    def _handle_result(self, task_result: TaskResult, callback, overlay):
+        """移除活动任务、隐藏遮罩并执行回调（被合并取代的任务不回调）"""
+        try:
+            # 移除活动任务
+            if task_result.task_id in self.active_tasks:
+                del self.active_tasks[task_result.task_id]
+            self.task_contexts.pop(task_result.task_id, None)
+            self.task_overlays.pop(task_result.task_id, None)
+            self.task_groups.pop(task_result.task_id, None)
+            
+            # 已被同键新任务取代的结果直接丢弃
+            key = self.task_keys.pop(task_result.task_id, None)
+            superseded = key is not None and self.coalesce_latest.get(key) != task_result.task_id
+            if key is not None and not superseded:
+                del self.coalesce_latest[key]
+            if superseded:
+                callback = None
+                self.logger.info(f"丢弃过期结果: {task_result.task_id}")
+            
+            # 隐藏进度遮罩
+            if overlay:
+                overlay.hide()
+            
+            # 执行回调
+            if callback:
+                try:
+                    callback(task_result)
+                except Exception as e:
+                    self.logger.error(f"回调执行失败: {e}")
+            
+            self.logger.info(f"任务完成: {task_result.task_id}")
+            
+        except Exception as e:
+            self.logger.error(f"结果处理失败: {e}")
     
     def cancel_task(self, task_id: str) -> bool:
-        """取消任务"""
-        if task_id in self.active_tasks:
-            future = self.active_tasks[task_id]
-            success = future.cancel()
-            if success:
-                del self.active_tasks[task_id]
-                self.logger.info(f"任务已取消: {task_id}")
-            return success
-        return False
+        """取消任务：未开始的直接取消，已开始的通过任务上下文请求中止
+        
+        两种情况下回调都会收到 error 为 TaskCancelled 的结果。
+        """
+        future = self.active_tasks.get(task_id)
+        if future is None:
+            return False
+        
+        context = self.task_contexts.get(task_id)
+        if context:
+            context.cancel()
+        success = future.cancel() or (context is not None and not future.done())
+        if success:
+            self.logger.info(f"任务已取消: {task_id}")
+        return success
+    
+    def cancel_group(self, group: str) -> int:
+        """取消指定分组的全部任务，返回成功取消的数量"""
+        task_ids = [task_id for task_id, g in list(self.task_groups.items()) if g == group]
+        return sum(1 for task_id in task_ids if self.cancel_task(task_id))
     
     def get_active_task_count(self) -> int:
         """获取活动任务数量"""
         return len(self.active_tasks)
     
+    def get_pending_task_count(self) -> int:
+        """获取排队等待执行的任务数量"""
+        with self._queue_lock:
+            return sum(1 for heap in self._pending.values() for entry in heap if not entry[2].done())
+    
     def shutdown(self, wait: bool = True):
-        """关闭线程池"""
+        """关闭线程池（排队中的任务被取消）"""
+        with self._queue_lock:
+            self._is_shutdown = True
+            pending = [entry[2] for heap in self._pending.values() for entry in heap]
+            for heap in self._pending.values():
+                heap.clear()
+        for future in pending:
+            future.cancel()
+        
+        if self.root is not None and self._pump_id is not None:
+            try:
+                self.root.after_cancel(self._pump_id)
+            except tk.TclError:
+                pass
+        self.root = None
+        self._pump_id = None
         self.executor.shutdown(wait=wait)
+        if self.process_executor is not None:
+            self.process_executor.shutdown(wait=wait)
+            self.process_executor = None
+        if self._sync_manager is not None:
+            self._sync_manager.shutdown()
+            self._sync_manager = None
         self.logger.info("线程管理器已关闭")
 
 
 # 装饰器：自动异步执行
 def async_task(progress_message: str = "处理中...", 
-               show_progress: bool = True):
-    """装饰器：将函数标记为异步执行"""
+               show_progress: bool = True,
+               executor: str = "thread",
+               priority: int = PRIORITY_NORMAL):
+    """装饰器：将函数标记为异步执行（executor="process" 时在进程池中执行）
+    
+    调用时可传入 _callback、_progress_parent 和 _coalesce_key（合并键）。
+    """
     
     def decorator(func):
         @wraps(func)
@@ -247,14 +790,18 @@ def async_task(progress_message: str = "处理中...",
             # 从kwargs中提取特殊参数
             callback = kwargs.pop('_callback', None)
             progress_parent = kwargs.pop('_progress_parent', None) if show_progress else None
+            coalesce_key = kwargs.pop('_coalesce_key', None)
             
             # 获取全局线程管理器
             thread_manager = get_thread_manager()
             
             return thread_manager.submit_task(
-                func, callback, progress_parent, progress_message, *args, **kwargs
+                func, callback, progress_parent, progress_message, *args,
+                executor=executor, priority=priority, coalesce_key=coalesce_key, **kwargs
             )
         
+        wrapper._is_async_task = True
+        func._async_task_ref = (func.__module__, func.__qualname__)
         return wrapper
     return decorator
 
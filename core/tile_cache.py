@@ -0,0 +1,140 @@
+"""
+分块采样缓存 - 平移、缩放时复用已经算过的函数采样
+x轴按 2 的幂宽度切成区间块（每个缩放级别一套），每块独立自适应采样后缓存；
+视口变化时只计算新露出的块。按LRU淘汰，总内存不超过上限。
+"""
+
+import math
+import logging
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from core.adaptive_sampling import DEFAULT_CURVE_DEPTH, adaptive_sample
+from core.config_manager import config_manager
+
+
+class TileSampleCache:
+    """函数曲线的分块采样缓存
+
+    块宽为 2**level，level 由可见范围决定（视口内约 TILES_PER_VIEW~2*TILES_PER_VIEW 块），
+    第 k 块覆盖 [k * 2**level, (k + 1) * 2**level]，因此不同视口下的同级块可以直接复用。
+    缓存键为 (函数键, level, k)，函数键由调用方给出（如表达式字符串）。
+    """
+
+    TILES_PER_VIEW = 4
+    TILE_POINTS = 64
+    # 已缓存块的容差不超过当前所需容差的这么多倍时直接复用（y方向缩放不大时不必重算）
+    REUSE_SLACK = 2.0
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            settings = config_manager.get_performance_settings()
+            max_bytes = int(settings["plot_tile_cache_mb"] * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+        # (函数键, level, k) -> (x, y, 绝对容差)
+        self.tiles: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray, float]]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # 日志
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def sample(self,
+               key: Hashable,
+               func: Callable,
+               x_min: float,
+               x_max: float,
+               pixel_width: float,
+               pixel_height: float,
+               y_span: float) -> Tuple[np.ndarray, np.ndarray]:
+        """返回覆盖 [x_min, x_max] 的采样 (x, y)（按块对齐，两端可能略超出视口）"""
+        span = x_max - x_min
+        if not (span > 0 and math.isfinite(span)):
+            return np.array([]), np.array([])
+
+        level = math.floor(math.log2(span / self.TILES_PER_VIEW))
+        tile_width = 2.0 ** level
+        first = math.floor(x_min / tile_width)
+        last = math.floor(x_max / tile_width)
+
+        # 容差约为一个像素；最小宽度约为四分之一像素
+        y_span = abs(y_span)
+        threshold = y_span / max(pixel_height, 1.0)
+        tile_pixels = max(pixel_width, 1.0) * tile_width / span
+        min_dx = tile_width / (tile_pixels * 4)
+
+        xs: List[np.ndarray] = []
+        ys: List[np.ndarray] = []
+        for k in range(first, last + 1):
+            x, y = self._get_tile(key, func, level, k, tile_width, y_span, threshold, min_dx)
+            if xs and x.size and xs[-1].size and x[0] == xs[-1][-1]:
+                # 相邻块共享端点
+                x, y = x[1:], y[1:]
+            xs.append(x)
+            ys.append(y)
+
+        self._evict()
+        return np.concatenate(xs), np.concatenate(ys)
+
+    def sample_for_axes(self, key: Hashable, func: Callable, ax) -> Tuple[np.ndarray, np.ndarray]:
+        """按坐标轴当前视口取样"""
+        x_min, x_max = ax.get_xlim()
+        y_min, y_max = ax.get_ylim()
+        return self.sample(key, func, x_min, x_max, ax.bbox.width, ax.bbox.height, y_max - y_min)
+
+    def invalidate(self, key: Hashable = None):
+        """丢弃某个函数（缺省为全部）的缓存块"""
+        if key is None:
+            self.tiles.clear()
+            self.nbytes = 0
+            return
+        for tile_key in [tile_key for tile_key in self.tiles if tile_key[0] == key]:
+            x, y, _ = self.tiles.pop(tile_key)
+            self.nbytes -= x.nbytes + y.nbytes
+
+    def get_stats(self) -> dict:
+        """缓存统计"""
+        return {
+            "tiles": len(self.tiles),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _get_tile(self, key, func, level, k, tile_width, y_span, threshold, min_dx):
+        tile_key = (key, level, k)
+        cached = self.tiles.get(tile_key)
+        if cached is not None and cached[2] <= threshold * self.REUSE_SLACK:
+            self.tiles.move_to_end(tile_key)
+            self.hits += 1
+            return cached[0], cached[1]
+
+        self.misses += 1
+        x, y = adaptive_sample(func, k * tile_width, (k + 1) * tile_width,
+                               initial_points=self.TILE_POINTS,
+                               max_depth=DEFAULT_CURVE_DEPTH,
+                               tolerance=threshold / y_span if y_span else 1.0,
+                               y_span=y_span,
+                               min_dx=min_dx)
+        # 块端点恰好落在极点上时（如 1/x 在 0 处）得到 inf，统一按断点处理
+        y[np.isinf(y)] = np.nan
+        if cached is not None:
+            self.nbytes -= cached[0].nbytes + cached[1].nbytes
+        self.tiles[tile_key] = (x, y, threshold)
+        self.tiles.move_to_end(tile_key)
+        self.nbytes += x.nbytes + y.nbytes
+        return x, y
+
+    def _evict(self):
+        """超出内存上限时淘汰最久未用的块"""
+        while self.nbytes > self.max_bytes and len(self.tiles) > 1:
+            tile_key, (x, y, _) = self.tiles.popitem(last=False)
+            self.nbytes -= x.nbytes + y.nbytes
+            self.logger.debug(f"淘汰采样块: {tile_key}")
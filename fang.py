@@ -8,6 +8,8 @@ from matplotlib.figure import Figure
 import warnings
 from matplotlib import colors
 from knowledge import KnowledgeLearningClass
+from core.expression_engine import compile_expression
+from core.adaptive_sampling import DEFAULT_IMPLICIT_DEPTH, adaptive_sample, implicit_curve_segments
 
 # 配置 Matplotlib 以支持中文显示
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
@@ -34,6 +36,7 @@ class EquationVisualizationApp:
         self.x_range = tk.StringVar(value="-10,10")
         self.y_range = tk.StringVar(value="-10,10")
         self.resolution = tk.IntVar(value=500)
+        self.implicit_depth = tk.IntVar(value=DEFAULT_IMPLICIT_DEPTH)
         self.show_grid = tk.BooleanVar(value=True)
         self.show_legend = tk.BooleanVar(value=True)
         self.line_width = tk.DoubleVar(value=2.0)
@@ -141,6 +144,11 @@ class EquationVisualizationApp:
         resolution_scale = ttk.Scale(display_frame, from_=100, to=1000, variable=self.resolution, orient=tk.HORIZONTAL)
         resolution_scale.grid(row=2, column=1, sticky=tk.W+tk.E, pady=5)
         
+        # 隐式方程细化深度（只在曲线经过的单元加密）
+        ttk.Label(display_frame, text="隐式细化深度:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        depth_spinbox = ttk.Spinbox(display_frame, from_=0, to=8, textvariable=self.implicit_depth, width=5)
+        depth_spinbox.grid(row=6, column=1, sticky=tk.W, pady=5)
+        
         # 线宽设置
         ttk.Label(display_frame, text="线宽:").grid(row=3, column=0, sticky=tk.W, pady=5)
         line_width_scale = ttk.Scale(display_frame, from_=0.5, to=5.0, variable=self.line_width, orient=tk.HORIZONTAL)
@@ -390,20 +398,12 @@ class EquationVisualizationApp:
         """绘制显式方程 y = f(x)"""
         try:
             x_min, x_max = map(float, self.x_range.get().split(','))
+            y_min, y_max = map(float, self.y_range.get().split(','))
             resolution = self.resolution.get()
             
-            # 创建x值数组
-            x = np.linspace(x_min, x_max, resolution)
-            
-            # 计算y值
-            y = np.zeros_like(x)
-            for i, xi in enumerate(x):
-                try:
-                    y[i] = eval(equation, {"__builtins__": {}}, 
-                              {"x": xi, "sin": np.sin, "cos": np.cos, "tan": np.tan, 
-                               "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "pi": np.pi})
-                except:
-                    y[i] = np.nan
+            # 自适应采样：分辨率作为初始点数，弯曲处加密，极点处断开（定义域外为NaN）
+            x, y = adaptive_sample(compile_expression(equation, ("x",)), x_min, x_max,
+                                   initial_points=resolution, y_span=y_max - y_min)
             
             # 绘制曲线
             line, = self.ax.plot(x, y, color=color, linewidth=self.line_width.get(), 
@@ -421,26 +421,17 @@ class EquationVisualizationApp:
             x_min, x_max = map(float, self.x_range.get().split(','))
             y_min, y_max = map(float, self.y_range.get().split(','))
             resolution = self.resolution.get()
+            depth = max(0, self.implicit_depth.get())
             
-            # 创建网格
-            x = np.linspace(x_min, x_max, resolution)
-            y = np.linspace(y_min, y_max, resolution)
-            X, Y = np.meshgrid(x, y)
-            
-            # 计算函数值
-            Z = np.zeros_like(X)
-            for i in range(X.shape[0]):
-                for j in range(X.shape[1]):
-                    try:
-                        Z[i, j] = eval(equation, {"__builtins__": {}}, 
-                                     {"x": X[i, j], "y": Y[i, j], "sin": np.sin, "cos": np.cos, 
-                                      "tan": np.tan, "exp": np.exp, "log": np.log, 
-                                      "sqrt": np.sqrt, "pi": np.pi})
-                    except:
-                        Z[i, j] = np.nan
-            
-            # 绘制等高线
-            contour = self.ax.contour(X, Y, Z, [0], colors=[color], linewidths=self.line_width.get())
+            # 粗网格整体求值，只在变号的单元逐层细分；最细一层约为分辨率的 2**depth / 4 倍
+            func = compile_expression(equation, ("x", "y"))
+            segments = implicit_curve_segments(func, (x_min, x_max), (y_min, y_max),
+                                               base_resolution=max(resolution // 4, 16),
+                                               max_depth=depth)
+            
+            # 绘制曲线段
+            from matplotlib.collections import LineCollection
+            self.ax.add_collection(LineCollection(segments, colors=[color], linewidths=self.line_width.get()))
             
             # 添加到图例 - 安全地访问 collections
             # 创建一个代理艺术家对象用于图例
@@ -474,20 +465,8 @@ class EquationVisualizationApp:
             t = np.linspace(t_min, t_max, resolution)
             
             # 计算x和y值
-            x = np.zeros_like(t)
-            y = np.zeros_like(t)
-            
-            for i, ti in enumerate(t):
-                try:
-                    x[i] = eval(x_expr, {"__builtins__": {}}, 
-                              {"t": ti, "sin": np.sin, "cos": np.cos, "tan": np.tan, 
-                               "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "pi": np.pi})
-                    y[i] = eval(y_expr, {"__builtins__": {}}, 
-                              {"t": ti, "sin": np.sin, "cos": np.cos, "tan": np.tan, 
-                               "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "pi": np.pi})
-                except:
-                    x[i] = np.nan
-                    y[i] = np.nan
+            x = compile_expression(x_expr, ("t",))(t)
+            y = compile_expression(y_expr, ("t",))(t)
             
             # 绘制曲线
             line, = self.ax.plot(x, y, color=color, linewidth=self.line_width.get(), 
@@ -508,14 +487,7 @@ class EquationVisualizationApp:
             theta = np.linspace(0, 2*np.pi, resolution)
             
             # 计算半径值
-            r = np.zeros_like(theta)
-            for i, th in enumerate(theta):
-                try:
-                    r[i] = eval(equation, {"__builtins__": {}}, 
-                              {"theta": th, "sin": np.sin, "cos": np.cos, "tan": np.tan, 
-                               "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "pi": np.pi})
-                except:
-                    r[i] = np.nan
+            r = compile_expression(equation, ("theta",))(theta)
             
             # 转换为笛卡尔坐标
             x = r * np.cos(theta)
@@ -687,7 +659,21 @@ class EquationVisualizationApp:
             return
         
         index = selection[0]
-        equation_type, equation, _ = self.equations[index]
+        equation_type, equation = self.equations[index]
+        
+        # 动画各帧复用同一个编译结果
+        try:
+            if equation_type == "显式方程":
+                f_y = compile_expression(equation, ("x", "t"))
+            elif equation_type == "参数方程":
+                parts = equation.split(',')
+                f_x = compile_expression(parts[0].strip(), ("t", "phase"))
+                f_y = compile_expression(parts[1].strip(), ("t", "phase"))
+            elif equation_type == "极坐标方程":
+                f_r = compile_expression(equation, ("theta",))
+        except (ValueError, IndexError) as e:
+            messagebox.showerror("输入错误", f"无法解析方程: {str(e)}")
+            return
         
         # 创建动画窗口
         anim_window = tk.Toplevel(self.root)
@@ -720,12 +706,7 @@ class EquationVisualizationApp:
                 try:
                     # 添加时间变量t
                     t = i / 50.0  # 动画参数
-                    y = np.zeros_like(x)
-                    for j, xj in enumerate(x):
-                        y[j] = eval(equation, {"__builtins__": {}}, 
-                                  {"x": xj, "t": t, "sin": np.sin, "cos": np.cos, 
-                                   "tan": np.tan, "exp": np.exp, "log": np.log, 
-                                   "sqrt": np.sqrt, "pi": np.pi})
+                    y = f_y(x, t)
                     ax.plot(x, y, 'b-', linewidth=2)
                     ax.set_title(f"y = {equation} (t = {t:.2f})")
                 except:
@@ -734,8 +715,6 @@ class EquationVisualizationApp:
             elif equation_type == "参数方程":
                 try:
                     parts = equation.split(',')
-                    x_expr = parts[0].strip()
-                    y_expr = parts[1].strip()
                     t_min = float(parts[2].strip())
                     t_max = float(parts[3].strip())
                     
@@ -743,18 +722,8 @@ class EquationVisualizationApp:
                     phase = i / 50.0 * 2 * np.pi  # 动画相位
                     
                     t = np.linspace(t_min, t_max, self.resolution.get())
-                    x = np.zeros_like(t)
-                    y = np.zeros_like(t)
-                    
-                    for j, tj in enumerate(t):
-                        x[j] = eval(x_expr, {"__builtins__": {}}, 
-                                  {"t": tj, "phase": phase, "sin": np.sin, "cos": np.cos, 
-                                   "tan": np.tan, "exp": np.exp, "log": np.log, 
-                                   "sqrt": np.sqrt, "pi": np.pi})
-                        y[j] = eval(y_expr, {"__builtins__": {}}, 
-                                  {"t": tj, "phase": phase, "sin": np.sin, "cos": np.cos, 
-                                   "tan": np.tan, "exp": np.exp, "log": np.log, 
-                                   "sqrt": np.sqrt, "pi": np.pi})
+                    x = f_x(t, phase)
+                    y = f_y(t, phase)
                     
                     ax.plot(x, y, 'g-', linewidth=2)
                     ax.set_title(f"参数方程 (phase = {phase:.2f})")
@@ -767,13 +736,7 @@ class EquationVisualizationApp:
                     scale = 1.0 + 0.5 * np.sin(i / 25.0)  # 动态缩放
                     
                     theta = np.linspace(0, 2*np.pi, self.resolution.get())
-                    r = np.zeros_like(theta)
-                    
-                    for j, th in enumerate(theta):
-                        r[j] = scale * eval(equation, {"__builtins__": {}}, 
-                                          {"theta": th, "sin": np.sin, "cos": np.cos, 
-                                           "tan": np.tan, "exp": np.exp, "log": np.log, 
-                                           "sqrt": np.sqrt, "pi": np.pi})
+                    r = scale * f_r(theta)
                     
                     x = r * np.cos(theta)
                     y = r * np.sin(theta)
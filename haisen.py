@@ -4,12 +4,14 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
 import matplotlib.pyplot as plt
 from matplotlib.font_manager import FontProperties
 from matplotlib.colors import LinearSegmentedColormap
+import math
+import time
 import warnings
 from knowledge import KnowledgeLearningClass
+from core.symbolic_cache import symbolic_cache
 
 # Suppress specific warnings if needed (e.g., from SymPy)
 warnings.filterwarnings("ignore", category=UserWarning, module='sympy')
@@ -19,6 +21,94 @@ plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False  # Ensure minus sign displays correctly
 
 
+# Hessian点分类标记
+CONVEX, CONCAVE, SADDLE = 1, -1, 0
+INVALID = -2
+EIGEN_TOL = 1e-9
+
+
+def hessian_grid_function(func_str):
+    """返回在整个网格上计算Hessian三个分量 (fxx, fxy, fyy) 的函数
+
+    各分量单独lambdify（经符号缓存复用），常数分量（如二次函数）广播为与网格同形的数组。
+    """
+    funcs = symbolic_cache.hessian_functions(func_str, ('x', 'y'))
+
+    def evaluate(X, Y):
+        X, Y = np.asarray(X, dtype=float), np.asarray(Y, dtype=float)
+        shape = np.broadcast(X, Y).shape
+        result = []
+        with np.errstate(all='ignore'):
+            for func in funcs:
+                value = np.real(np.asarray(func(X, Y))).astype(float)
+                result.append(np.broadcast_to(value, shape))
+        return tuple(result)
+
+    return evaluate
+
+
+def classify_hessian(fxx, fxy, fyy, tol=EIGEN_TOL):
+    """按2×2对称矩阵的闭式特征值对每个点分类
+
+    λ = (fxx + fyy)/2 ∓ sqrt(((fxx - fyy)/2)² + fxy²)，根号内恒非负，特征值总是实数。
+    返回 (类别数组, 较小特征值, 较大特征值)；类别为 CONVEX / CONCAVE / SADDLE，
+    任一分量非有限的点为 INVALID。与原逻辑一致，含零特征值的退化点归为鞍点。
+    """
+    with np.errstate(all='ignore'):
+        mean = (fxx + fyy) / 2
+        radius = np.hypot((fxx - fyy) / 2, fxy)
+        lambda_min = mean - radius
+        lambda_max = mean + radius
+
+    labels = np.full(np.shape(lambda_min), SADDLE, dtype=np.int8)
+    labels[lambda_min > tol] = CONVEX
+    labels[lambda_max < -tol] = CONCAVE
+    labels[~(np.isfinite(fxx) & np.isfinite(fxy) & np.isfinite(fyy))] = INVALID
+    return labels, lambda_min, lambda_max
+
+
+# 细节层次（LOD）：旋转/缩放拖动时显示抽稀曲面，松开后停顿这么久再换回完整曲面
+LOD_SETTLE_MS = 300
+LOD_MIN_GRID = 10
+LOD_DEFAULT_GRID = 25
+
+# 帧时间预算（秒）：静止时完整曲面一帧、交互时抽稀曲面一帧的目标耗时
+FULL_FRAME_BUDGET = 0.3
+INTERACTIVE_FRAME_BUDGET = 0.05
+
+
+class FrameBudget:
+    """按实测帧时间估计每个曲面网格面片的绘制耗时，反推满足预算的网格边长
+
+    mplot3d 的绘制耗时大致与面片数 (n-1)² 成正比，因此 n ≈ sqrt(预算 / 单面片耗时) + 1。
+    单面片耗时做指数平滑，避免偶发的慢帧让分辨率来回跳动。
+    """
+
+    SMOOTHING = 0.5
+
+    def __init__(self):
+        self.cost_per_quad = None
+
+    def record(self, quads, seconds):
+        """记录一次绘制：面片数与耗时（秒）"""
+        if quads <= 0 or not seconds > 0:
+            return
+        cost = seconds / quads
+        if self.cost_per_quad is None:
+            self.cost_per_quad = cost
+        else:
+            self.cost_per_quad += self.SMOOTHING * (cost - self.cost_per_quad)
+
+    def grid_size(self, budget, lower, upper, default):
+        """预算内的网格边长，限制在 [lower, upper]；尚无测量时返回 default"""
+        if self.cost_per_quad is None:
+            size = default
+        else:
+            size = int(math.sqrt(budget / self.cost_per_quad)) + 1
+        return int(min(max(size, lower), upper))
+
+
+
 class HessianApp:
     def __init__(self, root):
         self.root = root
@@ -56,6 +146,16 @@ class HessianApp:
         self.z_min = tk.DoubleVar(value=-4)
         self.z_max = tk.DoubleVar(value=4)
         self._limits_set = False # Flag to track if limits have been set initially
+        self.auto_resolution = tk.BooleanVar(value=False)  # 按帧时间预算自动选择分辨率
+        
+        # 细节层次（LOD）与帧时间预算状态
+        self.frame_budget = FrameBudget()
+        self._lod_surfaces = None  # (完整曲面, 抽稀曲面)
+        self._surface_quads = 0
+        self._lod_pressed = False
+        self._lod_dragged = False
+        self._lod_restore_id = None
+        self._event_cids = []
         
         # --- Style Configuration ---
         self.style = ttk.Style()
@@ -91,7 +191,6 @@ class HessianApp:
         self.mouse_pressed = False
         self.last_x = None
         self.last_y = None
-        self._event_cids = []
         self.current_surf = None  # 存储当前曲面对象
 
         self.knowledge_learner = KnowledgeLearningClass()
@@ -154,6 +253,8 @@ class HessianApp:
         resolution_scale = ttk.Scale(range_frame, from_=20, to=100, variable=self.resolution, 
                                     orient=tk.HORIZONTAL)
         resolution_scale.grid(row=1, column=1, columnspan=3, sticky=tk.EW, padx=5, pady=5)
+        ttk.Checkbutton(range_frame, text="按帧时间自动选择分辨率", variable=self.auto_resolution).grid(
+            row=2, column=0, columnspan=4, sticky=tk.W)
         
         # Z轴范围设置
         z_range_frame = ttk.LabelFrame(func_frame, text="Z轴范围")
@@ -254,6 +355,7 @@ class HessianApp:
         self.alpha.set(0.8)
         self.point_size.set(40)
         self.point_density.set(15)
+        self.auto_resolution.set(False)
         self.z_auto_scale.set(True)
         self.z_min.set(-4)
         self.z_max.set(4)
@@ -299,8 +401,8 @@ class HessianApp:
             if view_state:
                 self.ax.view_init(elev=view_state[0], azim=view_state[1])
             
-            # 更新画布
-            self.canvas.draw_idle()
+            # 更新画布（同步绘制一次并记录帧时间）
+            self._timed_draw()
             
         except Exception as e:
             messagebox.showerror("绘图错误", f"绘图时发生错误: {str(e)}")
@@ -366,19 +468,17 @@ class HessianApp:
                 x_min, x_max = -2, 2
                 y_min, y_max = -2, 2
             
-            # 解析函数并绘制
-            x, y = sp.symbols('x y')
-            expr = parse_expr(func_str, transformations=(standard_transformations + (implicit_multiplication_application,)))
+            # 解析函数并绘制（解析、求导与编译结果均经符号缓存复用）
+            expr = symbolic_cache.parse(func_str, ('x', 'y'))
             
             # 创建数值函数
-            f = sp.lambdify((x, y), expr, modules=['numpy', {'log': np.log, 'sqrt': np.sqrt, 'exp': np.exp}])
+            f = symbolic_cache.function(func_str, ('x', 'y'))
             
-            # 计算Hessian矩阵
-            hessian_matrix = sp.hessian(expr, (x, y))
-            hessian_func = sp.lambdify((x, y), hessian_matrix, modules=['numpy'])
+            # 计算Hessian矩阵（各分量整网格求值）
+            hessian_func = hessian_grid_function(func_str)
             
             # 创建网格数据
-            resolution = self.resolution.get()
+            resolution = self._pick_resolution()
             x_vals = np.linspace(x_min, x_max, resolution)
             y_vals = np.linspace(y_min, y_max, resolution)
             X, Y = np.meshgrid(x_vals, y_vals)
@@ -395,8 +495,8 @@ class HessianApp:
             
             # 绘制曲面
             alpha = self.alpha.get()
-            surf = self.ax.plot_surface(X, Y, Z, cmap=cmap, alpha=alpha, 
-                                      edgecolor='none', antialiased=True)
+            surf = self._plot_surface_lod(X, Y, Z, cmap=cmap, alpha=alpha, 
+                                          edgecolor='none', antialiased=True)
             
             # 存储当前曲面对象
             self.current_surf = surf
@@ -415,43 +515,9 @@ class HessianApp:
             
             # 绘制Hessian特征点
             if self.show_hessian_points.get():
-                point_size = self.point_size.get()
-                step = max(1, self.point_density.get())  # 直接使用密度值作为步长
-                
-                convex_count, concave_count, saddle_count = 0, 0, 0
-                
-                for i in range(0, resolution, step):
-                    for j in range(0, resolution, step):
-                        try:
-                            x_val, y_val = X[j, i], Y[j, i]
-                            z_val = Z[j, i]
-                            
-                            # 跳过NaN值
-                            if not np.isfinite(z_val):
-                                continue
-                                
-                            hess = hessian_func(x_val, y_val)
-                            if not np.all(np.isfinite(hess)):
-                                continue
-                                
-                            eigenvalues = np.linalg.eigvals(hess)
-                            eigenvalues = np.real(eigenvalues)  # 确保特征值是实数
-                            
-                            # 确定点类型
-                            if all(eigenvalues > 1e-9):
-                                color, convex_count = 'g', convex_count + 1  # 凸点
-                            elif all(eigenvalues < -1e-9):
-                                color, concave_count = 'r', concave_count + 1  # 凹点
-                            else:
-                                color, saddle_count = 'b', saddle_count + 1  # 鞍点
-                                
-                            self.ax.scatter(x_val, y_val, z_val, color=color, s=point_size,
-                                          edgecolor='k', linewidth=0.5, alpha=0.9)
-                        except Exception:
-                            pass  # 忽略单个点的错误
-                            
-                # 存储点统计
-                self._hessian_point_counts = (convex_count, concave_count, saddle_count)
+                labels, _, _ = classify_hessian(*hessian_func(X, Y))
+                labels[~np.isfinite(Z)] = INVALID
+                self._hessian_point_counts = self._draw_hessian_points(X, Y, Z, labels)
             
             # 绘制等高线
             if self.show_contour.get():
@@ -521,17 +587,9 @@ class HessianApp:
             # --- 确保 expr 是字符串 ---
             expr_str_info = str(expr)
 
-            x, y = sp.symbols('x y')
-            local_dict = {'x': x, 'y': y, 'sin': sp.sin, 'cos': sp.cos, 'exp': sp.exp, 'log': sp.log, 'sqrt': sp.sqrt, 'pi': sp.pi}
-            transformations = standard_transformations + (implicit_multiplication_application,)
-            parsed_expr = parse_expr(expr_str_info, local_dict=local_dict, transformations=transformations) # Parse the string
-
-            # Calculate derivatives
-            df_dx = sp.diff(parsed_expr, x)
-            df_dy = sp.diff(parsed_expr, y)
-            d2f_dx2 = sp.diff(df_dx, x)
-            d2f_dy2 = sp.diff(df_dy, y)
-            d2f_dxdy = sp.diff(df_dx, y)
+            # Derivatives come from the shared symbolic cache
+            df_dx, df_dy = symbolic_cache.gradient(expr_str_info, ('x', 'y'))
+            (d2f_dx2, d2f_dxdy), (_, d2f_dy2) = symbolic_cache.hessian(expr_str_info, ('x', 'y'))
 
             # --- Displaying the information ---
             self.info_text.insert(tk.END, "函数: ", ("bold",))
@@ -575,20 +633,13 @@ class HessianApp:
             # --- 关键修复：确保在解析前将expr转换为字符串 ---
             expr_str = str(expr)
 
-            x, y = sp.symbols('x y')
-            local_dict = {'x': x, 'y': y, 'sin': sp.sin, 'cos': sp.cos, 'exp': sp.exp, 'log': sp.log, 'sqrt': sp.sqrt, 'pi': sp.pi}
-            transformations = standard_transformations + (implicit_multiplication_application,)
-            # --- 使用转换后的字符串进行解析 ---
-            parsed_expr = parse_expr(expr_str, local_dict=local_dict, transformations=transformations)
-
-            # 创建数值函数
-            f = sp.lambdify((x, y), parsed_expr, modules=['numpy', {'log': np.log, 'sqrt': np.sqrt, 'exp': np.exp}])
-            # 计算Hessian矩阵
-            hessian_matrix = sp.hessian(parsed_expr, (x, y))
-            hessian_func = sp.lambdify((x, y), hessian_matrix, modules=['numpy'])
+            # --- 使用转换后的字符串解析并编译（经符号缓存复用，重绘时不再重复计算）---
+            f = symbolic_cache.function(expr_str, ('x', 'y'))
+            # 计算Hessian矩阵（各分量整网格求值）
+            hessian_func = hessian_grid_function(expr_str)
 
             # 创建网格数据
-            resolution = self.resolution.get()
+            resolution = self._pick_resolution()
             x_vals = np.linspace(x_min, x_max, resolution)
             y_vals = np.linspace(y_min, y_max, resolution)
             X, Y = np.meshgrid(x_vals, y_vals)
@@ -682,10 +733,10 @@ class HessianApp:
             # --- Plot Surface ---
             if valid_z_exists:
                  try:
-                     self.surf = self.ax.plot_surface(X, Y, Z, cmap=cmap, alpha=self.alpha.get(),
-                                                edgecolor='none', rstride=1, cstride=1,
-                                                vmin=final_zlim[0], vmax=final_zlim[1],
-                                                linewidth=0, antialiased=True)
+                     self.surf = self._plot_surface_lod(X, Y, Z, cmap=cmap, alpha=self.alpha.get(),
+                                                        edgecolor='none',
+                                                        vmin=final_zlim[0], vmax=final_zlim[1],
+                                                        linewidth=0, antialiased=True)
                  except Exception as e:
                      print(f"Error plotting surface: {e}")
                      messagebox.showerror("绘图错误", f"绘制曲面时出错: {e}")
@@ -722,40 +773,12 @@ class HessianApp:
             # ... (Hessian点绘制逻辑不变, 包括计数器重置和存储) ...
             self._hessian_point_counts = (0, 0, 0)
             if self.show_hessian_points.get():
-                point_size = self.point_size.get()
-                step = max(1, self.point_density.get())  # 直接使用密度值作为步长
-                convex_count, concave_count, saddle_count = 0, 0, 0
-
-                # Iterate using steps based on density
-                for i in range(0, resolution, step):
-                    for j in range(0, resolution, step):
-                        try:
-                            x_val, y_val = X[j, i], Y[j, i]
-                            z_val = Z[j, i] # Use already calculated Z
-
-                            # Skip if Z is NaN or outside current Z limits
-                            if not np.isfinite(z_val) or z_val < final_zlim[0] or z_val > final_zlim[1]:
-                                continue
-
-                            hess = hessian_func(x_val, y_val)
-                            if not np.all(np.isfinite(hess)): continue
-
-                            eigenvalues = np.linalg.eigvals(hess)
-                            # Ensure eigenvalues are real (Hessian should be symmetric)
-                            eigenvalues = np.real(eigenvalues)
-
-                            # Determine point type
-                            if all(eigenvalues > 1e-9): color, convex_count = 'g', convex_count + 1
-                            elif all(eigenvalues < -1e-9): color, concave_count = 'r', concave_count + 1
-                            else: color, saddle_count = 'b', saddle_count + 1 # Corrected indentation
-
-                            self.ax.scatter(x_val, y_val, z_val, color=color, s=point_size,
-                                           edgecolor='k', linewidth=0.5, alpha=0.9, depthshade=True)
-                        except Exception:
-                            # print(f"Error calculating/plotting point at ({i},{j}): {e}") # Optional debug
-                            pass # Ignore errors for individual points
-                # Store counts
-                self._hessian_point_counts = (convex_count, concave_count, saddle_count)
+                labels, _, _ = classify_hessian(*hessian_func(X, Y))
+                # Skip points where Z is NaN or outside current Z limits
+                with np.errstate(invalid='ignore'):
+                    outside = ~((Z >= final_zlim[0]) & (Z <= final_zlim[1]))
+                labels[outside] = INVALID
+                self._hessian_point_counts = self._draw_hessian_points(X, Y, Z, labels, depthshade=True)
             else:
                  # Clear counts if points are not shown
                  if hasattr(self, '_hessian_point_counts'):
@@ -786,6 +809,24 @@ class HessianApp:
             traceback.print_exc() # 打印详细错误信息到控制台
 
 
+    def _draw_hessian_points(self, X, Y, Z, labels, **scatter_kwargs):
+        """绘制分类后的Hessian特征点，返回 (凸点数, 凹点数, 鞍点数)
+
+        统计覆盖整个网格；散点仍按点密度抽稀显示，每类只调用一次scatter。
+        """
+        counts = tuple(int(np.count_nonzero(labels == kind)) for kind in (CONVEX, CONCAVE, SADDLE))
+
+        step = max(1, self.point_density.get())  # 直接使用密度值作为步长
+        shown = (slice(None, None, step), slice(None, None, step))
+        point_size = self.point_size.get()
+        for kind, color in ((CONVEX, 'g'), (CONCAVE, 'r'), (SADDLE, 'b')):
+            mask = labels[shown] == kind
+            if not mask.any():
+                continue
+            self.ax.scatter(X[shown][mask], Y[shown][mask], Z[shown][mask], color=color, s=point_size,
+                            edgecolor='k', linewidth=0.5, alpha=0.9, **scatter_kwargs)
+        return counts
+
     def _bind_mouse_events(self):
         """绑定鼠标事件处理函数"""
         # 先清除旧的事件绑定
@@ -800,13 +841,98 @@ class HessianApp:
         # 使用内置的旋转函数
         self.ax.mouse_init()
         
-        # 只绑定点击事件用于显示信息
+        # 点击事件用于显示信息，其余事件用于交互时切换细节层次
         try:
-            cid = self.canvas.mpl_connect('button_press_event', self.on_click)
-            self._event_cids.append(cid)
+            for event_name, handler in (('button_press_event', self.on_click),
+                                        ('button_press_event', self._on_lod_press),
+                                        ('motion_notify_event', self._on_lod_motion),
+                                        ('button_release_event', self._on_lod_release)):
+                self._event_cids.append(self.canvas.mpl_connect(event_name, handler))
         except Exception as e:
             print(f"绑定鼠标事件时出错: {e}")
     
+    def _pick_resolution(self):
+        """网格分辨率：开启自动分辨率时按实测帧时间选取，并同步到滑块"""
+        resolution = int(self.resolution.get())
+        if self.auto_resolution.get():
+            resolution = self.frame_budget.grid_size(FULL_FRAME_BUDGET, 20, 100, default=resolution)
+            self.resolution.set(resolution)
+        return resolution
+    
+    def _plot_surface_lod(self, X, Y, Z, **kwargs):
+        """绘制完整分辨率曲面，同时生成交互时使用的抽稀曲面（初始隐藏）"""
+        self._cancel_full_detail()
+        full = self.ax.plot_surface(X, Y, Z, rstride=1, cstride=1, **kwargs)
+        
+        rows, cols = Z.shape
+        self._surface_quads = (rows - 1) * (cols - 1)
+        lod = self.frame_budget.grid_size(INTERACTIVE_FRAME_BUDGET, LOD_MIN_GRID, min(rows, cols),
+                                          default=LOD_DEFAULT_GRID)
+        coarse = None
+        if lod < min(rows, cols):
+            # 颜色范围与完整曲面保持一致
+            full.autoscale_None()
+            coarse_kwargs = dict(kwargs, vmin=full.norm.vmin, vmax=full.norm.vmax)
+            coarse = self.ax.plot_surface(X, Y, Z, rcount=lod, ccount=lod, **coarse_kwargs)
+            coarse.set_visible(False)
+        self._lod_surfaces = (full, coarse)
+        return full
+    
+    def _set_surface_detail(self, coarse):
+        """切换显示抽稀曲面或完整曲面；返回是否真的发生了切换"""
+        if not self._lod_surfaces or self._lod_surfaces[1] is None:
+            return False
+        full, lod = self._lod_surfaces
+        if lod.get_visible() == coarse:
+            return False
+        lod.set_visible(coarse)
+        full.set_visible(not coarse)
+        return True
+    
+    def _timed_draw(self):
+        """同步重绘并把完整曲面的帧时间计入预算"""
+        start = time.perf_counter()
+        self.canvas.draw()
+        if self._surface_quads:
+            self.frame_budget.record(self._surface_quads, time.perf_counter() - start)
+    
+    def _cancel_full_detail(self):
+        if self._lod_restore_id is not None:
+            try:
+                self.root.after_cancel(self._lod_restore_id)
+            except tk.TclError:
+                pass
+            self._lod_restore_id = None
+    
+    def _restore_full_detail(self):
+        """交互停止后换回完整曲面"""
+        self._lod_restore_id = None
+        if self._set_surface_detail(coarse=False):
+            self._timed_draw()
+    
+    def _on_lod_press(self, event):
+        """鼠标按下（mplot3d 的旋转/平移/缩放键）时先换成抽稀曲面"""
+        if event.inaxes != self.ax or event.button not in (1, 2, 3):
+            return
+        self._cancel_full_detail()
+        self._lod_pressed = True
+        self._lod_dragged = False
+        self._set_surface_detail(coarse=True)
+    
+    def _on_lod_motion(self, event):
+        if self._lod_pressed:
+            self._lod_dragged = True
+    
+    def _on_lod_release(self, event):
+        """松开鼠标：拖动过则停顿片刻后换回完整曲面，单纯点击则直接换回（无需重绘）"""
+        if not self._lod_pressed:
+            return
+        self._lod_pressed = False
+        if self._lod_dragged:
+            self._lod_restore_id = self.root.after(LOD_SETTLE_MS, self._restore_full_detail)
+        else:
+            self._set_surface_detail(coarse=False)
+    
     def on_click(self, event):
         """处理鼠标点击事件，显示点信息"""
         if event.inaxes == self.ax and event.button == 3:  # 右键点击
@@ -818,29 +944,27 @@ class HessianApp:
                     if not func_str:
                         return
                         
-                    # 计算Z值
-                    x_sym, y_sym = sp.symbols('x y')
-                    expr = parse_expr(func_str, transformations=(standard_transformations + (implicit_multiplication_application,)))
-                    f = sp.lambdify((x_sym, y_sym), expr, modules=['numpy'])
+                    # 计算Z值（解析、求导与编译结果经符号缓存复用）
+                    f = symbolic_cache.function(func_str, ('x', 'y'))
                     z = f(x, y)
                     
                     # 计算Hessian信息
-                    hessian = sp.hessian(expr, (x_sym, y_sym))
-                    hessian_func = sp.lambdify((x_sym, y_sym), hessian, modules=['numpy'])
+                    hessian_func = hessian_grid_function(func_str)
                     
                     try:
-                        hess_matrix = hessian_func(x, y)
-                        eigenvalues = np.linalg.eigvals(hess_matrix)
-                        eigenvalues = np.real(eigenvalues)
+                        label, lambda_min, lambda_max = classify_hessian(*hessian_func(x, y))
+                        label = int(label)
+                        if label == INVALID:
+                            raise ValueError("Hessian矩阵在该点无定义")
                         
-                        if all(eigenvalues > 1e-9):
+                        if label == CONVEX:
                             point_type = "凸点 (所有特征值 > 0)"
-                        elif all(eigenvalues < -1e-9):
+                        elif label == CONCAVE:
                             point_type = "凹点 (所有特征值 < 0)"
                         else:
                             point_type = "鞍点 (特征值有正有负)"
                             
-                        hessian_info = f"\n特征值: [{eigenvalues[0]:.4f}, {eigenvalues[1]:.4f}]\n类型: {point_type}"
+                        hessian_info = f"\n特征值: [{float(lambda_min):.4f}, {float(lambda_max):.4f}]\n类型: {point_type}"
                     except:
                         hessian_info = "\n无法计算Hessian信息"
                     
@@ -1,9 +1,16 @@
+import sys
+
+# 启动性能分析（--profile-startup），须在其他导入之前启用
+from core.startup_profiler import startup_profiler, get_profile_path
+_profile_path = get_profile_path()
+if _profile_path:
+    startup_profiler.start(_profile_path)
+
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import os
 from tkinter import messagebox
-import sys
 
 # Pillow 兼容性补丁
 try:
@@ -20,88 +27,16 @@ try:
 except AttributeError:
     RESAMPLE = Image.Resampling.LANCZOS  # type: ignore
 
-# 预先导入高等数学可视化模块
-try:
-    from kehe import KeheApp  # 直接导入KeheApp，而不是EquationVisualizationApp
-    print("DEBUG: 成功导入 KeheApp")
-except ImportError as e:
-    print(f"DEBUG: 无法导入 KeheApp: {e}")
-    KeheApp = None
-
-try:
-    from weifen import DirectionFieldApp  
-    print("DEBUG: 成功导入 DirectionFieldApp")
-except ImportError as e:
-    print(f"DEBUG: 无法导入 DirectionFieldApp: {e}")
-    DirectionFieldApp = None
-
-try:
-    from haisen import HessianApp
-    print("DEBUG: 成功导入 HessianApp")
-except ImportError as e:
-    print(f"DEBUG: 无法导入 HessianApp: {e}")
-    HessianApp = None
-
-try:
-    from fang import EquationVisualizationApp as FangApp
-    print("DEBUG: 成功导入 FangApp")
-except ImportError as e:
-    print(f"DEBUG: 无法导入 FangApp: {e}")
-    FangApp = None
-
 # 导入自定义主题和组件
 from themes.futuristic_theme import COLORS, FONTS
 from components.buttons import FuturisticButton
 from components.cards import InteractiveCard
 from effects.animations import ParticleSystem
 
-# 导入各个功能模块
-from gailvlunn import ProbabilityApp
-from juzhenduibi import MatrixComparisonApp
-from tezheng import EigenvalueApp
-from zhuanzhi import MatrixAnimationApp
-from jibianhuan import MatrixTransformationApp
-from gaosixiaoyuan import GaussianEliminationApp
-from guodujuzhen import MatrixTransitionApp
-import jisuan
-# jisuan已经导入
-from ai import DataAnalyzerGUI  # 导入AI数据分析模块
-
-try:
-    from fenxi import AnalysisApp # Assuming fenxi.py has AnalysisApp
-except ImportError:
-    print("Warning: Could not import AnalysisApp from fenxi.py")
-    AnalysisApp = None
-try:
-    from game import GamePuzzleApp as GameApp  # 正确导入类名并设置别名
-except ImportError:
-    print("Warning: Could not import GamePuzzleApp from game.py")
-    GameApp = None
-try:
-    from mengka import MonteCarloApp # Assuming mengka.py has MonteCarloApp
-except ImportError:
-    print("Warning: Could not import MonteCarloApp from mengka.py")
-    MonteCarloApp = None
-try:
-    from suiji import RandomVariableApp # From suiji.py
-except ImportError:
-    print("Warning: Could not import RandomVariableApp from suiji.py")
-    RandomVariableApp = None
-try:
-    from suijiguocheng import StochasticProcessApp # Assuming suijiguocheng.py has StochasticProcessApp
-except ImportError:
-    print("Warning: Could not import StochasticProcessApp from suijiguocheng.py")
-    StochasticProcessApp = None
-try:
-    from tuiduan import HypothesisTestingApp # Assuming tuiduan.py has HypothesisTestingApp
-except ImportError:
-    print("Warning: Could not import HypothesisTestingApp from tuiduan.py")
-    HypothesisTestingApp = None
-try:
-    from zhixin import ConfidenceIntervalApp # From zhixin.py
-except ImportError:
-    print("Warning: Could not import ConfidenceIntervalApp from zhixin.py")
-    ConfidenceIntervalApp = None
+# 各个功能模块通过注册表按需导入，首次打开时才加载科学计算依赖
+from core.module_registry import module_registry
+from core.prewarm_scheduler import PrewarmScheduler
+from core.thread_manager import get_thread_manager, shutdown_thread_manager
 # --- End Imports ---
 
 # --- Helper function to find resources ---
@@ -235,12 +170,15 @@ def open_app_window(parent, app_class, title, geometry="1200x800"):
     
     return window
 
-try:
-    from shulie import SequenceModule
-    print("DEBUG: 成功导入数列模块")
-except ImportError as e:
-    print(f"DEBUG: 无法导入数列模块: {e}")
-    SequenceModule = None
+def open_module_window(parent, module_name, title, geometry="1200x800"):
+    """按注册表名称导入模块类后打开窗口，模块在首次打开时才被导入"""
+    spec = module_registry.get_spec(module_name)
+    if spec is not None and not module_registry.is_loaded(module_name):
+        log(f"首次打开，正在导入模块: {spec.import_path}")
+    app_class = module_registry.load(module_name)
+    if app_class is not None:
+        module_registry.record_usage(module_name)
+    return open_app_window(parent, app_class, title, geometry)
 
 # --- StandardCourseUI 类定义 ---
 class StandardCourseUI:
@@ -525,63 +463,46 @@ class LinearAlgebraApp(StandardCourseUI):
 
     # 打开各个功能模块的方法
     def open_matrix_comparison(self):
-        open_app_window(self, MatrixComparisonApp, "矩阵对比可视化")
+        open_module_window(self, "juzhenduibi", "矩阵对比可视化")
 
     def open_eigenvalue(self):
-        open_app_window(self, EigenvalueApp, "特征值与特征向量可视化")
+        open_module_window(self, "tezheng", "特征值与特征向量可视化")
 
     def open_matrix_rotation(self):
-        open_app_window(self, MatrixAnimationApp, "矩阵旋转动画可视化")
+        open_module_window(self, "zhuanzhi", "矩阵旋转动画可视化")
 
     def open_basis_transformation(self):
-        open_app_window(self, MatrixTransformationApp, "基变换与向量表示动画")
+        open_module_window(self, "jibianhuan", "基变换与向量表示动画")
 
     def open_gaussian_elimination(self):
-        open_app_window(self, GaussianEliminationApp, "高斯消元法可视化")
+        open_module_window(self, "gaosixiaoyuan", "高斯消元法可视化")
 
     def open_matrix_transition(self):
-        open_app_window(self, MatrixTransitionApp, "矩阵过渡动画")
+        open_module_window(self, "guodujuzhen", "矩阵过渡动画")
 
     def open_matrix_operations(self):
-        open_app_window(self, jisuan.VectorOperationsApp, "矩阵运算可视化")
+        open_module_window(self, "jisuan", "矩阵运算可视化")
 
     def open_determinant(self):
         """打开行列式可视化"""
+        if module_registry.load("hanglieshi") is None:
+            error = module_registry.get_error("hanglieshi")
+            messagebox.showerror("模块错误", f"无法导入行列式可视化模块: {str(error)}\n请确保hanglieshi.py文件存在于正确位置。")
+            return
         try:
-            # 在函数内部导入hanglieshi模块
-            import hanglieshi
-            open_app_window(self, hanglieshi.DeterminantApp, "行列式可视化")
-        except ImportError as e:
-            messagebox.showerror("模块错误", f"无法导入行列式可视化模块: {str(e)}\n请确保hanglieshi.py文件存在于正确位置。")
+            open_module_window(self, "hanglieshi", "行列式可视化")
         except Exception as e:
             messagebox.showerror("错误", f"打开行列式可视化时出错: {str(e)}")
 
-# --- 特别修复贝叶斯统计模块导入 ---
-try:
-    from beiye import BayesianApp  # 确保beiye.py中存在这个类
-    log("成功导入 BayesianApp")
-except ImportError as e:
-    log(f"无法导入 BayesianApp: {e}")
-    BayesianApp = None
-except AttributeError as e:
-    log(f"Beiye模块配置错误: {e}")
-    BayesianApp = None
-
 class ProbabilityTheoryApp(StandardCourseUI):
     def __init__(self, root):
         # 动态创建可用模块按钮数据
         button_data = []
         
         # 确保所有功能按钮都显示，即使模块不可用
-        self.add_button(button_data, "概率分布", ProbabilityApp)
-        self.add_button(button_data, "随机变量", RandomVariableApp)
-        self.add_button(button_data, "随机过程", StochasticProcessApp)
-        self.add_button(button_data, "贝叶斯统计", BayesianApp)
-        self.add_button(button_data, "置信区间", ConfidenceIntervalApp)
-        self.add_button(button_data, "假设检验", HypothesisTestingApp)
-        self.add_button(button_data, "统计分析工具", AnalysisApp)
-        self.add_button(button_data, "概率游戏与谜题", GameApp)
-        self.add_button(button_data, "蒙特卡洛模拟", MonteCarloApp)
+        for module_name in module_registry.get_names("概率统计"):
+            spec = module_registry.get_spec(module_name)
+            self.add_button(button_data, spec.title, module_name)
         
         # 调用父类初始化
         course_type = "complex" if len(button_data) > 6 else "standard"
@@ -607,19 +528,19 @@ class ProbabilityTheoryApp(StandardCourseUI):
             )
             error_label.pack(pady=50)
     
-    def add_button(self, button_data, title, app_class):
+    def add_button(self, button_data, title, module_name):
         """添加功能按钮到按钮数据列表"""
-        button_data.append((title, self.create_handler_with_fallback(app_class, title)))
+        button_data.append((title, self.create_handler_with_fallback(module_name, title)))
     
-    def create_open_handler(self, app_class, title):
+    def create_open_handler(self, module_name, title):
         """创建打开模块的处理函数"""
-        return lambda: open_app_window(self, app_class, title)
+        return lambda: open_module_window(self, module_name, title)
         
-    def create_handler_with_fallback(self, app_class, title):
+    def create_handler_with_fallback(self, module_name, title):
         """创建带有失败处理的按钮处理函数"""
         def handler():
-            if app_class is not None:
-                open_app_window(self, app_class, title)
+            if module_registry.load(module_name) is not None:
+                open_module_window(self, module_name, title)
             else:
                 messagebox.showerror("模块错误", f"无法加载 {title} 模块\n请确保相关文件存在且格式正确。")
         return handler
@@ -723,6 +644,13 @@ class MainApp:
         )
         status_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
+        # 后台任务的回调统一在主线程中执行
+        get_thread_manager().attach_root(self.root)
+        
+        # 主窗口空闲后在后台预热常用模块
+        self.prewarm_scheduler = PrewarmScheduler(self.root)
+        self.prewarm_scheduler.start()
+
     def create_feature_cards(self):
         """创建主要功能卡片 - 实现响应式布局"""
         # 定义卡片数据
@@ -869,9 +797,14 @@ class MainApp:
     
     def open_ai_analyzer(self):
         """打开AI数据分析器"""
+        analyzer_class = module_registry.load("ai")
+        if analyzer_class is None:
+            messagebox.showerror("模块错误", f"无法加载 AI 数据分析 模块\n错误信息: {module_registry.get_error('ai')}")
+            return
+        module_registry.record_usage("ai")
         analyzer_window = tk.Toplevel(self.root)
         analyzer_window.title("AI 数据分析")
-        DataAnalyzerGUI(analyzer_window)
+        analyzer_class(analyzer_window)
         self.current_window = analyzer_window
 
 class AdvancedMathSelector(StandardCourseUI):
@@ -881,22 +814,22 @@ class AdvancedMathSelector(StandardCourseUI):
         
         # 安全地添加按钮，不管模块是否存在
         # 函数可视化分析
-        button_data.append(("函数图像分析", self.create_safe_handler('TrigPlotApp', "函数图像分析")))
+        button_data.append(("函数图像分析", self.create_safe_handler("trig_plot_app", "函数图像分析")))
         
         # 数列分析工具
-        button_data.append(("数列分析工具", self.create_safe_handler('SequenceModule', "数列分析工具")))
+        button_data.append(("数列分析工具", self.create_safe_handler("shulie", "数列分析工具")))
         
         # 微分方程可视化
-        button_data.append(("微分方程", self.create_safe_handler('DirectionFieldApp', "微分方程")))
+        button_data.append(("微分方程", self.create_safe_handler("weifen", "微分方程")))
         
         # 方程可视化工具
-        button_data.append(("方程图像分析", self.create_safe_handler('FangApp', "方程图像分析")))
+        button_data.append(("方程图像分析", self.create_safe_handler("fang", "方程图像分析")))
         
         # 科赫曲线可视化
-        button_data.append(("科赫曲线", self.create_safe_handler('KeheApp', "科赫曲线")))
+        button_data.append(("科赫曲线", self.create_safe_handler("kehe", "科赫曲线")))
         
         # 海森矩阵分析
-        button_data.append(("海森矩阵分析", self.create_safe_handler('HessianApp', "海森矩阵分析")))
+        button_data.append(("海森矩阵分析", self.create_safe_handler("haisen", "海森矩阵分析")))
         
         # 调用父类初始化 - 使用复杂模式支持滚动
         super().__init__(
@@ -910,15 +843,15 @@ class AdvancedMathSelector(StandardCourseUI):
         self.return_button.config(command=self.return_to_main_menu)
     
     def create_safe_handler(self, module_name, title):
-        """创建安全的模块处理函数，通过字符串引用模块"""
+        """创建安全的模块处理函数，通过注册表名称引用模块"""
         def handler():
             try:
-                # 尝试从全局变量中获取模块类
-                module_class = globals().get(module_name)
+                # 首次点击时才通过注册表导入模块类
+                module_class = module_registry.load(module_name)
                 if module_class is not None:
-                    open_app_window(self, module_class, title)
+                    open_module_window(self, module_name, title)
                 else:
-                    messagebox.showerror("模块错误", f"无法加载 {title} 模块\n请确保模块 {module_name} 已正确导入。")
+                    messagebox.showerror("模块错误", f"无法加载 {title} 模块\n请确保模块 {module_name} 已正确导入。\n错误信息: {module_registry.get_error(module_name)}")
             except Exception as e:
                 messagebox.showerror("错误", f"启动 {title} 时出错: {str(e)}")
         return handler
@@ -930,6 +863,17 @@ class AdvancedMathSelector(StandardCourseUI):
 # --- Main Execution ---
 if __name__ == "__main__":
     log("启动主应用程序...")
-    root = tk.Tk()
-    app = MainApp(root)
-    root.mainloop()
+    startup_profiler.wrap_method(MainApp, "create_feature_cards")
+    startup_profiler.wrap_method(InteractiveCard, "_build_card")
+    with startup_profiler.span("tk.Tk"):
+        root = tk.Tk()
+    with startup_profiler.span("MainApp.__init__"):
+        app = MainApp(root)
+    startup_profiler.watch_first_paint(root)
+    try:
+        root.mainloop()
+    finally:
+        app.prewarm_scheduler.stop()
+        shutdown_thread_manager()
+        # 退出时再写一次，包含首次打开各模块时的延迟导入
+        startup_profiler.write_report()
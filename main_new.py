@@ -3,6 +3,12 @@ MathVision 2.0 - 优化后的主应用
 使用单窗口多页面架构，提供更流畅的交互体验
 """
 
+# 启动性能分析（--profile-startup），须在其他导入之前启用
+from core.startup_profiler import startup_profiler, get_profile_path
+_profile_path = get_profile_path()
+if _profile_path:
+    startup_profiler.start(_profile_path)
+
 import tkinter as tk
 import logging
 import os
@@ -23,6 +29,7 @@ from core.page_manager import PageManager, BasePage, NavigationBar
 from core.config_manager import config_manager
 from core.thread_manager import get_thread_manager, shutdown_thread_manager
 from core.search_manager import search_manager, SearchWidget
+from core.theory_index import open_theory
 
 # 导入主题和组件
 from themes.futuristic_theme import COLORS, FONTS
@@ -40,6 +47,9 @@ class MainPage(BasePage):
         
     def initialize(self):
         """初始化主页面"""
+        # 主页包含搜索组件和全部功能卡片，重建代价高且最常返回，常驻缓存
+        self.pin()
+        
         # 创建标题
         title_frame = tk.Frame(self, bg=COLORS["bg_light"])
         title_frame.grid(row=0, column=0, sticky="ew", pady=(20, 0))
@@ -165,9 +175,7 @@ class AdvancedMathPage(BasePage):
     
     def _open_module(self, module_name):
         """打开模块"""
-        # 这里可以使用线程管理器来加载模块
-        thread_manager = get_thread_manager()
-        
+        # 通过页面提交后台任务，离开页面时自动取消
         def load_module():
             # 模拟加载时间
             import time
@@ -181,10 +189,9 @@ class AdvancedMathPage(BasePage):
             else:
                 print(f"加载失败: {result.error}")
         
-        thread_manager.submit_task(
+        self.submit_task(
             load_module,
             callback=on_complete,
-            progress_parent=self,
             progress_message=f"正在加载 {module_name} 模块..."
         )
 
@@ -327,6 +334,9 @@ class MathVisionApp:
     
     def _setup_components(self):
         """设置组件"""
+        # 后台任务的回调与进度遮罩统一在主线程中处理
+        get_thread_manager().attach_root(self.root)
+        
         # 创建页面管理器
         self.page_manager = PageManager(self.root)
         
@@ -378,6 +388,9 @@ class MathVisionApp:
             "AIPage", self.page_manager,
             ["AI", "人工智能", "数据分析", "机器学习"]
         )
+        
+        # 各模块理论知识全文搜索（索引在首次搜索时加载，不导入模块）
+        search_manager.enable_theory_search(lambda entry: open_theory(self.root, entry))
     
     def _setup_keyboard_shortcuts(self):
         """设置键盘快捷键"""
@@ -400,13 +413,18 @@ class MathVisionApp:
         finally:
             # 清理资源
             shutdown_thread_manager()
+            startup_profiler.write_report()
             logging.info("MathVision 2.0 关闭")
 
 
 def main():
     """主函数"""
     try:
-        app = MathVisionApp()
+        startup_profiler.wrap_method(MainPage, "_create_feature_cards")
+        startup_profiler.wrap_method(InteractiveCard, "_build_card")
+        with startup_profiler.span("MathVisionApp.__init__"):
+            app = MathVisionApp()
+        startup_profiler.watch_first_paint(app.root)
         app.run()
     except Exception as e:
         logging.error(f"应用启动失败: {e}")
@@ -5,16 +5,33 @@ import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
+from matplotlib.colors import to_rgb
+from matplotlib.ticker import NullFormatter
 import math
-import random
 import time
 from typing import Callable, Optional
 
+from core.expression_engine import compile_expression
+from core.monte_carlo import (INTEGRAL_ESTIMATORS, MAX_BATCH_SIZE, MIN_BATCH_SIZE, PROPOSALS, SAMPLERS, Z_95,
+                              ConvergenceHistory, DensityGrid, PointReservoir, RunningStats,
+                              batch_size_from_log, convergence_order, estimate_eta, format_duration,
+                              integral_batch, make_proposal, make_sampler, pi_batch)
+
 # 配置 Matplotlib，使中文正常显示
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
 matplotlib.rcParams['axes.unicode_minus'] = False
 
 class MonteCarloApp:
+    # 散点图显示的蓄水池样本容量、密度层直方图每边格数
+    MAX_PLOT_POINTS = 10000
+    DENSITY_BINS = 200
+    INSIDE_COLOR = to_rgb('green')
+    OUTSIDE_COLOR = to_rgb('red')
+    # 收敛历史最多保留的点数
+    HISTORY_POINTS = 200
+    # 并列比较时其他积分估计方法每批的点数上限
+    COMPARISON_BATCH = 20000
+
     def __init__(self, master):
         self.master = master
         master.title("蒙特卡洛模拟工具")
@@ -26,10 +43,6 @@ class MonteCarloApp:
         self.total_points = 0
         self.points_inside = 0 # For Pi calculation AND Integral Hit-or-Miss
         # self.sum_f_values = 0.0 # No longer needed for hit-or-miss integral
-        self.points_x_inside = []
-        self.points_y_inside = []
-        self.points_x_outside = []
-        self.points_y_outside = []
         # self.integral_points_x = [] # No longer needed for hit-or-miss
         # self.integral_points_y = [] # No longer needed for hit-or-miss
         self.integral_func: Optional[Callable[[float], float]] = None
@@ -37,8 +50,24 @@ class MonteCarloApp:
         self.integral_b: float = 1.0
         self.integral_min_y: float = 0.0 # Min y for bounding box
         self.integral_max_y: float = 1.0 # Max y for bounding box
-        self.iteration_history = []
-        self.estimate_history = [] # Store Pi or Integral estimates
+        # 积分估计方法（键见 INTEGRAL_ESTIMATORS）与重要性抽样的建议分布
+        self.integral_method = "hit_or_miss"
+        self.integral_proposal = None
+        self._proposal_params = None
+        self.rng = np.random.default_rng()
+        # 均匀样本来源（伪随机数或加扰的低差异序列），统计对象由采样器决定
+        self.sampler = make_sampler("pseudo", self.rng)
+        # 估计值的在线统计（Welford）与按对数间隔抽稀的收敛历史
+        self.stats = self.sampler.make_stats()
+        self.history = ConvergenceHistory(self.HISTORY_POINTS)
+        self.points_per_second = 0.0
+        self._last_step_time = None
+        # 并列比较用：每种积分估计方法各自的统计（当前方法直接用 self.stats）
+        self.estimator_stats = {method: RunningStats() for method in INTEGRAL_ESTIMATORS}
+        # 绘图用的点：全部历史的均匀子样本 + 固定大小的密度直方图，内存不随点数增长
+        self.reservoir = PointReservoir(self.MAX_PLOT_POINTS, self.rng)
+        self.density: Optional[DensityGrid] = None
+        self.density_image = None
 
         # --- Main Layout ---
         main_frame = ttk.Frame(self.master)
@@ -85,6 +114,14 @@ class MonteCarloApp:
         sim_combobox.pack(anchor=tk.W, pady=2, fill=tk.X)
         sim_combobox.bind("<<ComboboxSelected>>", self.on_sim_type_change)
 
+        # Uniform sample source: pseudo-random or scrambled low-discrepancy sequence
+        ttk.Label(self.control_frame, text="随机数来源:").pack(anchor=tk.W, pady=(10, 2))
+        self.sampler_var = tk.StringVar(value=SAMPLERS["pseudo"])
+        sampler_combobox = ttk.Combobox(self.control_frame, textvariable=self.sampler_var,
+                                        values=list(SAMPLERS.values()), width=30, state="readonly")
+        sampler_combobox.pack(anchor=tk.W, pady=2, fill=tk.X)
+        sampler_combobox.bind("<<ComboboxSelected>>", self.on_sampler_change)
+
         # 2. Simulation Parameters Frame (Dynamic)
         self.param_frame = ttk.Frame(self.control_frame)
         self.param_frame.pack(fill=tk.X, pady=10)
@@ -124,12 +161,22 @@ class MonteCarloApp:
         speed_frame.pack(fill=tk.X, pady=(10, 5))
         ttk.Label(speed_frame, text="模拟速度 (点/批):").pack(side=tk.LEFT, padx=(0, 5))
         self.speed_var = tk.IntVar(value=100) # Points per batch/update
-        speed_scale = ttk.Scale(speed_frame, from_=10, to=1000, orient=tk.HORIZONTAL,
-                                variable=self.speed_var, length=150)
+        # 对数刻度：10 ~ 10^6 点/批
+        self.speed_log_var = tk.DoubleVar(value=2.0)
+        speed_scale = ttk.Scale(speed_frame, from_=math.log10(MIN_BATCH_SIZE), to=math.log10(MAX_BATCH_SIZE),
+                                orient=tk.HORIZONTAL, variable=self.speed_log_var, length=150,
+                                command=lambda value: self.speed_var.set(batch_size_from_log(value)))
         speed_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        speed_label = ttk.Label(speed_frame, textvariable=self.speed_var, width=4)
+        speed_label = ttk.Label(speed_frame, textvariable=self.speed_var, width=8)
         speed_label.pack(side=tk.LEFT, padx=(5, 0))
 
+        # Target precision (95% confidence half-width) for the ETA estimate
+        precision_frame = ttk.Frame(self.control_frame)
+        precision_frame.pack(fill=tk.X, pady=(5, 5))
+        ttk.Label(precision_frame, text="目标精度 (95%置信区间半宽):").pack(side=tk.LEFT, padx=(0, 5))
+        self.target_precision_var = tk.DoubleVar(value=1e-3)
+        ttk.Entry(precision_frame, textvariable=self.target_precision_var, width=10).pack(side=tk.LEFT)
+
         # --- Initial Setup ---
         self.create_param_ui()
         self.setup_plot()
@@ -170,9 +217,59 @@ class MonteCarloApp:
             ttk.Entry(self.param_frame, textvariable=self.max_y_var, width=8).grid(row=2, column=3, sticky=tk.W, pady=2)
             ttk.Button(self.param_frame, text="自动估算Y范围", command=self.auto_estimate_y_range).grid(row=3, column=0, columnspan=4, pady=5)
 
+            # Estimator selection (variance reduction)
+            ttk.Label(self.param_frame, text="估计方法:").grid(row=4, column=0, sticky=tk.W, pady=2)
+            self.estimator_var = tk.StringVar(value=INTEGRAL_ESTIMATORS[self.integral_method])
+            estimator_combobox = ttk.Combobox(self.param_frame, textvariable=self.estimator_var,
+                                              values=list(INTEGRAL_ESTIMATORS.values()), state="readonly", width=22)
+            estimator_combobox.grid(row=4, column=1, columnspan=3, sticky=tk.EW, pady=2)
+            estimator_combobox.bind("<<ComboboxSelected>>", self.on_estimator_change)
+
+            # Proposal distribution for importance sampling
+            ttk.Label(self.param_frame, text="建议分布:").grid(row=5, column=0, sticky=tk.W, pady=2)
+            self.proposal_var = tk.StringVar(value=PROPOSALS["normal"])
+            ttk.Combobox(self.param_frame, textvariable=self.proposal_var, values=list(PROPOSALS.values()),
+                         state="readonly", width=22).grid(row=5, column=1, columnspan=3, sticky=tk.EW, pady=2)
+            ttk.Label(self.param_frame, text="μ 或 λ:").grid(row=6, column=0, sticky=tk.W, pady=2)
+            self.proposal_param1_var = tk.DoubleVar(value=0.5)
+            ttk.Entry(self.param_frame, textvariable=self.proposal_param1_var, width=8).grid(row=6, column=1, sticky=tk.W, pady=2)
+            ttk.Label(self.param_frame, text="σ:").grid(row=6, column=2, sticky=tk.W, pady=2)
+            self.proposal_param2_var = tk.DoubleVar(value=0.5)
+            ttk.Entry(self.param_frame, textvariable=self.proposal_param2_var, width=8).grid(row=6, column=3, sticky=tk.W, pady=2)
+
+            self.compare_estimators_var = tk.BooleanVar(value=True)
+            ttk.Checkbutton(self.param_frame, text="同时运行其他方法并比较方差",
+                            variable=self.compare_estimators_var).grid(row=7, column=0, columnspan=4, sticky=tk.W, pady=2)
+
         # Reset plot and results when type changes
         self.reset_simulation()
 
+    def on_sampler_change(self, event=None):
+        """切换随机数来源：拟蒙特卡洛的误差由多组独立加扰序列的组间离散估计"""
+        kinds = {label: kind for kind, label in SAMPLERS.items()}
+        self.sampler = make_sampler(kinds.get(self.sampler_var.get(), "pseudo"), self.rng)
+        self.stats = self.sampler.make_stats()
+        self.reset_simulation()
+
+    def on_estimator_change(self, event=None):
+        """切换积分估计方法：统计从头开始"""
+        labels = {label: method for method, label in INTEGRAL_ESTIMATORS.items()}
+        method = labels.get(self.estimator_var.get(), "hit_or_miss")
+        if method != self.integral_method:
+            self.integral_method = method
+            self.reset_simulation()
+
+    def _build_proposal(self):
+        """按界面参数创建重要性抽样的建议分布，返回 (建议分布, 错误信息)"""
+        kinds = {label: kind for kind, label in PROPOSALS.items()}
+        try:
+            params = (kinds.get(self.proposal_var.get(), "normal"),
+                      float(self.proposal_param1_var.get()), float(self.proposal_param2_var.get()))
+            proposal = make_proposal(params[0], self.integral_a, self.integral_b, params[1], params[2])
+        except (ValueError, tk.TclError) as e:
+            return None, None, str(e)
+        return proposal, params + (self.integral_a, self.integral_b), None
+
     def create_param_ui(self):
         """Create specific parameter widgets based on simulation type."""
         for widget in self.param_frame.winfo_children():
@@ -228,25 +325,8 @@ class MonteCarloApp:
             return False
         
         try:
-            # 安全的函数评估环境
-            safe_dict = {
-                "x": 0.5,  # 测试值
-                "math": math,
-                "np": np,
-                "sin": np.sin, "cos": np.cos, "tan": np.tan,
-                "exp": np.exp, "log": np.log, "log10": np.log10,
-                "sqrt": np.sqrt, "abs": np.abs, "pi": np.pi,
-                "e": np.e
-            }
-            
-            # 测试函数是否可以被解析和执行
-            eval(func_str, {"__builtins__": {}}, safe_dict)
-            
-            # 如果测试成功，创建实际的函数对象
-            def func(x):
-                safe_locals = safe_dict.copy()
-                safe_locals["x"] = x
-                return eval(func_str, {"__builtins__": {}}, safe_locals)
+            # 解析并编译为向量化函数（支持 np./math. 前缀），非法表达式抛出异常
+            func = compile_expression(func_str, ("x",))
             
             # 测试函数在积分区间的端点
             a = self.a_var.get()
@@ -262,9 +342,9 @@ class MonteCarloApp:
             # 尝试自动估计Y范围
             try:
                 x_samples = np.linspace(a, b, 20)  # 少量样本点用于快速检查
-                y_samples = [func(x) for x in x_samples]
-                self.integral_min_y = min(0, min(y_samples))  # 确保包含0
-                self.integral_max_y = max(0, max(y_samples))  # 确保包含0
+                y_samples = func(x_samples)
+                self.integral_min_y = min(0, np.nanmin(y_samples))  # 确保包含0
+                self.integral_max_y = max(0, np.nanmax(y_samples))  # 确保包含0
                 
                 # 添加一些边距
                 padding = (self.integral_max_y - self.integral_min_y) * 0.2
@@ -297,10 +377,16 @@ class MonteCarloApp:
         sim_type = self.sim_type_var.get()
 
         # --- Setup Convergence Plot (ax2) ---
-        self.ax2.set_xlabel("模拟点数")
+        self.ax2.set_xlabel("模拟点数 (对数刻度)")
         self.ax2.set_ylabel("估算值")
+        self.ax2.set_xscale('log')
+        self.ax2.xaxis.set_minor_formatter(NullFormatter()) # 跨度不到几个数量级时次刻度标签会重叠
         self.ax2.grid(True, linestyle='--', alpha=0.6)
         self.line_estimate, = self.ax2.plot([], [], 'b-', label='估算值') # Line object for estimates
+        self.band_estimate = None # 95% 置信带（每次更新重建）
+        self.eta_text = self.ax2.text(0.02, 0.02, "", transform=self.ax2.transAxes, fontsize=9,
+                                      verticalalignment='bottom',
+                                      bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
         self.line_true = None # Placeholder for true value line
 
         # --- Setup Main Simulation Plot (ax1) ---
@@ -325,14 +411,14 @@ class MonteCarloApp:
             self.ax2.legend()
 
         elif sim_type == "估算积分":
-            self.ax1.set_title("蒙特卡洛估算积分 (Hit-or-Miss)")
+            self.ax1.set_title(f"蒙特卡洛估算积分 ({INTEGRAL_ESTIMATORS[self.integral_method]})")
             self.ax1.set_xlabel("X")
             self.ax1.set_ylabel("Y")
             # Plot the function itself
             if self.integral_func and self.integral_a < self.integral_b:
                 x_func = np.linspace(self.integral_a, self.integral_b, 200)
                 try:
-                    y_func = [self.integral_func(x) for x in x_func]
+                    y_func = self.integral_func(x_func)
                     self.ax1.plot(x_func, y_func, 'b-', label=f'f(x)={self.func_str_var.get()}', linewidth=2)
                 except Exception as e:
                     print(f"Error plotting function: {e}")
@@ -351,8 +437,12 @@ class MonteCarloApp:
             self.ax1.grid(True, linestyle='--', alpha=0.6)
 
             # Initialize scatter plots for points (hits and misses)
-            self.scatter_inside, = self.ax1.plot([], [], 'go', markersize=2, alpha=0.6, label='命中 (Hit)')
-            self.scatter_outside, = self.ax1.plot([], [], 'ro', markersize=2, alpha=0.6, label='未命中 (Miss)')
+            if self.integral_method == "hit_or_miss":
+                self.scatter_inside, = self.ax1.plot([], [], 'go', markersize=2, alpha=0.6, label='命中 (Hit)')
+                self.scatter_outside, = self.ax1.plot([], [], 'ro', markersize=2, alpha=0.6, label='未命中 (Miss)')
+            else:
+                self.scatter_inside, = self.ax1.plot([], [], 'go', markersize=2, alpha=0.6, label='采样点 (x, f(x))')
+                self.scatter_outside, = self.ax1.plot([], [], 'ro', markersize=2, alpha=0.6, label='_nolegend_')
             self.ax1.legend(loc='upper right')
 
             # Setup convergence plot specific for Integral
@@ -366,8 +456,27 @@ class MonteCarloApp:
                 self.line_true = None # Cannot draw true value line
             self.ax2.legend()
 
+        # 全部历史点的密度层（画在散点下面），散点只显示蓄水池样本
+        self._setup_density_layer()
+
         self.canvas.draw_idle()
 
+    def _sampling_extent(self):
+        """当前模拟的采样区域 (x_min, x_max, y_min, y_max)"""
+        if self.sim_type_var.get() == "估算积分":
+            return (self.integral_a, self.integral_b, self.integral_min_y, self.integral_max_y)
+        return (0.0, 1.0, 0.0, 1.0)
+
+    def _setup_density_layer(self):
+        """按当前采样区域新建密度直方图及其图像层"""
+        extent = self._sampling_extent()
+        self.density = DensityGrid(extent, bins=self.DENSITY_BINS)
+        if self.density_image is not None and self.density_image in self.ax1.images:
+            self.density_image.remove()
+        self.density_image = self.ax1.imshow(self.density.image(self.INSIDE_COLOR, self.OUTSIDE_COLOR),
+                                             extent=extent, origin='lower', aspect=self.ax1.get_aspect(),
+                                             interpolation='nearest', alpha=0.5, zorder=0)
+
     def run_simulation(self):
         """运行蒙特卡洛模拟"""
         sim_type = self.sim_type_var.get()
@@ -394,6 +503,16 @@ class MonteCarloApp:
                 if self.integral_min_y >= self.integral_max_y:
                     messagebox.showerror("错误", "Y范围的最小值必须小于最大值。")
                     return
+
+            # 重要性抽样的建议分布（参数改变后已有的统计作废）
+            self.integral_a, self.integral_b = a, b
+            proposal, params, error = self._build_proposal()
+            if proposal is None and self.integral_method == "importance":
+                messagebox.showerror("错误", f"建议分布无效: {error}")
+                return
+            if params != self._proposal_params and self.total_points > 0 and self.integral_method == "importance":
+                self.reset_simulation()
+            self.integral_proposal, self._proposal_params = proposal, params
         
         # 开始模拟
         self.simulation_running = True
@@ -419,6 +538,7 @@ class MonteCarloApp:
             print(f"无法禁用类型选择下拉框: {e}")
             # 这里仅打印错误但不中断模拟
 
+        self._last_step_time = None
         self.run_simulation_step()
 
     def stop_simulation(self):
@@ -435,7 +555,7 @@ class MonteCarloApp:
         # Re-enable parameter changes
         for widget in self.param_frame.winfo_children():
              if isinstance(widget, (ttk.Entry, ttk.Scale, ttk.Combobox)):
-                widget.config(state=tk.NORMAL)
+                widget.config(state="readonly" if isinstance(widget, ttk.Combobox) else tk.NORMAL)
                 
         # 安全地启用类型选择下拉框
         try:
@@ -457,14 +577,16 @@ class MonteCarloApp:
         self.total_points = 0
         self.points_inside = 0
         # self.sum_f_values = 0.0 # Removed
-        self.points_x_inside.clear()
-        self.points_y_inside.clear()
-        self.points_x_outside.clear()
-        self.points_y_outside.clear()
+        self.reservoir.clear()
         # self.integral_points_x.clear() # Removed
         # self.integral_points_y.clear() # Removed
-        self.iteration_history.clear() # Clear history
-        self.estimate_history.clear()  # Clear history
+        self.sampler.reset()
+        self.stats.clear()
+        self.history.clear()
+        for stats in self.estimator_stats.values():
+            stats.clear()
+        self.points_per_second = 0.0
+        self._last_step_time = None
 
         self.setup_plot() # Re-setup plots for the current type
         self.update_results()
@@ -477,140 +599,191 @@ class MonteCarloApp:
 
         start_time = time.perf_counter()
         sim_type = self.sim_type_var.get()
-        points_in_batch = self.speed_var.get() # Use speed variable
-
-        new_x_inside, new_y_inside = [], []
-        new_x_outside, new_y_outside = [], []
-        batch_points_inside = 0 # Points inside for this batch
-
-        for _ in range(points_in_batch):
-            self.total_points += 1
-
-            if sim_type == "计算 π 值":
-                x, y = random.random(), random.random()
-                is_inside = (x*x + y*y <= 1.0)
-                if is_inside:
-                    self.points_inside += 1
-                    batch_points_inside += 1
-                    new_x_inside.append(x)
-                    new_y_inside.append(y)
-                else:
-                    new_x_outside.append(x)
-                    new_y_outside.append(y)
-
-            elif sim_type == "估算积分":
-                if not self.integral_func or self.integral_a >= self.integral_b or self.integral_min_y >= self.integral_max_y:
-                    messagebox.showerror("错误", "积分参数无效，请检查函数、区间和Y范围。")
-                    self.stop_simulation()
-                    return
+        requested_points = min(max(int(self.speed_var.get()), MIN_BATCH_SIZE), MAX_BATCH_SIZE) # Use speed variable
 
-                # Sample within the bounding box
-                x = random.uniform(self.integral_a, self.integral_b)
-                y = random.uniform(self.integral_min_y, self.integral_max_y)
+        if sim_type == "估算积分" and (not self.integral_func or self.integral_a >= self.integral_b
+                                       or self.integral_min_y >= self.integral_max_y):
+            messagebox.showerror("错误", "积分参数无效，请检查函数、区间和Y范围。")
+            self.stop_simulation()
+            return
+        if sim_type not in ("计算 π 值", "估算积分"):
+            return
 
-                try:
-                    f_x = self.integral_func(x)
-                except Exception as e:
-                    print(f"Error evaluating function at x={x}: {e}")
-                    self.stop_simulation()
-                    messagebox.showerror("函数求值错误", f"在 x={x:.4f} 处计算函数值时出错: {e}")
-                    return
+        # 采样区域在开始模拟时可能被修改，此时密度层按新区域重新累计
+        if self.density is None or self.density.extent != tuple(float(v) for v in self._sampling_extent()):
+            self._setup_density_layer()
+
+        # 整批生成均匀样本（拟蒙特卡洛时每组加扰序列一块），由批量核一次完成变换、判定与计数
+        points_in_batch = 0
+        batch_points_inside = 0
+        try:
+            for u in self.sampler.random(requested_points):
+                x, y, inside, used, hits = self._simulate_block(sim_type, u)
+                points_in_batch += used
+                batch_points_inside += hits
+                # --- Update Point Storage ---
+                self.reservoir.add(x, y, inside)
+                self.density.add(x, y, inside)
+            if sim_type == "估算积分" and self.compare_estimators_var.get():
+                self._run_comparison(min(points_in_batch, self.COMPARISON_BATCH))
+        except Exception as e:
+            print(f"Error evaluating function: {e}")
+            self.stop_simulation()
+            messagebox.showerror("函数求值错误", f"计算函数值时出错: {e}")
+            return
 
-                # Check if the point is a "hit" (between 0 and f(x) or f(x) and 0)
-                # This handles both positive and negative functions relative to the bounding box
-                is_inside = (self.integral_min_y <= y <= f_x) or (f_x <= y <= self.integral_max_y and f_x >= self.integral_min_y)
-                # Simplified check assuming bounding box contains the relevant area:
-                is_inside_area = (y >= self.integral_min_y and y <= f_x) if f_x >= self.integral_min_y else (y <= self.integral_max_y and y >= f_x)
-
-                # More robust check for hit-or-miss (area under curve relative to baseline y=0)
-                # A 'hit' means the random y falls between 0 and f(x)
-                is_hit = (y >= 0 and y <= f_x) or (y <= 0 and y >= f_x)
-
-                if is_hit:
-                    self.points_inside += 1 # Count 'hits' for integral estimation
-                    batch_points_inside += 1
-                    new_x_inside.append(x)
-                    new_y_inside.append(y)
-                else:
-                    new_x_outside.append(x)
-                    new_y_outside.append(y)
-
-        # --- Update Data Lists ---
-        self.points_x_inside.extend(new_x_inside)
-        self.points_y_inside.extend(new_y_inside)
-        self.points_x_outside.extend(new_x_outside)
-        self.points_y_outside.extend(new_y_outside)
+        self.total_points += points_in_batch
+        self.points_inside += batch_points_inside
 
         # --- Update Convergence History ---
-        if self.total_points > 0:
-            current_estimate = 0.0
-            if sim_type == "计算 π 值":
-                current_estimate = 4.0 * self.points_inside / self.total_points
-            elif sim_type == "估算积分":
-                box_area = (self.integral_b - self.integral_a) * (self.integral_max_y - self.integral_min_y)
-                if box_area > 0: # Avoid division by zero
-                     # Estimate is ratio of hits * bounding box area
-                     current_estimate = box_area * (self.points_inside / self.total_points)
-
-            # Add to history (only add every N points for performance if needed)
-            if self.total_points % max(1, points_in_batch // 10) == 0 or self.total_points < 100: # Update history frequently at start
-                 self.iteration_history.append(self.total_points)
-                 self.estimate_history.append(current_estimate)
+        self.history.record(self.stats.count, self.stats.mean, self.stats.std_error)
+
+        # 吞吐量（点/秒，含界面刷新与调度间隔），用于估计达到目标精度的剩余时间
+        now = time.perf_counter()
+        if self._last_step_time is not None and now > self._last_step_time:
+            rate = points_in_batch / (now - self._last_step_time)
+            self.points_per_second = rate if self.points_per_second <= 0 else 0.7 * self.points_per_second + 0.3 * rate
+        self._last_step_time = now
 
         # --- Update Plots ---
-        # Limit plotted points for performance
-        max_plot_points = 10000 # Increase max plotted points
-        step = max(1, len(self.points_x_inside) // max_plot_points) if len(self.points_x_inside) > max_plot_points else 1
-        step_out = max(1, len(self.points_x_outside) // max_plot_points) if len(self.points_x_outside) > max_plot_points else 1
-
-        # Update ax1 (Main simulation)
-        self.scatter_inside.set_data(self.points_x_inside[::step], self.points_y_inside[::step])
-        self.scatter_outside.set_data(self.points_x_outside[::step_out], self.points_y_outside[::step_out])
+        # Update ax1 (Main simulation): 绘制量固定为蓄水池容量与直方图大小
+        x_inside, y_inside, x_outside, y_outside = self.reservoir.split()
+        self.scatter_inside.set_data(x_inside, y_inside)
+        self.scatter_outside.set_data(x_outside, y_outside)
+        self.density_image.set_data(self.density.image(self.INSIDE_COLOR, self.OUTSIDE_COLOR))
         self.ax1.relim() # Recalculate limits if needed (though usually fixed)
         self.ax1.autoscale_view(tight=True) # Adjust view
 
         # Update ax2 (Convergence)
-        if self.iteration_history:
-            self.line_estimate.set_data(self.iteration_history, self.estimate_history)
-            self.ax2.relim()
-            self.ax2.autoscale_view(tight=False) # Allow some margin on convergence plot
-            # Adjust Y limits dynamically for better view
-            if len(self.estimate_history) > 1:
-                min_est = min(self.estimate_history)
-                max_est = max(self.estimate_history)
-                padding = (max_est - min_est) * 0.1 + 1e-6 # Add small padding
-                true_val = None
-                if sim_type == "计算 π 值": true_val = math.pi
-                elif sim_type == "估算积分" and self.line_true: true_val = self.line_true.get_ydata()[0]
-
-                if true_val is not None:
-                    min_lim = min(min_est, true_val) - padding
-                    max_lim = max(max_est, true_val) + padding
-                else:
-                    min_lim = min_est - padding
-                    max_lim = max_est + padding
-                self.ax2.set_ylim(min_lim, max_lim)
-            self.ax2.set_xlim(0, self.total_points * 1.05) # Adjust X limit
+        self.update_convergence_plot()
 
         self.canvas.draw_idle() # Use draw_idle for better responsiveness
 
         # --- Update Results Text ---
         self.update_results()
 
-        # --- Update Status Bar ---
-        self.status_var.set(f"模拟中... 点数: {self.total_points}")
-
         # --- Schedule next step ---
-        time.perf_counter() - start_time
+        elapsed = time.perf_counter() - start_time
+        self.status_var.set(f"模拟中... 点数: {self.total_points}  (本批 {points_in_batch} 点, {elapsed * 1000:.0f} ms)")
         # Simple delay - more sophisticated adaptive delay could be used
         delay_ms = 5 # Base delay in ms
         self.simulation_task = self.master.after(delay_ms, self.run_simulation_step)
 
+    def _simulate_block(self, sim_type, u):
+        """对一块均匀样本调用批量核并加入统计，返回 (x, y, 标签, 使用的点数, 净命中数)"""
+        if sim_type == "计算 π 值":
+            x, y, inside = pi_batch(u)
+            hits = int(np.count_nonzero(inside))
+            # 每个样本的估计值为 4×[在圆内]
+            self.stats.add_sums(len(u), 4.0 * hits, 16.0 * hits)
+            return x, y, inside, len(u), hits
+
+        # 投点法的标签是带符号命中（f(x) < 0 的区域记负），其和即净命中数；
+        # 其他方法显示采样点 (x, f(x))，可以看出样本在区间上的分布
+        x, y, labels, moments = integral_batch(self.integral_method, u, self.integral_func,
+                                               self.integral_a, self.integral_b,
+                                               self.integral_min_y, self.integral_max_y, self.integral_proposal)
+        self.stats.add_moments(*moments)
+        net_hits = int(labels.sum()) if self.integral_method == "hit_or_miss" else 0
+        # 成对取点的方法可能少用一个点
+        return x, y, labels != 0, moments[0], net_hits
+
+    def _run_comparison(self, n):
+        """其他积分估计方法各跑一小批，累计各自的统计用于并列比较"""
+        for method, stats in self.estimator_stats.items():
+            if method == self.integral_method or (method == "importance" and self.integral_proposal is None):
+                continue
+            *_, moments = integral_batch(method, self.rng.random((n, 2)), self.integral_func,
+                                         self.integral_a, self.integral_b,
+                                         self.integral_min_y, self.integral_max_y, self.integral_proposal)
+            stats.add_moments(*moments)
+
+    def _comparison_summary(self):
+        """各积分估计方法的估计值、每点方差及相对投点法的效率"""
+        stats_by_method = dict(self.estimator_stats)
+        stats_by_method[self.integral_method] = self.stats
+        baseline = stats_by_method["hit_or_miss"].variance
+        target = self._target_precision()
+        lines = ["方法比较 (方差按每次函数求值折算，越小越好；其他方法使用伪随机数):"]
+        for method, label in INTEGRAL_ESTIMATORS.items():
+            stats = stats_by_method[method]
+            if stats.count < 2:
+                lines.append(f"  {label}: 暂无数据")
+                continue
+            line = f"  {label}: {stats.mean:.6f}  方差/点 {stats.variance:.3g}"
+            if math.isfinite(baseline) and stats.variance > 0:
+                line += f"  效率 ×{baseline / stats.variance:.3g}"
+            if target is not None:
+                needed = stats.samples_for_precision(target)
+                if needed is not None:
+                    line += f"  达到 ±{target:g} 需 {needed:.3g} 点"
+            lines.append(line + (" (当前)" if method == self.integral_method else ""))
+        return "\n".join(lines)
+
+    def _target_precision(self):
+        """目标精度（95%置信区间半宽），输入无效时返回 None"""
+        try:
+            value = float(self.target_precision_var.get())
+        except (tk.TclError, ValueError):
+            return None
+        return value if value > 0 else None
+
+    def _eta_summary(self):
+        """当前95%置信区间半宽与达到目标精度的剩余点数/时间的说明文字"""
+        half_width = Z_95 * self.stats.std_error
+        lines = [f"95% 置信区间: ±{half_width:.3g}" if math.isfinite(half_width) else "95% 置信区间: N/A"]
+        counts, _, errors = self.history.arrays(self.stats)
+        order = convergence_order(counts, errors)
+        if order is not None:
+            lines[0] += f"  (误差 ∝ N^{order:.2f})"
+        target = self._target_precision()
+        if target is not None:
+            remaining, seconds = estimate_eta(self.stats, target, self.points_per_second)
+            if remaining is None:
+                lines.append(f"目标 ±{target:g}: 样本不足，暂无法估计")
+            elif remaining == 0:
+                lines.append(f"目标 ±{target:g}: 已达到")
+            else:
+                lines.append(f"目标 ±{target:g}: 还需约 {remaining:.3g} 点，{format_duration(seconds)}")
+        return "\n".join(lines)
+
+    def update_convergence_plot(self):
+        """用收敛历史更新估计曲线、95%置信带与剩余时间说明"""
+        counts, estimates, errors = self.history.arrays(self.stats)
+        if self.band_estimate is not None:
+            self.band_estimate.remove()
+            self.band_estimate = None
+        if counts.size == 0:
+            self.line_estimate.set_data([], [])
+            self.eta_text.set_text("")
+            return
+
+        self.line_estimate.set_data(counts, estimates)
+        low, high = estimates - Z_95 * errors, estimates + Z_95 * errors
+        finite = np.isfinite(low) & np.isfinite(high)
+        if finite.any():
+            self.band_estimate = self.ax2.fill_between(counts[finite], low[finite], high[finite],
+                                                       color='b', alpha=0.2, linewidth=0, label='_nolegend_')
+
+        # 纵轴覆盖估计值、置信带和真实值
+        values = [estimates, low[finite], high[finite]]
+        if self.line_true:
+            values.append(np.asarray(self.line_true.get_ydata(), dtype=float)[:1])
+        values = np.concatenate(values)
+        values = values[np.isfinite(values)]
+        min_lim, max_lim = values.min(), values.max()
+        padding = (max_lim - min_lim) * 0.1 + 1e-6 # Add small padding
+        self.ax2.set_ylim(min_lim - padding, max_lim + padding)
+        self.ax2.set_xlim(max(counts[0] * 0.8, 1), counts[-1] * 1.5)
+
+        self.eta_text.set_text(self._eta_summary())
+
     def update_results(self):
         """Update the text area with current simulation results."""
         self.result_text.delete(1.0, tk.END)
         sim_type = self.sim_type_var.get()
         result_str = f"模拟类型: {sim_type}\n"
+        result_str += f"随机数来源: {self.sampler_var.get()}\n"
         result_str += f"已模拟点数: {self.total_points}\n"
         result_str += "------------------------------------\n"
 
@@ -622,22 +795,28 @@ class MonteCarloApp:
                 result_str += f"π 估算值: {pi_estimate:.8f}\n"
                 result_str += f"真实 π 值: {math.pi:.8f}\n"
                 result_str += f"绝对误差: {error:.8f}\n"
+                result_str += f"标准误: {self.stats.std_error:.3g}\n"
+                result_str += self._eta_summary() + "\n"
             else:
                 result_str += "π 估算值: N/A\n"
 
         elif sim_type == "估算积分":
              result_str += f"函数 f(x): {self.func_str_var.get()}\n"
              result_str += f"积分区间: [{self.integral_a}, {self.integral_b}]\n"
-             result_str += f"采样区域 Y: [{self.integral_min_y}, {self.integral_max_y}]\n"
+             result_str += f"估计方法: {INTEGRAL_ESTIMATORS[self.integral_method]}\n"
              if self.total_points > 0:
                  box_area = (self.integral_b - self.integral_a) * (self.integral_max_y - self.integral_min_y)
                  if box_area > 1e-9: # Check if box area is valid
-                     hit_ratio = self.points_inside / self.total_points
-                     integral_estimate = box_area * hit_ratio
-                     result_str += f"命中点数 (Hits): {self.points_inside}\n"
-                     result_str += f"命中率: {hit_ratio:.4f}\n"
-                     result_str += f"采样区域面积: {box_area:.6f}\n"
-                     result_str += f"积分估算值 (Hit/Miss): {integral_estimate:.8f}\n"
+                     if self.integral_method == "hit_or_miss":
+                         hit_ratio = self.points_inside / self.total_points
+                         result_str += f"采样区域 Y: [{self.integral_min_y}, {self.integral_max_y}]\n"
+                         result_str += f"净命中点数 (Hits, f<0 区域记负): {self.points_inside}\n"
+                         result_str += f"命中率: {hit_ratio:.4f}\n"
+                         result_str += f"采样区域面积: {box_area:.6f}\n"
+                     integral_estimate = self.stats.mean
+                     result_str += f"积分估算值: {integral_estimate:.8f}\n"
+                     result_str += f"标准误: {self.stats.std_error:.3g}\n"
+                     result_str += self._eta_summary() + "\n"
 
                      # Add true value comparison if possible
                      try:
@@ -654,6 +833,8 @@ class MonteCarloApp:
                           result_str += "真实积分值: (需要安装 scipy 库)\n"
                      except Exception as e:
                          result_str += f"真实积分值: (计算错误 - {e})\n"
+                     result_str += "------------------------------------\n"
+                     result_str += self._comparison_summary() + "\n"
                  else:
                      result_str += "积分估算值: (采样区域面积无效)\n"
              else:
@@ -674,10 +855,10 @@ class MonteCarloApp:
                 return
 
             x_samples = np.linspace(a, b, 500) # Sample 500 points
-            y_samples = [self.integral_func(x) for x in x_samples]
+            y_samples = self.integral_func(x_samples)
 
-            min_y_est = min(y_samples)
-            max_y_est = max(y_samples)
+            min_y_est = np.nanmin(y_samples)
+            max_y_est = np.nanmax(y_samples)
 
             # Add some padding
             padding = (max_y_est - min_y_est) * 0.15
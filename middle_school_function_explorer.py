@@ -6,6 +6,8 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
 import sys
 
+from core.adaptive_sampling import adaptive_sample
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -424,12 +426,9 @@ class MiddleSchoolFunctionExplorer:
         b = self.b_value.get()
         c = self.c_value.get()
         
-        # 生成 x 值
-        x = np.linspace(-5, 5, 1000)
-        
-        # 计算 y 值
+        # 计算 y 值（自适应采样：直线只需少量点，抛物线在顶点附近加密）
         if self.function_type.get() == "quadratic":
-            y = a * x**2 + b * x + c
+            x, y = adaptive_sample(lambda x: a * x**2 + b * x + c, -5, 5, initial_points=50)
             formula = f"y = {a:.1f}x² + {b:.1f}x + {c:.1f}"
             
             # 计算顶点
@@ -462,7 +461,7 @@ class MiddleSchoolFunctionExplorer:
             axis_text = f"对称轴: x = {x_vertex:.2f}"
             
         else:  # 一次函数
-            y = b * x + c
+            x, y = adaptive_sample(lambda x: b * x + c, -5, 5, initial_points=50)
             formula = f"y = {b:.1f}x + {c:.1f}"
             
             # 一次函数没有顶点
@@ -3,12 +3,16 @@ from tkinter import ttk
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import to_rgb
+from matplotlib.ticker import NullFormatter
 import os
 import sys
-import random
 import time
 import threading
 
+from core.monte_carlo import (SAMPLERS, Z_95, ConvergenceHistory, DensityGrid, PointReservoir,
+                              convergence_order, estimate_eta, format_duration, make_sampler)
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -17,6 +21,13 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class MiddleSchoolMonteCarloSimulation:
+    # 散点图显示的点数上限（全部历史的均匀子样本）与密度层每边格数
+    MAX_PLOT_POINTS = 5000
+    DENSITY_BINS = 100
+    # 收敛历史最多保留的点数与剩余时间估计的目标精度（95%置信区间半宽）
+    HISTORY_POINTS = 200
+    TARGET_PRECISION = 0.001
+
     def __init__(self, root):
         self.root = root
         self.root.title("蒙特卡洛方法计算圆周率")
@@ -61,20 +72,23 @@ class MiddleSchoolMonteCarloSimulation:
         # 设置控制面板
         self.setup_control_panel()
         
-        # 设置可视化区域
-        self.setup_visualization()
-        
         # 初始化模拟变量
         self.simulation_running = False
         self.simulation_thread = None
         self.total_points = 0
         self.points_inside = 0
-        self.inside_x = []
-        self.inside_y = []
-        self.outside_x = []
-        self.outside_y = []
-        self.pi_estimates = []
-        self.iteration_counts = []
+        # 绘图用的点：蓄水池样本 + 密度直方图，内存和绘制量不随点数增长
+        self.rng = np.random.default_rng()
+        self.reservoir = PointReservoir(self.MAX_PLOT_POINTS, self.rng)
+        self.density = DensityGrid((0, 1, 0, 1), bins=self.DENSITY_BINS)
+        # 随机点来源（伪随机数或加扰的低差异序列）；π 估计值的在线统计与按对数间隔抽稀的收敛历史
+        self.sampler = make_sampler("pseudo", self.rng)
+        self.stats = self.sampler.make_stats()
+        self.history = ConvergenceHistory(self.HISTORY_POINTS)
+        self.points_per_second = 0.0
+        
+        # 设置可视化区域
+        self.setup_visualization()
     
     def setup_control_panel(self):
         """设置左侧控制面板"""
@@ -169,6 +183,30 @@ class MiddleSchoolMonteCarloSimulation:
         )
         fast_label.pack(side=tk.RIGHT)
         
+        # 随机点生成方式
+        sampler_frame = tk.Frame(self.left_panel, bg=self.bg_navy)
+        sampler_frame.pack(fill=tk.X, padx=15, pady=10)
+        
+        sampler_label = tk.Label(
+            sampler_frame,
+            text="随机点生成方式:",
+            font=("SimHei", 12),
+            bg=self.bg_navy,
+            fg=self.text_white
+        )
+        sampler_label.pack(anchor=tk.W)
+        
+        self.sampler_var = tk.StringVar(value=SAMPLERS["pseudo"])
+        # 模拟运行时禁用，避免后台线程把旧生成器的点计入新的统计
+        self.sampler_combobox = ttk.Combobox(
+            sampler_frame,
+            textvariable=self.sampler_var,
+            values=list(SAMPLERS.values()),
+            state="readonly"
+        )
+        self.sampler_combobox.pack(fill=tk.X, pady=5)
+        self.sampler_combobox.bind("<<ComboboxSelected>>", self.on_sampler_change)
+        
         # 按钮框架
         button_frame = tk.Frame(self.left_panel, bg=self.bg_navy)
         button_frame.pack(fill=tk.X, padx=15, pady=20)
@@ -220,6 +258,7 @@ class MiddleSchoolMonteCarloSimulation:
 π ≈ 4 × (圆内点数 / 总点数)
 
 点数越多，估计越准确！
+换成 Sobol/Halton 等"低差异序列"，点铺得更均匀，估计收敛得更快。
         """
         
         explanation_label = tk.Label(
@@ -288,6 +327,18 @@ class MiddleSchoolMonteCarloSimulation:
             fg=self.text_white
         )
         inside_points_label.pack(fill=tk.X)
+        
+        # 误差范围与达到目标精度的预计时间
+        self.eta_var = tk.StringVar(value=f"目标精度 ±{self.TARGET_PRECISION:g}")
+        eta_label = tk.Label(
+            self.results_frame,
+            textvariable=self.eta_var,
+            font=("SimHei", 10),
+            bg=self.bg_navy,
+            fg=self.text_white,
+            justify=tk.LEFT
+        )
+        eta_label.pack(fill=tk.X)
     
     def setup_visualization(self):
         """设置可视化区域"""
@@ -339,6 +390,13 @@ class MiddleSchoolMonteCarloSimulation:
         ]
         self.scatter_ax.legend(handles=legend_elements, loc='upper right', facecolor=self.bg_navy, edgecolor=self.bg_navy, labelcolor=self.text_white)
         
+        # 散点与密度层只创建一次，之后每次更新只替换数据
+        self.density_image = self.scatter_ax.imshow(
+            self.density.image(to_rgb('green'), to_rgb('red')), extent=(0, 1, 0, 1), origin='lower',
+            aspect='auto', interpolation='nearest', alpha=0.5, zorder=0)
+        self.inside_points, = self.scatter_ax.plot([], [], 'o', color='green', markersize=2, alpha=0.7)
+        self.outside_points, = self.scatter_ax.plot([], [], 'o', color='red', markersize=2, alpha=0.7)
+        
         # 创建散点图画布
         self.scatter_canvas = FigureCanvasTkAgg(self.scatter_fig, master=scatter_frame)
         self.scatter_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -352,6 +410,8 @@ class MiddleSchoolMonteCarloSimulation:
         self.line_ax.set_title("π 估计值", color=self.text_white, fontsize=14, fontfamily='SimHei')
         self.line_ax.set_xlabel("模拟点数", color=self.text_white, fontsize=12)
         self.line_ax.set_ylabel("π 估计值", color=self.text_white, fontsize=12)
+        self.line_ax.set_xscale('log')
+        self.line_ax.xaxis.set_minor_formatter(NullFormatter())
         
         # 设置 y 轴范围
         self.line_ax.set_ylim(2.5, 3.5)
@@ -367,6 +427,10 @@ class MiddleSchoolMonteCarloSimulation:
         # 绘制真实值线
         self.line_ax.axhline(y=np.pi, color='red', linestyle='--', label=f'真实值 π ≈ {np.pi:.6f}')
         
+        # 估计值折线与 95% 误差带（每次更新只替换数据）
+        self.estimate_line, = self.line_ax.plot([], [], color='#3498DB', linestyle='-', label='估计值')
+        self.estimate_band = None
+        
         # 添加图例
         self.line_ax.legend(loc='upper right', facecolor=self.bg_navy, edgecolor=self.bg_navy, labelcolor=self.text_white)
         
@@ -386,10 +450,12 @@ class MiddleSchoolMonteCarloSimulation:
             # 停止模拟
             self.simulation_running = False
             self.start_button.config(text="开始模拟", bg=self.accent_green)
+            self.sampler_combobox.config(state="readonly")
         else:
             # 开始模拟
             self.simulation_running = True
             self.start_button.config(text="停止模拟", bg="#E74C3C")  # 红色
+            self.sampler_combobox.config(state="disabled")
             
             # 创建新线程运行模拟
             if self.simulation_thread is None or not self.simulation_thread.is_alive():
@@ -400,6 +466,9 @@ class MiddleSchoolMonteCarloSimulation:
     def run_simulation(self):
         """运行蒙特卡洛模拟"""
         while self.simulation_running:
+            step_start = time.perf_counter()
+            points_before = self.total_points
+            
             # 获取每次更新的点数和速度
             points_per_update = self.points_per_update.get()
             speed = self.simulation_speed.get()
@@ -407,28 +476,30 @@ class MiddleSchoolMonteCarloSimulation:
             # 计算延迟时间（速度越大，延迟越小）
             delay = (110 - speed) / 100.0  # 从 0.1 到 1.0 秒
             
-            # 生成新的随机点
-            new_points_x = [random.random() for _ in range(points_per_update)]
-            new_points_y = [random.random() for _ in range(points_per_update)]
-            
-            # 判断点是否在圆内
-            for i in range(points_per_update):
-                x, y = new_points_x[i], new_points_y[i]
-                self.total_points += 1
+            # 整批生成新的随机点（低差异序列时每组加扰序列一块）
+            for u in self.sampler.random(points_per_update):
+                if not self.simulation_running:
+                    break
+                x, y = u[:, 0], u[:, 1]
                 
-                # 检查点是否在圆内 (以 (0.5, 0.5) 为圆心的半径为 0.5 的圆)
-                if (x - 0.5)**2 + (y - 0.5)**2 <= 0.5**2:
-                    self.inside_x.append(x)
-                    self.inside_y.append(y)
-                    self.points_inside += 1
-                else:
-                    self.outside_x.append(x)
-                    self.outside_y.append(y)
+                # 判断点是否在圆内 (以 (0.5, 0.5) 为圆心的半径为 0.5 的圆)
+                inside = (x - 0.5)**2 + (y - 0.5)**2 <= 0.5**2
+                inside_count = int(np.count_nonzero(inside))
+                self.total_points += len(u)
+                self.points_inside += inside_count
+                
+                # 每个点的估计值为 4×[在圆内]，累计均值与标准误
+                self.stats.add_sums(len(u), 4.0 * inside_count, 16.0 * inside_count)
+                
+                # 保存绘图用的样本与密度计数
+                self.reservoir.add(x, y, inside)
+                self.density.add(x, y, inside)
+            self.history.record(self.stats.count, self.stats.mean, self.stats.std_error)
             
-            # 计算 π 估计值
+            # 计算 π 估计值（模拟可能刚被重置）
+            if self.total_points == 0:
+                continue
             pi_estimate = 4 * self.points_inside / self.total_points
-            self.pi_estimates.append(pi_estimate)
-            self.iteration_counts.append(self.total_points)
             
             # 更新图形
             self.update_plots()
@@ -438,79 +509,40 @@ class MiddleSchoolMonteCarloSimulation:
             
             # 延迟
             time.sleep(delay)
+            
+            # 吞吐量（含绘图与延迟），用于估计剩余时间
+            rate = (self.total_points - points_before) / (time.perf_counter() - step_start)
+            self.points_per_second = rate if self.points_per_second <= 0 else 0.7 * self.points_per_second + 0.3 * rate
     
     def update_plots(self):
         """更新散点图和折线图"""
-        # 清除当前散点图
-        self.scatter_ax.clear()
-        
-        # 设置散点图标题和标签
-        self.scatter_ax.set_title("蒙特卡洛模拟", color=self.text_white, fontsize=14, fontfamily='SimHei')
-        self.scatter_ax.set_xlabel("X", color=self.text_white, fontsize=12)
-        self.scatter_ax.set_ylabel("Y", color=self.text_white, fontsize=12)
-        
-        # 设置散点图范围
-        self.scatter_ax.set_xlim(0, 1)
-        self.scatter_ax.set_ylim(0, 1)
-        
-        # 设置刻度标签颜色
-        self.scatter_ax.tick_params(axis='x', colors=self.text_white)
-        self.scatter_ax.tick_params(axis='y', colors=self.text_white)
-        
-        # 设置图形边框颜色
-        for spine in self.scatter_ax.spines.values():
-            spine.set_color(self.text_white)
-        
-        # 画一个正方形和内切圆
-        circle = plt.Circle((0.5, 0.5), 0.5, fill=False, color=self.text_white, linestyle='--')
-        self.scatter_ax.add_artist(circle)
-        
-        # 绘制散点
-        if self.inside_x:
-            self.scatter_ax.scatter(self.inside_x, self.inside_y, color='green', s=5, alpha=0.7, label='圆内')
-        if self.outside_x:
-            self.scatter_ax.scatter(self.outside_x, self.outside_y, color='red', s=5, alpha=0.7, label='圆外')
-        
-        # 添加图例
-        from matplotlib.patches import Patch
-        legend_elements = [
-            Patch(facecolor='green', edgecolor='green', label='圆内'),
-            Patch(facecolor='red', edgecolor='red', label='圆外')
-        ]
-        self.scatter_ax.legend(handles=legend_elements, loc='upper right', facecolor=self.bg_navy, edgecolor=self.bg_navy, labelcolor=self.text_white)
-        
-        # 清除当前折线图
-        self.line_ax.clear()
-        
-        # 设置折线图标题和标签
-        self.line_ax.set_title("π 估计值", color=self.text_white, fontsize=14, fontfamily='SimHei')
-        self.line_ax.set_xlabel("模拟点数", color=self.text_white, fontsize=12)
-        self.line_ax.set_ylabel("π 估计值", color=self.text_white, fontsize=12)
-        
-        # 设置 y 轴范围 - 动态调整
-        min_estimate = min(self.pi_estimates) if self.pi_estimates else 2.5
-        max_estimate = max(self.pi_estimates) if self.pi_estimates else 3.5
-        y_min = max(2.5, min_estimate - 0.2)
-        y_max = min(3.5, max_estimate + 0.2)
-        self.line_ax.set_ylim(y_min, y_max)
-        
-        # 设置刻度标签颜色
-        self.line_ax.tick_params(axis='x', colors=self.text_white)
-        self.line_ax.tick_params(axis='y', colors=self.text_white)
-        
-        # 设置图形边框颜色
-        for spine in self.line_ax.spines.values():
-            spine.set_color(self.text_white)
-        
-        # 绘制真实值线
-        self.line_ax.axhline(y=np.pi, color='red', linestyle='--', label=f'真实值 π ≈ {np.pi:.6f}')
-        
-        # 绘制估计值折线
-        if self.pi_estimates:
-            self.line_ax.plot(self.iteration_counts, self.pi_estimates, color='blue', marker='', linestyle='-', label='估计值')
-        
-        # 添加图例
-        self.line_ax.legend(loc='upper right', facecolor=self.bg_navy, edgecolor=self.bg_navy, labelcolor=self.text_white)
+        # 更新散点（蓄水池样本）与密度层
+        inside_x, inside_y, outside_x, outside_y = self.reservoir.split()
+        self.inside_points.set_data(inside_x, inside_y)
+        self.outside_points.set_data(outside_x, outside_y)
+        self.density_image.set_data(self.density.image(to_rgb('green'), to_rgb('red')))
+        
+        # 更新估计值折线与 95% 误差带
+        counts, estimates, errors = self.history.arrays(self.stats)
+        self.estimate_line.set_data(counts, estimates)
+        if self.estimate_band is not None:
+            self.estimate_band.remove()
+            self.estimate_band = None
+        low, high = estimates - Z_95 * errors, estimates + Z_95 * errors
+        finite = np.isfinite(low) & np.isfinite(high)
+        if finite.any():
+            self.estimate_band = self.line_ax.fill_between(counts[finite], low[finite], high[finite],
+                                                           color='#3498DB', alpha=0.3, linewidth=0)
+        
+        # 设置坐标范围 - 纵轴随误差带收窄，但不超出 [2.5, 3.5]
+        if counts.size:
+            values = np.concatenate([estimates, low[finite], high[finite], [np.pi]])
+            y_min = max(2.5, values.min() - 0.02)
+            y_max = min(3.5, values.max() + 0.02)
+            self.line_ax.set_ylim(y_min, y_max)
+            self.line_ax.set_xlim(max(counts[0] * 0.8, 1), counts[-1] * 1.5)
+        else:
+            self.line_ax.set_ylim(2.5, 3.5)
         
         # 更新画布
         self.scatter_fig.tight_layout(pad=2.0)
@@ -523,27 +555,49 @@ class MiddleSchoolMonteCarloSimulation:
         self.pi_estimate_var.set(f"π ≈ {pi_estimate:.8f}")
         self.total_points_var.set(f"总点数: {self.total_points}")
         self.inside_points_var.set(f"圆内点数: {self.points_inside}")
+        
+        half_width = Z_95 * self.stats.std_error
+        remaining, seconds = estimate_eta(self.stats, self.TARGET_PRECISION, self.points_per_second)
+        if remaining is None:
+            eta_text = "样本不足，暂无法估计"
+        elif remaining == 0:
+            eta_text = "已达到"
+        else:
+            eta_text = f"还需约 {remaining:.3g} 点，{format_duration(seconds)}"
+        order = convergence_order(*self.history.arrays(self.stats)[::2])
+        order_text = f"\n误差约与 N^{order:.2f} 成正比" if order is not None else ""
+        self.eta_var.set(f"误差范围 (95%): ±{half_width:.4f}\n达到 ±{self.TARGET_PRECISION:g}: {eta_text}{order_text}")
+    
+    def on_sampler_change(self, event=None):
+        """切换随机点生成方式后从头开始（低差异序列的误差由多组加扰序列的差异估计）"""
+        kinds = {label: kind for kind, label in SAMPLERS.items()}
+        self.simulation_running = False
+        self.sampler = make_sampler(kinds.get(self.sampler_var.get(), "pseudo"), self.rng)
+        self.stats = self.sampler.make_stats()
+        self.reset_simulation()
     
     def reset_simulation(self):
         """重置模拟"""
         # 停止模拟
         self.simulation_running = False
         self.start_button.config(text="开始模拟", bg=self.accent_green)
+        self.sampler_combobox.config(state="readonly")
         
         # 重置变量
         self.total_points = 0
         self.points_inside = 0
-        self.inside_x = []
-        self.inside_y = []
-        self.outside_x = []
-        self.outside_y = []
-        self.pi_estimates = []
-        self.iteration_counts = []
+        self.reservoir.clear()
+        self.density.clear()
+        self.sampler.reset()
+        self.stats.clear()
+        self.history.clear()
+        self.points_per_second = 0.0
         
         # 重置结果显示
         self.pi_estimate_var.set("π ≈ 等待模拟...")
         self.total_points_var.set("总点数: 0")
         self.inside_points_var.set("圆内点数: 0")
+        self.eta_var.set(f"目标精度 ±{self.TARGET_PRECISION:g}")
         
         # 更新图形
         self.update_plots()
@@ -7,6 +7,7 @@ from matplotlib.figure import Figure
 from matplotlib.patches import Ellipse
 import sympy as sp
 from scipy import stats
+from core.symbolic_cache import symbolic_cache
 
 # 配置 Matplotlib，使中文正常显示
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
@@ -1367,17 +1368,9 @@ class RandomVariableApp:
             self.result_text3.delete(1.0, tk.END)
 
         try:
-            # 解析变换函数
+            # 解析变换函数（经符号缓存复用，防抖重绘时不再重复解析和编译）
             x_sym = sp.Symbol('x')
-            # 使用更安全的解析方式
-            from sympy.parsing.sympy_parser import (parse_expr,
-                                                    standard_transformations,
-                                                    implicit_multiplication_application)
-            transformations = (standard_transformations +
-                               (implicit_multiplication_application,))
-            transform_expr = parse_expr(transform_func_str,
-                                        local_dict={'x': x_sym, 'exp': sp.exp, 'sin': sp.sin, 'cos': sp.cos, 'tan':sp.tan, 'log':sp.log}, # 添加常用函数
-                                        transformations=transformations)
+            transform_expr = symbolic_cache.parse(transform_func_str, ('x',))
 
             # 检查解析结果是否依赖于 x
             if not transform_expr.has(x_sym):
@@ -1388,7 +1381,7 @@ class RandomVariableApp:
                  except (TypeError, ValueError):
                       raise ValueError(f"变换函数 '{transform_func_str}' 无效或不依赖于 x")
 
-            transform_func = sp.lambdify(x_sym, transform_expr, modules=['numpy', {'exp': np.exp, 'sin': np.sin, 'cos': np.cos, 'tan':np.tan, 'log':np.log}]) # 传递 numpy 函数
+            transform_func = symbolic_cache.compile(transform_expr, ('x',))
 
             # 创建子图
             ax1 = self.fig3.add_subplot(221)  # 原始分布
@@ -0,0 +1,23 @@
+"""泰勒展开：级数递推的系数应与 sympy.series 一致"""
+
+import pytest
+import sympy as sp
+
+from core.taylor_series import get_taylor_expansion
+
+x = sp.Symbol("x")
+
+
+@pytest.mark.parametrize("expression", ["x**9", "x**20+1", "sin(x)**9", "1/(1+x**2)**9", "exp(x)**12"])
+def test_integer_powers_match_sympy_series(expression):
+    order = 24
+    expansion = get_taylor_expansion(expression, 0.0)
+    expansion.extend(order)
+    expected = sp.series(sp.sympify(expression), x, 0, order + 1).removeO()
+    for i, coefficient in enumerate(expansion.coefficients):
+        assert coefficient == pytest.approx(float(expected.coeff(x, i)), rel=1e-9, abs=1e-12)
+
+
+def test_pole_is_still_rejected():
+    with pytest.raises(ValueError):
+        get_taylor_expansion("1/x**9", 0.0).extend(3)
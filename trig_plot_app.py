@@ -4,11 +4,14 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import numpy as np
 import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
 import matplotlib.pyplot as plt
 from matplotlib.font_manager import FontProperties
 import warnings
 from knowledge import KnowledgeLearningClass
+from core.adaptive_sampling import evaluate, sample_for_axes
+from core.tile_cache import TileSampleCache
+from core.taylor_series import get_taylor_expansion
+from core.symbolic_cache import symbolic_cache
 
 # Suppress specific warnings if needed (e.g., from SymPy)
 warnings.filterwarnings("ignore", category=UserWarning, module='sympy')
@@ -31,6 +34,8 @@ class TrigPlotApp:
         
         # 初始化所有需要的属性
         self.user_function = None  # 存储用户函数
+        self.user_function_key = None  # 用户函数的缓存键（表达式字符串）
+        self.sample_cache = TileSampleCache()  # 平移、缩放时复用函数采样
         self.taylor_function = None  # 存储泰勒近似曲线函数
         self.taylor_order = 3  # 初始泰勒级数阶数
         self.taylor_center_var = tk.StringVar(value="0.0") # 添加展开点变量
@@ -356,7 +361,7 @@ class TrigPlotApp:
         self.taylor_slider = ttk.Scale(
             order_frame, 
             from_=1, 
-            to=10, 
+            to=30, 
             orient=tk.HORIZONTAL, 
             command=lambda x: self._on_taylor_slider_change(x)
         )
@@ -541,25 +546,17 @@ class TrigPlotApp:
             # 解析函数表达式
             func_expr = self.function_entry.get() if hasattr(self, 'function_entry') else "sin(x)"
             
-            # 创建函数
+            # 创建函数（解析与编译结果经符号缓存复用）
             x = sp.Symbol('x')
-            expr = parse_expr(func_expr, transformations=(standard_transformations + (implicit_multiplication_application,)))
+            expr = symbolic_cache.parse(func_expr, ('x',))
             
             # 将sympy表达式转换为可计算的Python函数
-            func_lambda = sp.lambdify(x, expr, modules=['numpy'])
+            func_lambda = symbolic_cache.function(func_expr, ('x',))
             self.user_function = func_lambda  # 保存函数引用，以便其他方法使用
+            self.user_function_key = func_expr
             
-            # 获取绘图范围
-            xlim = self.ax.get_xlim()
-            x_vals = np.linspace(xlim[0], xlim[1], 1000)  # 使用1000个点来绘制平滑曲线
-            
-            # 计算y值 - 使用try/except捕获可能的计算错误
-            y_vals = []
-            for x_val in x_vals:
-                try:
-                    y_vals.append(func_lambda(x_val))
-                except (ValueError, ZeroDivisionError, OverflowError):
-                    y_vals.append(np.nan)  # 对于无法计算的点，使用NaN
+            # 按当前视口分块自适应采样：陡峭处加密，平坦处稀疏，极点处断开
+            x_vals, y_vals = self.sample_cache.sample_for_axes(func_expr, func_lambda, self.ax)
             
             # 更新或创建函数曲线
             if hasattr(self, 'func_line') and self.func_line:
@@ -577,7 +574,7 @@ class TrigPlotApp:
             
             # 尝试计算一些函数特性
             try:
-                derivative = sp.diff(expr, x)
+                derivative, = symbolic_cache.gradient(func_expr, ('x',))
                 func_info += f"导函数: {derivative}\n\n"
             except:
                 func_info += "导函数: 无法计算\n\n"
@@ -637,22 +634,16 @@ class TrigPlotApp:
             # 获取当前x轴范围
             xlim = self.ax.get_xlim()
             
-            # 在当前x轴范围内计算y值
+            # 在当前x轴范围内均匀计算y值（自适应采样在极点附近过密，不适合估计范围）
             x_vals = np.linspace(xlim[0], xlim[1], 1000)
-            y_vals = []
-            
-            for x_val in x_vals:
-                try:
-                    y_vals.append(self.user_function(x_val))
-                except (ValueError, ZeroDivisionError, OverflowError):
-                    y_vals.append(np.nan)
+            y_vals = evaluate(self.user_function, x_vals)
             
             # 过滤掉无效值
-            valid_y = [y for y in y_vals if not (np.isnan(y) or np.isinf(y))]
+            valid_y = y_vals[np.isfinite(y_vals)]
             
-            if valid_y:
+            if valid_y.size:
                 # 计算y轴范围
-                y_min, y_max = min(valid_y), max(valid_y)
+                y_min, y_max = float(valid_y.min()), float(valid_y.max())
                 y_range = y_max - y_min
                 
                 # 设置y轴范围，添加一些边距
@@ -720,18 +711,8 @@ class TrigPlotApp:
         """处理x轴范围变化事件"""
         # 如果有用户函数，重新绘制
         if hasattr(self, 'user_function') and self.user_function:
-            # 获取当前x轴范围
-            xlim = self.ax.get_xlim()
-            
-            # 重新计算函数值
-            x_vals = np.linspace(xlim[0], xlim[1], 1000)
-            y_vals = []
-            
-            for x_val in x_vals:
-                try:
-                    y_vals.append(self.user_function(x_val))
-                except (ValueError, ZeroDivisionError, OverflowError):
-                    y_vals.append(np.nan)
+            # 按新的视口取样：已算过的块直接复用，只计算新露出的块
+            x_vals, y_vals = self.sample_cache.sample_for_axes(self.user_function_key, self.user_function, self.ax)
             
             # 更新函数曲线
             if hasattr(self, 'func_line') and self.func_line:
@@ -825,9 +806,9 @@ class TrigPlotApp:
             x1 = self.x1
             y1 = self.user_function(x1)
             
-            # 使用数值方法计算导数
-            h = 1e-6  # 小增量
-            slope = (self.user_function(x1 + h) - self.user_function(x1 - h)) / (2 * h)
+            # 使用缓存的符号导数（一阶泰勒项）计算斜率
+            derivative_func, = symbolic_cache.gradient_functions(self.user_function_key, ('x',))
+            slope = float(derivative_func(x1))
             
             # 获取当前x轴范围
             xlim = self.ax.get_xlim()
@@ -1122,28 +1103,15 @@ class TrigPlotApp:
             if hasattr(self, 'taylor_label'):
                 self.taylor_label.config(text=f"阶数：{n_terms}")
             
-            # 使用sympy计算泰勒展开
-            x = sp.Symbol('x')
+            # 取得 (表达式, 展开点) 对应的泰勒展开：已求过的各阶导数与部分和直接复用，
+            # 阶数增加时只补算新增的项
             func_expr = self.function_entry.get()
-            expr = parse_expr(func_expr, transformations=(standard_transformations + (implicit_multiplication_application,)))
+            expansion = get_taylor_expansion(func_expr, center)
+            taylor_series = expansion.polynomial(n_terms)
+            taylor_func = expansion.function(n_terms)
             
-            # 计算泰勒级数 - 确保即使是偶数阶也能正确展开
-            taylor_series = sum([(sp.diff(expr, x, i).subs(x, center) / sp.factorial(i)) * (x - center)**i for i in range(n_terms + 1)])
-            
-            # 将泰勒级数转换为可计算的函数
-            taylor_func = sp.lambdify(x, taylor_series, modules=['numpy'])
-            
-            # 绘制泰勒曲线
-            xlim = self.ax.get_xlim()
-            x_vals = np.linspace(xlim[0], xlim[1], 1000)
-            
-            # 计算y值，处理可能的错误
-            y_vals = []
-            for x_val in x_vals:
-                try:
-                    y_vals.append(taylor_func(x_val))
-                except (ValueError, ZeroDivisionError, OverflowError):
-                    y_vals.append(np.nan)
+            # 绘制泰勒曲线（按视口自适应采样）
+            x_vals, y_vals = sample_for_axes(taylor_func, self.ax)
             
             # 更新或创建泰勒曲线
             if hasattr(self, 'taylor_plot') and self.taylor_plot:
@@ -1188,7 +1156,9 @@ class TrigPlotApp:
         if hasattr(self, 'taylor_label'):
             self.taylor_label.config(text=f"阶数：{n_terms}")
         
-        # 如果泰勒展开已启用，则更新泰勒展开
+        # 如果泰勒展开已启用，则更新泰勒展开（滑块在同一整数阶内移动时不重绘）
+        if n_terms == self.taylor_order and getattr(self, 'taylor_plot', None):
+            return
         if self.draw_taylor.get():
             self._update_taylor()
 
@@ -4,20 +4,115 @@ import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from scipy.integrate import solve_ivp
 from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
 import matplotlib
 from knowledge import KnowledgeLearningClass
+from core.expression_engine import compile_expression
 
 # 配置 Matplotlib 以支持中文显示
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
 matplotlib.rcParams['axes.unicode_minus'] = False  # 确保负号正确显示
 matplotlib.rcParams['font.family'] = 'sans-serif'
 
+class SlopeField:
+    """缓存的斜率网格
+
+    每次绘制时在整个显示范围内求一次斜率，此后悬停读数与流线积分都在网格上做双线性插值，
+    不再对方程求值。流线在按坐标范围归一化的坐标中以单位速度前进，因此不受纵横比影响。
+    """
+
+    RESOLUTION = 200
+    # 无穷斜率截断为有限的大数，便于插值
+    MAX_SLOPE = 1e12
+
+    def __init__(self, dydx, x_min, x_max, y_min, y_max, resolution=RESOLUTION, equation=""):
+        self.dydx = dydx
+        self.equation = equation  # 方程原文，悬停标题显示的是网格对应的方程而不是输入框的当前内容
+        self.x = np.linspace(x_min, x_max, resolution)
+        self.y = np.linspace(y_min, y_max, resolution)
+        X, Y = np.meshgrid(self.x, self.y)
+        with np.errstate(all='ignore'):
+            slope = np.broadcast_to(dydx(X, Y), X.shape).astype(float)
+        self.slope = np.nan_to_num(slope, nan=np.nan, posinf=self.MAX_SLOPE, neginf=-self.MAX_SLOPE)
+        self.x_scale = x_max - x_min
+        self.y_scale = y_max - y_min
+
+    def slope_at(self, x, y):
+        """双线性插值求斜率；范围外为NaN"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        nx, ny = self.x.size, self.y.size
+        with np.errstate(invalid='ignore'):
+            fx = (x - self.x[0]) / (self.x[-1] - self.x[0]) * (nx - 1)
+            fy = (y - self.y[0]) / (self.y[-1] - self.y[0]) * (ny - 1)
+            inside = (fx >= 0) & (fx <= nx - 1) & (fy >= 0) & (fy <= ny - 1)
+        ix = np.clip(np.nan_to_num(np.floor(fx)).astype(int), 0, nx - 2)
+        iy = np.clip(np.nan_to_num(np.floor(fy)).astype(int), 0, ny - 2)
+        tx, ty = fx - ix, fy - iy
+
+        g = self.slope
+        value = ((1 - tx) * (1 - ty) * g[iy, ix] + tx * (1 - ty) * g[iy, ix + 1]
+                 + (1 - tx) * ty * g[iy + 1, ix] + tx * ty * g[iy + 1, ix + 1])
+        value = np.where(inside, value, np.nan)
+        return value[()] if value.ndim == 0 else value
+
+    def contains(self, x, y):
+        """点是否在网格范围内"""
+        return self.x[0] <= x <= self.x[-1] and self.y[0] <= y <= self.y[-1]
+
+    def value_at(self, x, y):
+        """单点斜率：网格范围内插值，范围外（缩放或平移后）直接对方程求值"""
+        if self.contains(x, y):
+            return float(self.slope_at(x, y))
+        with np.errstate(all='ignore'):
+            try:
+                value = complex(np.asarray(self.dydx(x, y)).item())
+            except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+                return np.nan
+        return value.real if value.imag == 0 else np.nan
+
+    def _velocity(self, points):
+        """方向场在归一化坐标中的单位向量，换算回数据坐标"""
+        slope = self.slope_at(points[:, 0], points[:, 1])
+        vx = np.full_like(slope, 1.0 / self.x_scale)
+        vy = slope / self.y_scale
+        norm = np.hypot(vx, vy)
+        with np.errstate(invalid='ignore'):
+            return np.stack([vx / norm * self.x_scale, vy / norm * self.y_scale], axis=1)
+
+    def streamlines(self, seeds, length, steps):
+        """从种子点出发向前、向后各积分 length（归一化长度），定步长RK4，所有种子一起推进
+
+        返回形状为 (种子数, 2 * steps + 1, 2) 的数组，离开范围或无定义的部分为NaN
+        """
+        seeds = np.asarray(seeds, dtype=float)
+        n = len(seeds)
+        h = length / steps
+        direction = np.concatenate([np.ones(n), -np.ones(n)])[:, None]
+        points = np.concatenate([seeds, seeds])
+        path = [points]
+        for _ in range(steps):
+            k1 = self._velocity(points)
+            k2 = self._velocity(points + h / 2 * direction * k1)
+            k3 = self._velocity(points + h / 2 * direction * k2)
+            k4 = self._velocity(points + h * direction * k3)
+            points = points + h / 6 * direction * (k1 + 2 * k2 + 2 * k3 + k4)
+            path.append(points)
+
+        path = np.stack(path, axis=1)  # (2n, steps + 1, 2)
+        # 一旦出现NaN，之后的点都不画
+        path[np.cumsum(np.isnan(path).any(axis=2), axis=1) > 0] = np.nan
+        forward, backward = path[:n], path[n:]
+        return np.concatenate([backward[:, :0:-1], forward], axis=1)
+
+
 class DirectionFieldApp:
     def __init__(self, root):
         self.root = root
         self.root.title("方向场与积分曲线可视化")
         self.root.geometry("1000x700")
         self.knowledge_learner = KnowledgeLearningClass()
+        self.slope_field = None  # 当前方程的斜率网格缓存，供悬停读数与流线使用
 
         # 设置样式
         self.style = ttk.Style()
@@ -124,20 +219,26 @@ class DirectionFieldApp:
                                       variable=self.animate_var)
         animate_check.grid(row=10, column=1, sticky=tk.W, pady=5)
         
+        # 流线模式：用相图流线代替箭头方向场
+        self.streamline_var = tk.BooleanVar(value=False)
+        streamline_check = ttk.Checkbutton(control_frame, text="流线模式（相图）", 
+                                         variable=self.streamline_var)
+        streamline_check.grid(row=11, column=0, sticky=tk.W, pady=5)
+        
         # 绘制按钮
         plot_button = ttk.Button(control_frame, text="绘制", command=self.plot_direction_field_and_curves)
-        plot_button.grid(row=11, column=0, columnspan=2, pady=10)
+        plot_button.grid(row=12, column=0, columnspan=2, pady=10)
         
         # 添加保存按钮
         save_button = ttk.Button(control_frame, text="保存图像", command=self.save_figure)
-        save_button.grid(row=12, column=0, columnspan=2, pady=5)
+        save_button.grid(row=13, column=0, columnspan=2, pady=5)
 
         knowledge_learning = ttk.Button(control_frame, text="知识介绍", command=self.knowledge_learner.knowledge_learning_6_function)
-        knowledge_learning.grid(row=13, column=3, columnspan=2, pady=5)
+        knowledge_learning.grid(row=14, column=3, columnspan=2, pady=5)
         
         # 添加信息显示区域
         info_frame = ttk.LabelFrame(control_frame, text="信息", padding=5)
-        info_frame.grid(row=13, column=0, columnspan=2, sticky=tk.W+tk.E, pady=10)
+        info_frame.grid(row=14, column=0, columnspan=2, sticky=tk.W+tk.E, pady=10)
         
         self.info_text = tk.Text(info_frame, height=8, width=30, wrap=tk.WORD, 
                                font=("SimHei", 9))
@@ -219,17 +320,9 @@ class DirectionFieldApp:
                     offset = (i - num_curves/2) * (y_max - y_min) / 10
                     initial_conditions.append((x0, y0 + offset))
             
-            # 定义微分方程
-            def dydx(x, y):
-                # 安全地评估表达式
-                try:
-                    return eval(equation_str, {"__builtins__": {}}, 
-                              {"x": x, "y": y, "sin": np.sin, "cos": np.cos, 
-                               "tan": np.tan, "exp": np.exp, "log": np.log, 
-                               "sqrt": np.sqrt, "pi": np.pi})
-                except Exception as e:
-                    print(f"计算错误: {e}")
-                    return 0
+            # 定义微分方程（表达式只解析一次，非法表达式在此处报错）
+            dydx = compile_expression(equation_str, ("x", "y"))
+            self.slope_field = SlopeField(dydx, x_min, x_max, y_min, y_max, equation=equation_str)
 
             # 清除旧图
             self.ax.clear()
@@ -249,33 +342,31 @@ class DirectionFieldApp:
             else:
                 self.ax.grid(False)
             
+            # 绘制流线相图：种子网格上的轨迹一起用定步长RK4推进，一次性加入图中
+            if self.show_field_var.get() and self.streamline_var.get():
+                count = max(self.density_var.get() // 2, 5)
+                seed_x, seed_y = np.meshgrid(np.linspace(x_min, x_max, count),
+                                             np.linspace(y_min, y_max, count))
+                seeds = np.column_stack([seed_x.ravel(), seed_y.ravel()])
+                lines = self.slope_field.streamlines(seeds, length=1.5 / count, steps=40)
+                self.ax.add_collection(LineCollection(lines, colors=[self.field_color_var.get()],
+                                                      linewidths=0.8, alpha=0.8))
+            
             # 绘制方向场
-            if self.show_field_var.get():
+            elif self.show_field_var.get():
                 density = self.density_var.get()
                 x = np.linspace(x_min, x_max, density)
                 y = np.linspace(y_min, y_max, density)
                 X, Y = np.meshgrid(x, y)
                 
-                # 计算斜率
-                U = np.ones_like(X)
-                V = np.zeros_like(Y)
-                
-                # 安全计算每个点的斜率
-                for i in range(len(x)):
-                    for j in range(len(y)):
-                        try:
-                            slope = dydx(X[j, i], Y[j, i])
-                            if np.isfinite(slope):
-                                # 归一化向量
-                                norm = np.sqrt(1 + slope**2)
-                                U[j, i] = 1 / norm
-                                V[j, i] = slope / norm
-                            else:
-                                U[j, i] = 0
-                                V[j, i] = 1  # 垂直向量表示无穷斜率
-                        except:
-                            U[j, i] = 0
-                            V[j, i] = 0
+                # 整个网格一次求斜率，归一化为单位方向向量；
+                # 斜率为无穷时画竖直方向，无定义（NaN）的点不画
+                with np.errstate(all='ignore'):
+                    slope = np.broadcast_to(dydx(X, Y), X.shape)
+                    norm = np.sqrt(1 + slope**2)
+                    finite = np.isfinite(slope)
+                    U = np.where(finite, 1 / norm, 0.0)
+                    V = np.where(finite, slope / norm, np.where(np.isinf(slope), 1.0, 0.0))
                 
                 # 使用自定义颜色绘制方向场
                 field_color = self.field_color_var.get()
@@ -287,91 +378,65 @@ class DirectionFieldApp:
             if self.show_curves_var.get() and initial_conditions:
                 curve_color = self.curve_color_var.get()
                 
-                for idx, (x0, y0) in enumerate(initial_conditions):
-                    # 确保初始点在范围内
-                    if x_min <= x0 <= x_max and y_min <= y0 <= y_max:
-                        # 向前积分
-                        sol_forward = solve_ivp(
-                            dydx, 
-                            [x0, x_max], 
-                            [y0], 
-                            method='RK45',
-                            dense_output=True,
-                            events=lambda x, y: self._out_of_bounds(x, y, y_min, y_max),
-                            rtol=1e-5
-                        )
-                        
-                        # 向后积分
-                        sol_backward = solve_ivp(
-                            dydx, 
-                            [x0, x_min], 
-                            [y0], 
-                            method='RK45',
-                            dense_output=True,
-                            events=lambda x, y: self._out_of_bounds(x, y, y_min, y_max),
-                            rtol=1e-5
-                        )
+                # 只保留范围内的初始点；所有曲线的前向、后向积分合并为一个方程组一次求解
+                initial_conditions = [(x0, y0) for x0, y0 in initial_conditions
+                                      if x_min <= x0 <= x_max and y_min <= y0 <= y_max]
+                curves = self._integrate_curves(dydx, initial_conditions, x_min, x_max, y_min, y_max)
+                
+                for (x0, y0), (t_forward, y_forward, t_backward, y_backward) in zip(initial_conditions, curves):
+                    # 过滤超出范围的点
+                    valid_forward = (y_forward >= y_min) & (y_forward <= y_max)
+                    valid_backward = (y_backward >= y_min) & (y_backward <= y_max)
+                    
+                    # 如果启用动画，分段绘制
+                    if self.animate_var.get():
+                        # 先绘制初始点
+                        self.ax.plot(x0, y0, 'o', color=curve_color, markersize=6)
+                        self.canvas.draw_idle()
+                        self.root.update()
                         
-                        # 生成密集的点
-                        t_forward = np.linspace(x0, sol_forward.t[-1], 100)
-                        y_forward = sol_forward.sol(t_forward)[0]
+                        # 分段绘制向前曲线
+                        segments = 20
+                        for i in range(1, segments+1):
+                            end_idx = min(len(t_forward), int(i * len(t_forward) / segments))
+                            if end_idx > 0:
+                                segment_t = t_forward[:end_idx]
+                                segment_y = y_forward[:end_idx]
+                                segment_valid = valid_forward[:end_idx]
+                                
+                                if np.any(segment_valid):
+                                    self.ax.plot(segment_t[segment_valid], segment_y[segment_valid], 
+                                              '-', color=curve_color, linewidth=2, alpha=0.8)
+                                    self.canvas.draw_idle()
+                                    self.root.update()
+                                    self.root.after(50)  # 短暂延迟
                         
-                        t_backward = np.linspace(x0, sol_backward.t[-1], 100)
-                        y_backward = sol_backward.sol(t_backward)[0]
+                        # 分段绘制向后曲线
+                        for i in range(1, segments+1):
+                            end_idx = min(len(t_backward), int(i * len(t_backward) / segments))
+                            if end_idx > 0:
+                                segment_t = t_backward[:end_idx]
+                                segment_y = y_backward[:end_idx]
+                                segment_valid = valid_backward[:end_idx]
+                                
+                                if np.any(segment_valid):
+                                    self.ax.plot(segment_t[segment_valid], segment_y[segment_valid], 
+                                              '-', color=curve_color, linewidth=2, alpha=0.8)
+                                    self.canvas.draw_idle()
+                                    self.root.update()
+                                    self.root.after(50)  # 短暂延迟
+                    else:
+                        # 一次性绘制所有曲线
+                        if np.any(valid_forward):
+                            self.ax.plot(t_forward[valid_forward], y_forward[valid_forward], 
+                                      '-', color=curve_color, linewidth=2, alpha=0.8)
                         
-                        # 过滤超出范围的点
-                        valid_forward = (y_forward >= y_min) & (y_forward <= y_max)
-                        valid_backward = (y_backward >= y_min) & (y_backward <= y_max)
+                        if np.any(valid_backward):
+                            self.ax.plot(t_backward[valid_backward], y_backward[valid_backward], 
+                                      '-', color=curve_color, linewidth=2, alpha=0.8)
                         
-                        # 如果启用动画，分段绘制
-                        if self.animate_var.get():
-                            # 先绘制初始点
-                            self.ax.plot(x0, y0, 'o', color=curve_color, markersize=6)
-                            self.canvas.draw_idle()
-                            self.root.update()
-                            
-                            # 分段绘制向前曲线
-                            segments = 20
-                            for i in range(1, segments+1):
-                                end_idx = min(len(t_forward), int(i * len(t_forward) / segments))
-                                if end_idx > 0:
-                                    segment_t = t_forward[:end_idx]
-                                    segment_y = y_forward[:end_idx]
-                                    segment_valid = valid_forward[:end_idx]
-                                    
-                                    if np.any(segment_valid):
-                                        self.ax.plot(segment_t[segment_valid], segment_y[segment_valid], 
-                                                  '-', color=curve_color, linewidth=2, alpha=0.8)
-                                        self.canvas.draw_idle()
-                                        self.root.update()
-                                        self.root.after(50)  # 短暂延迟
-                            
-                            # 分段绘制向后曲线
-                            for i in range(1, segments+1):
-                                end_idx = min(len(t_backward), int(i * len(t_backward) / segments))
-                                if end_idx > 0:
-                                    segment_t = t_backward[:end_idx]
-                                    segment_y = y_backward[:end_idx]
-                                    segment_valid = valid_backward[:end_idx]
-                                    
-                                    if np.any(segment_valid):
-                                        self.ax.plot(segment_t[segment_valid], segment_y[segment_valid], 
-                                                  '-', color=curve_color, linewidth=2, alpha=0.8)
-                                        self.canvas.draw_idle()
-                                        self.root.update()
-                                        self.root.after(50)  # 短暂延迟
-                        else:
-                            # 一次性绘制所有曲线
-                            if np.any(valid_forward):
-                                self.ax.plot(t_forward[valid_forward], y_forward[valid_forward], 
-                                          '-', color=curve_color, linewidth=2, alpha=0.8)
-                            
-                            if np.any(valid_backward):
-                                self.ax.plot(t_backward[valid_backward], y_backward[valid_backward], 
-                                          '-', color=curve_color, linewidth=2, alpha=0.8)
-                            
-                            # 绘制初始点
-                            self.ax.plot(x0, y0, 'o', color=curve_color, markersize=6)
+                        # 绘制初始点
+                        self.ax.plot(x0, y0, 'o', color=curve_color, markersize=6)
                 
                 # 添加图例
                 self.ax.legend(['积分曲线'], loc='best')
@@ -387,9 +452,40 @@ class DirectionFieldApp:
             import traceback
             traceback.print_exc()
 
-    def _out_of_bounds(self, x, y, y_min, y_max):
-        """检查积分是否超出边界"""
-        return 1 if y[0] < y_min or y[0] > y_max else -1
+    def _integrate_curves(self, dydx, initial_conditions, x_min, x_max, y_min, y_max, samples=100):
+        """批量求积分曲线，返回每个初始点的 (t_forward, y_forward, t_backward, y_backward)
+
+        每条曲线的前向段 [x0, x_max] 与后向段 [x0, x_min] 都改写为参数 s∈[0, 1] 上的方程
+        x = x0 + s·L，dy/ds = L·f(x, y)，于是所有段共用同一个自变量，合并成一个向量方程组，
+        右端一次对所有分量求值。越出y范围较多或出现NaN的分量冻结（导数置零），不再拖慢步长。
+        """
+        if not initial_conditions:
+            return []
+
+        x0 = np.array([x for x, _ in initial_conditions], dtype=float)
+        y0 = np.array([y for _, y in initial_conditions], dtype=float)
+        starts = np.concatenate([x0, x0])
+        lengths = np.concatenate([x_max - x0, x_min - x0])
+        margin = y_max - y_min
+
+        def rhs(s, y):
+            with np.errstate(all='ignore'):
+                slope = lengths * dydx(starts + s * lengths, y)
+            active = np.isfinite(slope) & (y > y_min - margin) & (y < y_max + margin)
+            return np.where(active, slope, 0.0)
+
+        solution = solve_ivp(rhs, [0.0, 1.0], np.concatenate([y0, y0]),
+                             method='RK45', dense_output=True, rtol=1e-5)
+
+        s = np.linspace(0.0, 1.0, samples)
+        values = solution.sol(s) if solution.sol is not None else np.full((starts.size, samples), np.nan)
+        xs = starts[:, None] + s[None, :] * lengths[:, None]
+        # 冻结的分量在方程无定义处保持常数，这些点不画
+        with np.errstate(all='ignore'):
+            values = np.where(np.isnan(dydx(xs, values)), np.nan, values)
+
+        n = len(initial_conditions)
+        return [(xs[i], values[i], xs[n + i], values[n + i]) for i in range(n)]
 
     def update_info_text(self, equation_str):
         """更新信息文本区域"""
@@ -449,20 +545,17 @@ class DirectionFieldApp:
         if event.inaxes == self.ax:
             x, y = event.xdata, event.ydata
             
-            # 计算当前点的斜率
-            equation_str = self.equation_entry.get()
-            try:
-                slope = eval(equation_str, {"__builtins__": {}}, 
-                           {"x": x, "y": y, "sin": np.sin, "cos": np.cos, 
-                            "tan": np.tan, "exp": np.exp, "log": np.log, 
-                            "sqrt": np.sqrt, "pi": np.pi})
-                
-                # 更新状态栏
-                self.ax.set_title(f"方向场与积分曲线: dy/dx = {equation_str} | 坐标: ({x:.2f}, {y:.2f}), 斜率: {slope:.2f}", 
-                                fontsize=10)
-                self.canvas.draw_idle()
-            except:
-                pass
+            # 网格范围内从缓存的斜率网格插值读取，范围外直接对方程求值
+            if self.slope_field is None:
+                return
+            equation_str = self.slope_field.equation
+            slope = self.slope_field.value_at(x, y)
+            slope_text = f"{slope:.2f}" if np.isfinite(slope) else "无定义"
+            
+            # 更新状态栏
+            self.ax.set_title(f"方向场与积分曲线: dy/dx = {equation_str} | 坐标: ({x:.2f}, {y:.2f}), 斜率: {slope_text}", 
+                            fontsize=10)
+            self.canvas.draw_idle()
 
     def save_figure(self):
         """保存图像到文件"""